@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a new httpx.AsyncClient per request vs. the pooled ApiClient.
+
+Runs against a local stub server, so no network access is needed.
+
+    python benchmarks/bench_connection_pool.py --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from safetyscore.api_client import ApiClient
+from benchmarks.stub_server import StubServer
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_load(fetch: Callable[[], Awaitable[None]], total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await fetch()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rps": total / elapsed,
+    }
+
+async def bench_per_call_client(url: str, total: int, concurrency: int) -> dict:
+    """The previous behaviour: open and tear down a client on every request."""
+    async def fetch() -> None:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, params={"search": "ice cream", "limit": 1})
+            response.raise_for_status()
+            response.json()
+
+    return await run_load(fetch, total, concurrency)
+
+async def bench_pooled_client(url: str, total: int, concurrency: int) -> dict:
+    """The current behaviour: one long-lived pooled client."""
+    async with ApiClient(max_keepalive_connections=concurrency) as client:
+        async def fetch() -> None:
+            data, error = await client.make_request(url, params={"search": "ice cream", "limit": 1})
+            if error:
+                raise RuntimeError(error)
+
+        return await run_load(fetch, total, concurrency)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated upstream latency in seconds")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as stub:
+        url = f"{stub.url}/food/enforcement.json"
+        results = {
+            "per-call client": asyncio.run(bench_per_call_client(url, args.requests, args.concurrency)),
+            "pooled client": asyncio.run(bench_pooled_client(url, args.requests, args.concurrency)),
+        }
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, stub latency {args.latency * 1000:.1f} ms")
+    print(f"{'mode':<18}{'p50 (ms)':>10}{'p99 (ms)':>10}{'req/s':>10}")
+    for mode, stats in results.items():
+        print(f"{mode:<18}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['rps']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
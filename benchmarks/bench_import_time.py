@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server cold start.
+
+Imports the server in fresh interpreters under `python -X importtime` and
+reports the median total import time, the share taken by `mcp` and the share
+taken by this project's own modules (`server` and `safetyscore.*`), which is
+the part that can regress. It then starts `server.py` on stdio and times the
+replies to `initialize` and to the first `tools/list`, which is when the tools
+are imported and registered.
+
+Exits with status 1 when the project's own import time exceeds
+--threshold-ms, so it can guard against regressions in CI:
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --runs 10 --threshold-ms 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def own_module(name: str) -> bool:
+    return name == "server" or name == "safetyscore" or name.startswith("safetyscore.")
+
+def import_times(module: str = "server") -> Dict[str, float]:
+    """Imports `module` in a fresh interpreter and returns its import time breakdown in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = mcp = own = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        modules.append(name)
+        if own_module(name):
+            own += int(self_us) / 1000
+        if name == "mcp":
+            mcp = int(cumulative_us) / 1000
+        if name == module and depth == 1:
+            total = int(cumulative_us) / 1000
+    return {
+        "total_ms": total,
+        "mcp_ms": mcp,
+        "own_ms": own,
+        "tools_imported": float("safetyscore.tools.food" in modules),
+    }
+
+def request(method: str, id: Optional[int] = None, **params) -> bytes:
+    message = {"jsonrpc": "2.0", "method": method, "params": params}
+    if id is not None:
+        message["id"] = id
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+def stdio_startup() -> Dict[str, float]:
+    """Starts `server.py` on stdio and times the replies to `initialize` and the first `tools/list`."""
+    env = dict(os.environ, MCP_TRANSPORT="stdio", FDA_SYNC_INTERVAL="0", FDA_METRICS_LOG_INTERVAL="0")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "server.py"],
+        cwd=project_root,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        process.stdin.write(request(
+            "initialize",
+            id=1,
+            protocolVersion="2025-03-26",
+            capabilities={},
+            clientInfo={"name": "bench_import_time", "version": "0"},
+        ))
+        process.stdin.flush()
+        process.stdout.readline()
+        initialized = time.perf_counter()
+
+        process.stdin.write(request("notifications/initialized"))
+        process.stdin.write(request("tools/list", id=2))
+        process.stdin.flush()
+        tools = json.loads(process.stdout.readline())["result"]["tools"]
+        listed = time.perf_counter()
+    finally:
+        process.stdin.close()
+        process.terminate()
+        process.wait()
+    return {
+        "initialize_ms": (initialized - started) * 1000,
+        "tools_list_ms": (listed - started) * 1000,
+        "tools": float(len(tools)),
+    }
+
+def median_of(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--threshold-ms", type=float, default=0.0, help="fail when the project's own import time exceeds this; 0 to only report")
+    parser.add_argument("--skip-stdio", action="store_true", help="only measure the import")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    imports = median_of([import_times() for _ in range(args.runs)])
+    print(f"import server (median of {args.runs}):")
+    print(f"  total       {imports['total_ms']:>8.1f} ms")
+    print(f"  mcp         {imports['mcp_ms']:>8.1f} ms")
+    print(f"  own modules {imports['own_ms']:>8.1f} ms")
+    print(f"  tools imported at startup: {'yes' if imports['tools_imported'] else 'no'}")
+    results = {"import": imports}
+
+    if not args.skip_stdio:
+        startup = median_of([stdio_startup() for _ in range(args.runs)])
+        print(f"stdio server (median of {args.runs}, from process start):")
+        print(f"  initialize  {startup['initialize_ms']:>8.1f} ms")
+        print(f"  tools/list  {startup['tools_list_ms']:>8.1f} ms ({startup['tools']:.0f} tools)")
+        results["stdio"] = startup
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"arguments": vars(args), **results}, f, indent=2)
+
+    if args.threshold_ms and imports["own_ms"] > args.threshold_ms:
+        print(f"\nRegression: the project's own modules took {imports['own_ms']:.1f} ms to import (threshold {args.threshold_ms:.0f} ms)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
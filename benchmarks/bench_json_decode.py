@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: decoding openFDA payloads with each installed JSON decoder.
+
+Decodes synthetic payloads shaped like openFDA's responses (a 100- and a
+1,000-record recall page, a 1,000-record adverse event page and a per-day
+`count=` response over twenty years) plus any recorded responses passed with
+--payload, and reports the decode time and the memory allocated while
+decoding for the stdlib `json` module, `orjson` and `msgspec` (when installed).
+
+    python benchmarks/bench_json_decode.py
+    python benchmarks/bench_json_decode.py --payload recorded/enforcement-page.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Dict, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from benchmarks.bench_record_memory import synthetic_event, synthetic_recall
+from safetyscore.decoding import AVAILABLE_DECODERS, JSON_DECODERS, JsonDecoder, get_decoder
+
+def synthetic_payloads() -> Dict[str, bytes]:
+    rng = random.Random(0)
+    firms = [f"Example Foods Company {i}, Inc." for i in range(50)]
+
+    def page(records: List[dict]) -> bytes:
+        meta = {"results": {"skip": 0, "limit": len(records), "total": 25000}}
+        return json.dumps({"meta": meta, "results": records}).encode("utf-8")
+
+    start = date(2004, 1, 1)
+    days = [
+        {"time": (start + timedelta(days=i)).strftime("%Y%m%d"), "count": rng.randint(1, 40)}
+        for i in range(0, 365 * 20, 1)
+    ]
+    return {
+        "recalls x100": page([synthetic_recall(i, rng, firms) for i in range(100)]),
+        "recalls x1000": page([synthetic_recall(i, rng, firms) for i in range(1000)]),
+        "events x1000": page([synthetic_event(i, rng) for i in range(1000)]),
+        "count by day": json.dumps({"results": days}).encode("utf-8"),
+    }
+
+def decode_time(decoder: JsonDecoder, payload: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decoder(payload)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def decode_allocations(decoder: JsonDecoder, payload: bytes) -> int:
+    """Peak bytes allocated while decoding `payload` once."""
+    tracemalloc.start()
+    try:
+        decoder(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", nargs="*", default=[], help="recorded openFDA JSON responses to decode as well")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = synthetic_payloads()
+    for path in args.payload:
+        with open(path, "rb") as f:
+            payloads[os.path.basename(path)] = f.read()
+
+    missing = [name for name in JSON_DECODERS if name not in AVAILABLE_DECODERS]
+    if missing:
+        print(f"Not installed, skipped: {', '.join(missing)}")
+    decoders = {name: get_decoder(name) for name in AVAILABLE_DECODERS}
+
+    print(f"Best of {args.repeat}; allocations are the peak while decoding once")
+    print(f"{'payload':<18}{'size (KB)':>10}{'decoder':>10}{'time (ms)':>12}{'speedup':>9}{'alloc (MB)':>12}")
+    for name, payload in payloads.items():
+        baseline = decode_time(json.loads, payload, args.repeat)
+        for decoder_name, decoder in sorted(decoders.items(), key=lambda item: item[0] != "json"):
+            seconds = baseline if decoder_name == "json" else decode_time(decoder, payload, args.repeat)
+            print(
+                f"{name:<18}{len(payload) / 1024:>10.0f}{decoder_name:>10}{seconds * 1000:>12.2f}"
+                f"{baseline / seconds:>8.1f}x{decode_allocations(decoder, payload) / 1e6:>12.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the single-pass recall analysis report on synthetic recalls.
+
+Compares the shared report engine with the previous approach of scanning the
+records once per aggregate before formatting them.
+
+    python benchmarks/bench_recall_report.py --records 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from safetyscore.models import Recall
+from safetyscore.reports import PRODUCT_TYPE_TEMPLATE, recall_analysis_report
+
+def synthetic_recalls(count: int, seed: int = 0) -> List[Recall]:
+    rng = random.Random(seed)
+    firms = [f"Firm {i}" for i in range(max(1, count // 20))]
+    return [
+        Recall(
+            recall_number=f"F-{i:05d}-2024",
+            product_description=f"Synthetic product {i}",
+            recalling_firm=rng.choice(firms),
+            classification=rng.choice(("Class I", "Class II", "Class III")),
+            recall_initiation_date=f"{rng.randint(2012, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            reason_for_recall="Undeclared allergen",
+            code_info=f"Lot {i}",
+        )
+        for i in range(count)
+    ]
+
+def multi_pass_report(recalls: List[Recall]) -> str:
+    """The previous behaviour: one scan per aggregate, then the formatting loop."""
+    class_i = sum(1 for r in recalls if r.classification == "Class I")
+    class_ii = sum(1 for r in recalls if r.classification == "Class II")
+    class_iii = sum(1 for r in recalls if r.classification == "Class III")
+    companies = {}
+    for recall in recalls:
+        company = recall.recalling_firm or "Unknown"
+        companies[company] = companies.get(company, 0) + 1
+    top_companies = sorted(companies.items(), key=lambda x: x[1], reverse=True)[:3]
+    recent = [r for r in recalls if (r.recall_initiation_date or "") >= "20240101"]
+    parts = [f"{class_i} {class_ii} {class_iii} {top_companies} {len(recent)}"]
+    for i, recall in enumerate(recalls, 1):
+        parts.append(f"\n**Recall #{i}:**")
+        parts.append(f"🏷️ Product: {recall.product_description or 'N/A'}")
+        parts.append(f"🏢 Company: {recall.recalling_firm or 'N/A'}")
+        parts.append(f"⚠️ Classification: {recall.classification or 'N/A'}")
+        parts.append(f"📅 Recall Date: {recall.recall_initiation_date or 'N/A'}")
+        parts.append(f"🔍 Reason: {recall.reason_for_recall or 'N/A'}")
+        if recall.code_info:
+            parts.append(f"🔢 Product Codes: {recall.code_info}")
+    return "\n".join(parts)
+
+def best_of(fn: Callable[[], str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    recalls = synthetic_recalls(args.records)
+    results = {
+        "multi-pass": best_of(lambda: multi_pass_report(recalls), args.repeat),
+        "single-pass": best_of(
+            lambda: recall_analysis_report(recalls, PRODUCT_TYPE_TEMPLATE, "synthetic", recent_since="20240101"),
+            args.repeat,
+        ),
+    }
+
+    print(f"{args.records} synthetic recalls, best of {args.repeat}")
+    print(f"{'mode':<14}{'total (ms)':>12}{'per record (us)':>18}")
+    for mode, seconds in results.items():
+        print(f"{mode:<14}{seconds * 1000:>12.2f}{seconds / args.records * 1e6:>18.2f}")
+
+if __name__ == "__main__":
+    main()
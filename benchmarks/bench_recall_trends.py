@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recall trend aggregations over synthetic recalls.
+
+Compares counting per firm and per month/classification over one dict per
+recall with the dictionary-encoded columns in `safetyscore.columnar`, using
+NumPy when it is installed and the stdlib fallback either way.
+
+    python benchmarks/bench_recall_trends.py --records 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from safetyscore.columnar import NUMPY_AVAILABLE, RecallColumns
+
+def synthetic_recalls(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    firms = [f"Firm {i}" for i in range(max(1, count // 20))]
+    states = ["CA", "NY", "TX", "WI", "IL", "FL", None]
+    return [
+        {
+            "classification": rng.choice(("Class I", "Class II", "Class III")),
+            "recalling_firm": rng.choice(firms),
+            "state": rng.choice(states),
+            "status": rng.choice(("Ongoing", "Terminated", "Completed")),
+            "recall_initiation_date": f"{rng.randint(2004, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+        }
+        for _ in range(count)
+    ]
+
+def dict_aggregates(recalls: List[Dict[str, Any]]) -> Any:
+    """Per-record dict access, as a tool aggregating parsed openFDA results would do it."""
+    firms: Dict[str, int] = {}
+    trend: Dict[str, Dict[str, int]] = {}
+    for recall in recalls:
+        firm = recall.get("recalling_firm")
+        if firm:
+            firms[firm] = firms.get(firm, 0) + 1
+        date = recall.get("recall_initiation_date")
+        classification = recall.get("classification")
+        if date and classification:
+            month = f"{date[:4]}-{date[4:6]}"
+            row = trend.setdefault(month, {})
+            row[classification] = row.get(classification, 0) + 1
+    return sorted(firms.items(), key=lambda item: -item[1]), trend
+
+def columnar_aggregates(columns: RecallColumns) -> Any:
+    return columns.group_count("firm"), columns.time_series("month", by="classification")
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    recalls = synthetic_recalls(args.records)
+    rows = [
+        (r["classification"], r["recalling_firm"], r["state"], r["status"], r["recall_initiation_date"])
+        for r in recalls
+    ]
+    modes = [("stdlib", False)] + ([("numpy", True)] if NUMPY_AVAILABLE else [])
+
+    results = {"dicts": best_of(lambda: dict_aggregates(recalls), args.repeat)}
+    for name, use_numpy in modes:
+        start = time.perf_counter()
+        columns = RecallColumns.from_rows(rows, use_numpy=use_numpy)
+        print(f"Encoded {len(columns)} recalls into {name} columns in {(time.perf_counter() - start) * 1000:.1f} ms")
+        results[f"columns ({name})"] = best_of(lambda: columnar_aggregates(columns), args.repeat)
+    if not NUMPY_AVAILABLE:
+        print("NumPy is not installed; install it to compare the vectorized path")
+
+    print(f"\n{args.records} synthetic recalls: top firms plus monthly counts by classification, best of {args.repeat}")
+    print(f"{'mode':<18}{'total (ms)':>12}")
+    for mode, seconds in results.items():
+        print(f"{mode:<18}{seconds * 1000:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held by cached openFDA records, as parsed dicts and in compact form.
+
+Synthetic recall and adverse event pages shaped like openFDA's responses are
+parsed from JSON (so, as with real responses, no strings are shared between
+records), then measured with tracemalloc as dicts, as the slotted records in
+`safetyscore.records`, and as slotted records that also keep the raw record.
+
+    python benchmarks/bench_record_memory.py --records 10000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from safetyscore.records import compact_response
+
+def synthetic_recall(i: int, rng: random.Random, firms: List[str]) -> Dict[str, Any]:
+    firm = rng.choice(firms)
+    date = f"{rng.randint(2012, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    return {
+        "status": rng.choice(("Ongoing", "Terminated", "Completed")),
+        "city": "Springfield",
+        "state": rng.choice(("CA", "NY", "TX", "WI")),
+        "country": "United States",
+        "classification": rng.choice(("Class I", "Class II", "Class III")),
+        "openfda": {},
+        "product_type": "Food",
+        "event_id": str(80000 + i // 3),
+        "recalling_firm": firm,
+        "address_1": f"{rng.randint(1, 9999)} Industrial Pkwy",
+        "address_2": "",
+        "postal_code": f"{rng.randint(10000, 99999)}",
+        "voluntary_mandated": "Voluntary: Firm initiated",
+        "initial_firm_notification": rng.choice(("Letter", "Telephone", "E-Mail", "Press Release")),
+        "distribution_pattern": "Nationwide",
+        "recall_number": f"F-{i:05d}-2024",
+        "product_description": f"Chocolate chip cookie dough ice cream, 1.5 qt carton, UPC 0{i:011d}",
+        "product_quantity": f"{rng.randint(100, 90000)} cases",
+        "reason_for_recall": "Product may contain undeclared peanuts, a known allergen.",
+        "recall_initiation_date": date,
+        "center_classification_date": date,
+        "report_date": date,
+        "code_info": f"Lot {rng.randint(1000, 9999)}, best by {date}",
+        "more_code_info": "",
+    }
+
+def synthetic_event(i: int, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "report_number": f"{200000 + i}",
+        "outcomes": [rng.choice(("Hospitalization", "Other Outcome", "Visited Emergency Room"))],
+        "date_created": f"{rng.randint(2012, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+        "reactions": rng.sample(["NAUSEA", "VOMITING", "DIARRHOEA", "ABDOMINAL PAIN", "HEADACHE", "RASH"], 3),
+        "consumer": {"age": str(rng.randint(1, 90)), "age_unit": "year(s)", "gender": rng.choice(("Female", "Male"))},
+        "products": [
+            {"role": "SUSPECT", "name_brand": "CRUNCHY OAT CEREAL", "industry_code": "5", "industry_name": "Cereal Prep/Breakfast Food"},
+        ],
+    }
+
+def measure(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by `build()` while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    firms = [f"Example Foods Company {i}, Inc." for i in range(max(1, args.records // 20))]
+    payloads = {
+        "recalls": json.dumps({"results": [synthetic_recall(i, rng, firms) for i in range(args.records)]}),
+        "adverse events": json.dumps({"results": [synthetic_event(i, rng) for i in range(args.records)]}),
+    }
+
+    print(f"Memory held per {args.records} cached records")
+    print(f"{'records':<16}{'dicts (MB)':>12}{'compact (MB)':>14}{'+ raw (MB)':>12}{'saved':>8}")
+    for name, payload in payloads.items():
+        full = measure(lambda: json.loads(payload))
+        compact = measure(lambda: compact_response(json.loads(payload)))
+        with_raw = measure(lambda: compact_response(json.loads(payload), keep_raw=True))
+        print(
+            f"{name:<16}{full / 1e6:>12.2f}{compact / 1e6:>14.2f}{with_raw / 1e6:>12.2f}"
+            f"{(1 - compact / full) * 100:>7.0f}%"
+        )
+
+if __name__ == "__main__":
+    main()
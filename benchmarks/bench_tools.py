@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark: every food tool end to end against a local openFDA stub.
+
+Starts `StubServer` over a synthetic (or recorded) dataset with openFDA's
+search/sort/limit/skip/count semantics, registers the food tools on a FastMCP
+server backed by a real `ApiClient` pointed at the stub, and calls each tool
+`--calls` times at `--concurrency`. Reports throughput, p50/p95/p99 latency,
+the share of calls that returned an error, and memory. Runs with no network.
+
+    python benchmarks/bench_tools.py --calls 200 --concurrency 20 --latency 0.05
+    python benchmarks/bench_tools.py --error-rate 0.05 --tools get_symptom_summary_for_product
+    python benchmarks/bench_tools.py --fixture test_safetyscore/fixtures/openfda_food.json --cache
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import cycle
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from benchmarks.bench_connection_pool import percentile
+from benchmarks.stub_server import PRODUCTS, StubServer, synthetic_dataset
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import ENFORCEMENT, EVENT, OpenFDABackend
+from safetyscore.cache import ResponseCache
+from safetyscore.fuzzy import FuzzyIndex
+from safetyscore.resilience import RetryPolicy
+from safetyscore.tools.food import register_food_tools
+
+PRODUCT_NAMES = [product.lower() for product in PRODUCTS]
+
+# Arguments for each tool; calls cycle through the variants
+TOOL_CALLS: Dict[str, List[Dict[str, Any]]] = {
+    "search_recalls_by_product_description": [{"query": name} for name in PRODUCT_NAMES],
+    "search_recalls_by_product_type": [{"product_type": name.split()[-1]} for name in PRODUCT_NAMES],
+    "search_recalls_by_specific_product": [{"product_name": name} for name in PRODUCT_NAMES],
+    "suggest_recall_search_terms": [{"query": "choclate chip"}, {"query": "peanut buter"}],
+    "search_recalls_by_specific_products": [{"product_names": PRODUCT_NAMES}],
+    "search_recalls_by_classification": [
+        {"classification": c, "max_results": 50} for c in ("Class I", "Class II", "Class III")
+    ],
+    "search_recalls_by_code_info": [{"code_info": f"Lot {lot}"} for lot in range(1000, 1100)],
+    "search_recalls_by_code_infos": [{"code_infos": [f"Lot {lot}" for lot in range(1000, 1050)]}],
+    "search_recalls_by_date": [{"days": days, "max_results": 50} for days in (30, 90, 365)],
+    "search_adverse_events_by_product": [{"product_name": name} for name in PRODUCT_NAMES],
+    "get_symptom_summary_for_product": [{"product_name": name} for name in PRODUCT_NAMES],
+    "get_firm_risk_profile": [{"firm": f"Example Foods {i}, Inc."} for i in range(0, 200, 7)],
+    "get_recall_counts": [
+        {"group_by": "classification"},
+        {"group_by": "firm", "start_date": "20200101"},
+        {"group_by": "month", "classification": "Class I"},
+    ],
+}
+
+# Tools that only answer from the local index, which this benchmark does not use
+LOCAL_ONLY_TOOLS = {"get_recall_trends"}
+
+ERROR_PREFIXES = (
+    "Error fetching data",
+    "An unexpected error occurred",
+    "openFDA is temporarily unavailable",
+    "Daily openFDA request quota exhausted",
+)
+
+def is_error(result: Any) -> bool:
+    if isinstance(result, dict):
+        return bool(result.get("error") or result.get("errors"))
+    return isinstance(result, str) and result.startswith(ERROR_PREFIXES)
+
+def rss_mb() -> float:
+    """Peak resident set size of this process so far (Linux reports KB, macOS bytes)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+async def run_tool(
+    tool: Callable[..., Awaitable[Any]],
+    variants: List[Dict[str, Any]],
+    calls: int,
+    concurrency: int,
+    trace_memory: bool,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    arguments = cycle(variants)
+
+    async def one(kwargs: Dict[str, Any]) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await tool(**kwargs)
+            latencies.append(time.perf_counter() - start)
+            errors += is_error(result)
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(next(arguments)) for _ in range(calls)))
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return {
+        "calls": calls,
+        "calls_per_second": calls / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "error_rate": errors / calls,
+        "peak_traced_mb": peak / 1e6,
+    }
+
+async def run_benchmark(args: argparse.Namespace, stub: StubServer) -> Dict[str, Dict[str, float]]:
+    cache = ResponseCache(max_entries=4096, count_ttl=3600, compact=True) if args.cache else None
+    client = ApiClient(
+        max_connections=max(args.concurrency, 10),
+        max_keepalive_connections=max(args.concurrency, 10),
+        cache=cache,
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.1),
+    )
+    backend = OpenFDABackend(
+        client, urls={ENFORCEMENT: f"{stub.url}/food/enforcement.json", EVENT: f"{stub.url}/food/event.json"}
+    )
+    mcp = FastMCP("SafetySearchBenchmark")
+    register_food_tools(mcp, backend=backend, fuzzy=FuzzyIndex())
+    tools = {name: tool.fn for name, tool in mcp._tool_manager._tools.items()}
+
+    selected = args.tools or sorted(tools)
+    results = {}
+    async with backend:
+        for name in selected:
+            if name in LOCAL_ONLY_TOOLS:
+                print(f"{name}: skipped (answers from the local index only)")
+                continue
+            if name not in TOOL_CALLS:
+                print(f"{name}: skipped (no sample arguments in TOOL_CALLS)")
+                continue
+            results[name] = await run_tool(tools[name], TOOL_CALLS[name], args.calls, args.concurrency, args.trace_memory)
+    return results
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random stub latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub responses that are 429/5xx")
+    parser.add_argument("--recalls", type=int, default=5000, help="synthetic recalls to serve")
+    parser.add_argument("--events", type=int, default=2000, help="synthetic adverse events to serve")
+    parser.add_argument("--fixture", help='serve records from a JSON file shaped like {"enforcement": [...], "event": [...]}')
+    parser.add_argument("--tools", nargs="*", help="tools to run (default: all)")
+    parser.add_argument("--cache", action="store_true", help="enable the response cache")
+    parser.add_argument("--trace-memory", action="store_true", help="report each tool's peak traced allocations (slower)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+    # httpx logs every request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.fixture:
+        with open(args.fixture, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    else:
+        records = synthetic_dataset(args.recalls, args.events)
+
+    with StubServer(records=records, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate) as stub:
+        results = asyncio.run(run_benchmark(args, stub))
+        upstream, injected = stub.requests, stub.injected_errors
+
+    print(
+        f"\n{len(records.get(ENFORCEMENT, []))} recalls, {len(records.get(EVENT, []))} events; "
+        f"{args.calls} calls per tool at concurrency {args.concurrency}; "
+        f"stub latency {args.latency * 1000:.0f} ms (+{args.jitter * 1000:.0f} ms jitter), "
+        f"error rate {args.error_rate:.0%}; cache {'on' if args.cache else 'off'}"
+    )
+    header = f"{'tool':<40}{'calls/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+    if args.trace_memory:
+        header += f"{'peak MB':>9}"
+    print(header)
+    for name, stats in results.items():
+        line = (
+            f"{name:<40}{stats['calls_per_second']:>9.1f}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+            f"{stats['p99_ms']:>9.1f}{stats['error_rate']:>8.1%}"
+        )
+        if args.trace_memory:
+            line += f"{stats['peak_traced_mb']:>9.1f}"
+        print(line)
+    print(f"\nUpstream requests: {upstream} ({injected} injected errors); peak RSS: {rss_mb():.0f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"arguments": vars(args), "upstream_requests": upstream, "injected_errors": injected, "peak_rss_mb": rss_mb(), "tools": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
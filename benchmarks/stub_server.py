@@ -0,0 +1,244 @@
+"""
+A local stub of the openFDA API for offline benchmarks.
+
+The server runs in a background thread and speaks HTTP/1.1 with keep-alive, so
+it can be used to compare connection handling in the API client without
+touching the network.
+
+By default every GET returns the same fixed payload. Given `records` (shaped
+like {"enforcement": [...], "event": [...]}), it instead answers the
+`/food/enforcement.json` and `/food/event.json` endpoints with openFDA's
+semantics: `search`, `sort`, `limit`, `skip` and `count` are evaluated over the
+records by the local index's query translation, searches without matches get
+openFDA's 404, and out-of-range `limit`/`skip` values get its 400. Latency
+(with optional jitter) and a rate of injected 429/5xx errors simulate upstream
+conditions.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from safetyscore.local_index import ENFORCEMENT, EVENT, LocalIndex, LocalIndexError, query_index
+
+DEFAULT_PAYLOAD: Dict[str, Any] = {
+    "meta": {"results": {"skip": 0, "limit": 1, "total": 1}},
+    "results": [
+        {
+            "product_description": "Vanilla Ice Cream, 1.5 qt",
+            "recalling_firm": "Example Creamery Inc.",
+            "classification": "Class II",
+            "recall_initiation_date": "20240115",
+            "reason_for_recall": "Undeclared peanuts",
+        }
+    ],
+}
+
+# openFDA's limits on search requests
+MAX_LIMIT = 1000
+MAX_SKIP = 25000
+
+# Products, firms and symptoms the synthetic dataset draws from; the tool benchmark queries the same names
+PRODUCTS = (
+    "Vanilla Ice Cream",
+    "Chocolate Chip Cookie Dough",
+    "Creamy Peanut Butter",
+    "Whole Wheat Bread",
+    "Cheddar Cheese",
+    "Baby Spinach Salad",
+    "Frozen Sweet Corn",
+    "Smoked Salmon",
+)
+REASONS = (
+    "Undeclared peanuts",
+    "Undeclared milk",
+    "Potential Listeria monocytogenes contamination",
+    "Potential Salmonella contamination",
+    "Foreign material (metal fragments)",
+)
+REACTIONS = ("NAUSEA", "VOMITING", "DIARRHOEA", "ABDOMINAL PAIN", "HEADACHE", "RASH", "DIZZINESS")
+STATES = ("CA", "NY", "TX", "WI", "IL", "FL", "OH", "WA")
+
+def synthetic_dataset(recalls: int = 5000, events: int = 2000, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """Deterministic openFDA-shaped food recalls and adverse events for the stub to serve."""
+    rng = random.Random(seed)
+    firms = [f"Example Foods {i}, Inc." for i in range(max(1, recalls // 25))]
+
+    def day() -> str:
+        return f"{rng.randint(2012, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+
+    enforcement = []
+    for i in range(recalls):
+        initiated = day()
+        enforcement.append({
+            "recall_number": f"F-{i:05d}-{initiated[:4]}",
+            "event_id": str(80000 + i // 3),
+            "status": rng.choice(("Ongoing", "Terminated", "Completed")),
+            "classification": rng.choice(("Class I", "Class II", "Class III")),
+            "product_type": "Food",
+            "recalling_firm": rng.choice(firms),
+            "city": "Springfield",
+            "state": rng.choice(STATES),
+            "country": "United States",
+            "product_description": f"{rng.choice(PRODUCTS)}, {rng.randint(1, 64)} oz, UPC 0{i:011d}",
+            "code_info": f"Lot {rng.randint(1000, 9999)}, best by {initiated}",
+            "reason_for_recall": rng.choice(REASONS),
+            "distribution_pattern": "Nationwide",
+            "product_quantity": f"{rng.randint(100, 90000)} cases",
+            "voluntary_mandated": "Voluntary: Firm initiated",
+            "recall_initiation_date": initiated,
+            "report_date": initiated,
+        })
+
+    event = []
+    for i in range(events):
+        event.append({
+            "report_number": f"{200000 + i}",
+            "date_created": day(),
+            "reactions": rng.sample(REACTIONS, rng.randint(1, 4)),
+            "outcomes": [rng.choice(("Hospitalization", "Other Outcome", "Visited Emergency Room"))],
+            "consumer": {"age": str(rng.randint(1, 90)), "age_unit": "year(s)", "gender": rng.choice(("Female", "Male"))},
+            "products": [{"role": "SUSPECT", "name_brand": rng.choice(PRODUCTS), "industry_name": "Food"}],
+        })
+    return {ENFORCEMENT: enforcement, EVENT: event}
+
+def _error(status: int, code: str, message: str) -> Tuple[int, Dict[str, Any]]:
+    return status, {"error": {"code": code, "message": message}}
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        stub: "StubServer" = self.server.stub
+        delay = stub.delay()
+        if delay:
+            time.sleep(delay)
+        status, payload = stub.respond(self.path)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+class StubServer:
+    """Serves a fixed JSON payload, or openFDA queries over `records`, on every GET request.
+
+    Usage:
+        with StubServer(latency=0.005) as stub:
+            ... requests to stub.url ...
+
+        with StubServer(records=synthetic_dataset(), latency=0.05, error_rate=0.01) as stub:
+            ... requests to f"{stub.url}/food/enforcement.json" ...
+    """
+
+    def __init__(
+        self,
+        payload: Optional[Dict[str, Any]] = None,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        records: Optional[Mapping[str, List[Dict[str, Any]]]] = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (500, 502, 503, 429),
+        seed: int = 0,
+    ):
+        """
+        Args:
+            payload: The fixed response served when no `records` are given.
+            latency: Seconds to wait before answering each request.
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free one.
+            records: Records per dataset to answer openFDA queries over.
+            jitter: Extra random latency, up to this many seconds, added to each request.
+            error_rate: Fraction of requests answered with one of `error_statuses` instead.
+            error_statuses: Statuses used for injected errors.
+            seed: Seed for the jitter and error injection.
+        """
+        self.payload = payload if payload is not None else DEFAULT_PAYLOAD
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.requests = 0
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._index: Optional[LocalIndex] = None
+        if records is not None:
+            self._index = LocalIndex(":memory:")
+            self._index.ingest(ENFORCEMENT, records.get(ENFORCEMENT, []))
+            self._index.ingest(EVENT, records.get(EVENT, []))
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._random_lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def respond(self, path: str) -> Tuple[int, Dict[str, Any]]:
+        """The status and JSON body for a GET of `path`."""
+        with self._random_lock:
+            self.requests += 1
+            inject = self.error_rate and self._random.random() < self.error_rate
+            status = self._random.choice(self.error_statuses) if inject else None
+            if inject:
+                self.injected_errors += 1
+        if status is not None:
+            return _error(status, "SERVER_ERROR" if status >= 500 else "TOO_MANY_REQUESTS", "Injected error")
+        if self._index is None:
+            return 200, self.payload
+
+        url = urlsplit(path)
+        dataset = ENFORCEMENT if url.path.endswith("/enforcement.json") else EVENT if url.path.endswith("/event.json") else None
+        if dataset is None:
+            return _error(404, "NOT_FOUND", "Unknown endpoint")
+        params = dict(parse_qsl(url.query))
+        params.pop("api_key", None)
+        try:
+            if int(params.get("limit", 1)) > MAX_LIMIT and "count" not in params:
+                return _error(400, "BAD_REQUEST", f"Limit cannot exceed {MAX_LIMIT} results for search requests.")
+            if int(params.get("skip", 0)) > MAX_SKIP:
+                return _error(400, "BAD_REQUEST", f"Skip value must be {MAX_SKIP} or less.")
+            data = query_index(self._index, dataset, params)
+        except (LocalIndexError, ValueError) as e:
+            return _error(400, "BAD_REQUEST", str(e))
+        if not data.get("results"):
+            return _error(404, "NOT_FOUND", "No matches found!")
+        return 200, data
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._index is not None:
+            self._index.close()
+
+    def __enter__(self) -> "StubServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
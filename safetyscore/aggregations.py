@@ -0,0 +1,107 @@
+"""
+Recall counts computed by openFDA rather than by the tools.
+
+A `count=` query returns pre-aggregated buckets for every matching recall in a
+single small response, so questions such as "how many Class I recalls per
+month since 2020?" cost one request instead of paging through thousands of
+records. openFDA counts a date field per day; `fold_months` rolls those days up
+into calendar months.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from .api_client import is_not_found
+from .backends import DataBackend, all_of, match_phrase, match_range
+from .local_index import ENFORCEMENT
+
+# openFDA field counted for each group_by; `.exact` counts whole values rather than words
+RECALL_COUNT_FIELDS = {
+    "classification": "classification.exact",
+    "firm": "recalling_firm.exact",
+    "state": "state.exact",
+    "month": "recall_initiation_date",
+}
+
+# openFDA returns at most 1,000 term buckets per count query
+MAX_BUCKETS = 1000
+
+def parse_date(value: str) -> Optional[str]:
+    """Normalizes a 'YYYYMMDD' or 'YYYY-MM-DD' date to openFDA's 'YYYYMMDD', or returns None if it is invalid."""
+    for pattern in ("%Y%m%d", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, pattern).strftime("%Y%m%d")
+        except ValueError:
+            continue
+    return None
+
+def recall_count_query(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    classification: Optional[str] = None,
+    firm: Optional[str] = None,
+    product: Optional[str] = None,
+) -> str:
+    """Builds the search restricting a recall count; an empty string counts every recall."""
+    terms = []
+    if start_date or end_date:
+        terms.append(match_range("recall_initiation_date", start_date or "20040101", end_date or "29991231"))
+    if classification:
+        terms.append(match_phrase("classification", classification))
+    if firm:
+        terms.append(match_phrase("recalling_firm", firm))
+    if product:
+        terms.append(match_phrase("product_description", product))
+    return all_of(*terms)
+
+def fold_months(days: List[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Rolls openFDA's per-day `{"time": "YYYYMMDD", "count": n}` buckets up into months.
+
+    Months between the first and last with no recalls are included with a count
+    of 0, so the result reads as a continuous series.
+
+    Returns:
+        Chronological `{"term": "YYYY-MM", "count": n}` buckets.
+    """
+    months: Dict[int, int] = {}
+    for day in days:
+        time = str(day.get("time") or "")
+        if len(time) >= 6 and time[:6].isdigit():
+            key = int(time[:4]) * 12 + int(time[4:6]) - 1
+            months[key] = months.get(key, 0) + day.get("count", 0)
+    if not months:
+        return []
+    return [
+        {"term": f"{key // 12:04d}-{key % 12 + 1:02d}", "count": months.get(key, 0)}
+        for key in range(min(months), max(months) + 1)
+    ]
+
+async def count_recalls(backend: DataBackend, group_by: str, query: str, limit: int) -> Dict[str, Any]:
+    """
+    Counts recalls matching `query` grouped by one of `RECALL_COUNT_FIELDS`.
+
+    Args:
+        backend: The data backend to ask; caching backends cache count queries for FDA_CACHE_TTL_COUNT.
+        group_by: 'classification', 'firm', 'state' or 'month'.
+        query: An openFDA search from `recall_count_query`.
+        limit: The largest number of term buckets to return (ignored for 'month').
+
+    Returns:
+        A dict with the 'buckets' and an 'error' message (None on success).
+        No matching recalls is not an error: the buckets are just empty.
+    """
+    # Date counts take no limit: openFDA always returns every day
+    data, error = await backend.count(
+        ENFORCEMENT,
+        RECALL_COUNT_FIELDS[group_by],
+        query=query or None,
+        limit=None if group_by == "month" else limit,
+    )
+    if error:
+        return {"buckets": [], "error": None if is_not_found(error) else error}
+    results = data.get("results", [])
+    buckets = fold_months(results) if group_by == "month" else [
+        {"term": str(item.get("term")), "count": item.get("count", 0)} for item in results[:limit]
+    ]
+    return {"buckets": buckets, "error": None}
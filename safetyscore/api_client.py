@@ -1,12 +1,176 @@
+import asyncio
 import httpx
-from typing import Any, Dict, Optional, Tuple
+import importlib.util
+import time
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+from . import decoding
+from .cache import CacheKey, ResponseCache, normalize_request
+from .decoding import JsonDecoder
+from .metrics import DECODE, UPSTREAM, add_phase, metrics, timed
+from .resilience import CircuitBreaker, RateLimiter, RetryPolicy, parse_retry_after
+
+# openFDA returns at most 1000 records per request and rejects skip values above 25000
+MAX_PAGE_SIZE = 1000
+MAX_SKIP = 25000
+
+ApiResult = Tuple[Optional[Dict[str, Any]], Optional[str]]
+
+def is_not_found(error: Optional[str]) -> bool:
+    """Whether an error message is openFDA's 404, which it returns for searches with no matches."""
+    return bool(error) and error.startswith("Error fetching data from API: 404")
+
+def empty_if_not_found(result: ApiResult) -> ApiResult:
+    """Turns openFDA's 404 for a search with no matches into an empty result, so tools report it as no matches."""
+    data, error = result
+    if is_not_found(error):
+        return {"results": []}, None
+    return data, error
+
+# HTTP/2 needs the optional `h2` package (installed with `httpx[http2]`)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
 class ApiClient:
-    """A reusable helper class for making API requests to the openFDA API."""
+    """A reusable helper class for making API requests to the openFDA API.
+
+    The client owns a single pooled `httpx.AsyncClient` so keep-alive connections
+    to openFDA are reused across tool calls. Use it as an async context manager
+    (the server does this in its lifespan) to open the pool on startup and close
+    it on shutdown; nested entries share the same pool, which is closed when the
+    last one exits.
+
+    When a `ResponseCache` is supplied, successful responses are cached by their
+    normalized URL and parameters and served without going upstream. A stale
+    entry (see `ResponseCache.stale_ttl`) is served immediately while a
+    background task fetches a fresh copy. With a `refresh_interval`, the
+    `refresh_top_n` most requested responses are also refreshed on a schedule
+    shortly before they go stale, so popular queries never wait on openFDA.
+
+    Concurrent identical requests are coalesced: the first caller starts the
+    upstream fetch and every other caller awaits the same result.
+
+    Upstream requests go through an optional shared `RateLimiter`, are retried
+    on 429/5xx and transport errors according to the `RetryPolicy`, and are
+    rejected fast by the `CircuitBreaker` while openFDA is down. An openFDA
+    `api_key` is added to every request when configured.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = True,
+        api_key: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        refresh_interval: float = 0.0,
+        refresh_top_n: int = 20,
+        refresh_margin: float = 600.0,
+        json_decoder: Optional[JsonDecoder] = None,
+    ):
+        """
+        Args:
+            timeout: Default timeout in seconds for reading, writing and waiting on the pool.
+            connect_timeout: Timeout in seconds for establishing a connection.
+            max_connections: Maximum number of concurrent connections in the pool.
+            max_keepalive_connections: Maximum number of idle connections kept alive.
+            keepalive_expiry: Seconds an idle connection is kept before being closed.
+            http2: Negotiate HTTP/2 when the `h2` package is installed.
+            transport: Optional custom transport (used by tests and benchmarks).
+            cache: Optional response cache; None disables caching.
+            coalesce: Share one upstream fetch between concurrent identical requests.
+            api_key: openFDA API key; raises the quota from per-IP to per-key limits.
+            rate_limiter: Optional limiter shared by all upstream requests.
+            retry_policy: Retry policy; the default retries up to 3 attempts.
+            circuit_breaker: Optional breaker that fails fast while upstream is down.
+            refresh_interval: Seconds between proactive refreshes of hot cached responses; 0 disables them.
+            refresh_top_n: Number of most requested responses kept warm by the proactive refresh.
+            refresh_margin: Refresh a hot response once it is within this many seconds of going stale.
+            json_decoder: Decodes response bodies; defaults to the fastest installed (see `decoding.py`).
+        """
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._transport = transport
+        self.cache = cache
+        self.coalesce = coalesce
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.refresh_interval = refresh_interval
+        self.refresh_top_n = refresh_top_n
+        self.refresh_margin = refresh_margin
+        self.json_decoder = json_decoder if json_decoder is not None else decoding.loads
+        self._inflight: Dict[CacheKey, "asyncio.Task[ApiResult]"] = {}
+        self._background: Set["asyncio.Task[ApiResult]"] = set()
+        self._demand: Counter = Counter()
+        self._requests: Dict[CacheKey, Tuple[str, Optional[Dict[str, Any]]]] = {}
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._users = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the underlying connection pool is currently open."""
+        return self._client is not None and not self._client.is_closed
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Open the pool lazily so tools still work outside the server lifespan
+        if not self.is_open:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self._transport,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        """Opens the shared connection pool and starts the proactive cache refresh if configured."""
+        self._users += 1
+        self._get_client()
+        if self.cache is not None and self.refresh_interval > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def aclose(self) -> None:
+        """Releases one user of the pool and closes it when no users remain."""
+        self._users = max(self._users - 1, 0)
+        if self._users > 0:
+            return
+        tasks = list(self._background)
+        if self._refresh_task is not None:
+            tasks.append(self._refresh_task)
+            self._refresh_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    async def __aenter__(self) -> "ApiClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
 
     async def make_request(
         self, url: str, params: Optional[Dict[str, Any]]
-    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    ) -> ApiResult:
         """
         Makes an asynchronous GET request and handles common errors.
 
@@ -19,14 +183,268 @@ class ApiClient:
             If the request is successful, data is the JSON response and error_message is None.
             If the request fails, data is None and error_message is a formatted string.
         """
+        key = normalize_request(url, params)
+        if self.cache is not None:
+            if self.refresh_interval > 0:
+                self._note_demand(key, url, params)
+            cached = await self.cache.alookup(key)
+            if cached is not None:
+                data, fresh_for = cached
+                if fresh_for <= 0:
+                    # Serve the stale response now and refresh it off the request path
+                    metrics.record_cache(url, "stale")
+                    self._revalidate(url, params, key)
+                else:
+                    metrics.record_cache(url, "hit")
+                return data, None
+            metrics.record_cache(url, "miss")
+
+        if not self.coalesce:
+            return await self._fetch(url, params, key)
+
+        if key in self._inflight:
+            # Another caller is fetching this response; the wait is upstream time for this tool call too
+            with timed(UPSTREAM):
+                return await asyncio.shield(self._inflight[key])
+        # Shield the shared fetch so one caller being cancelled doesn't cancel it for the others
+        return await asyncio.shield(self._shared_fetch(url, params, key))
+
+    def _shared_fetch(self, url: str, params: Optional[Dict[str, Any]], key: CacheKey) -> "asyncio.Task[ApiResult]":
+        """Returns the in-flight fetch for `key`, starting one if there is none."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, params, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget_inflight(key, done))
+        return task
+
+    def _revalidate(self, url: str, params: Optional[Dict[str, Any]], key: CacheKey) -> "asyncio.Task[ApiResult]":
+        """Refreshes a cached response in the background."""
+        task = self._shared_fetch(url, params, key)
+        # Keep a reference so the task isn't garbage collected, and so aclose can cancel it
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _note_demand(self, key: CacheKey, url: str, params: Optional[Dict[str, Any]]) -> None:
+        self._demand[key] += 1
+        self._requests[key] = (url, params)
+        # Bound the bookkeeping: keep only the keys that could still make the top N
+        if len(self._demand) > max(1000, self.refresh_top_n * 50):
+            self._demand = Counter(dict(self._demand.most_common(self.refresh_top_n * 10)))
+            self._requests = {k: self._requests[k] for k in self._demand}
+
+    async def refresh_hot(self) -> int:
+        """
+        Refreshes the most requested cached responses that are stale or close to going stale.
+
+        Request counts are halved after each run, so keys that stop being
+        requested drop out of the top N.
+
+        Returns:
+            The number of responses refreshed.
+        """
+        if self.cache is None:
+            return 0
+        due = []
+        for key, _ in self._demand.most_common(self.refresh_top_n):
+            remaining = await self.cache.aremaining(key)
+            if remaining is None or remaining < self.refresh_margin:
+                due.append(key)
+        self._demand = Counter({k: n // 2 for k, n in self._demand.items() if n // 2})
+        self._requests = {k: v for k, v in self._requests.items() if k in self._demand or k in due}
+
+        tasks = [self._revalidate(*self._requests[key], key) for key in due]
+        await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+        return len(tasks)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_hot()
+            except Exception:
+                # A failed refresh leaves the cached entry in place; try again next time
+                pass
+
+    def _forget_inflight(self, key: CacheKey, task: "asyncio.Task[ApiResult]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _fetch(self, url: str, params: Optional[Dict[str, Any]], key: CacheKey) -> ApiResult:
+        data, _, error = await self._get(url, params)
+        if data is not None and self.cache is not None:
+            await self.cache.aset(key, data)
+        return data, error
+
+    async def _get(
+        self, url: str, params: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[httpx.Response], Optional[str]]:
+        """Performs one logical GET, with rate limiting and retries, and returns (data, response, error_message)."""
+        if self.api_key:
+            params = {**(params or {}), "api_key": self.api_key}
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+                retry_in = self.circuit_breaker.retry_in()
+                return None, None, f"openFDA is temporarily unavailable; not retrying for {retry_in:.0f} seconds"
+            # Whether this attempt is the half-open circuit's single trial request
+            trial = self.circuit_breaker is not None and self.circuit_breaker.is_trial()
+            try:
+                if self.rate_limiter is not None:
+                    with timed(UPSTREAM):
+                        allowed = await self.rate_limiter.acquire()
+                    if not allowed:
+                        return None, None, "Daily openFDA request quota exhausted"
+
+                retry_after = None
+                try:
+                    response = await self._send(url, params)
+                    response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+                    with timed(DECODE):
+                        data = self.json_decoder(response.content)
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    error_message = f"Error fetching data from API: {status} {e.response.reason_phrase}"
+                    if not self.retry_policy.is_retryable(status):
+                        # Client errors (including 404 "no matches") say nothing about upstream health
+                        self._record_health(success=True)
+                        return None, e.response, error_message
+                    retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                    if status == 429:
+                        if self.rate_limiter is not None:
+                            self.rate_limiter.pause(retry_after if retry_after is not None else self.retry_policy.base_delay)
+                    else:
+                        self._record_health(success=False)
+                    result = (None, e.response, error_message)
+                except httpx.TransportError as e:
+                    self._record_health(success=False)
+                    result = (None, None, f"An unexpected error occurred: {e}")
+                except Exception as e:
+                    return None, None, f"An unexpected error occurred: {e}"
+                else:
+                    self._record_health(success=True)
+                    return data, response, None
+            finally:
+                if trial:
+                    # Outcomes that weren't recorded (a 429, an unexpected error, cancellation)
+                    # must not keep the trial slot, or the circuit would reject every later request
+                    self.circuit_breaker.release()
+
+            delay = self.retry_policy.delay(attempt, retry_after)
+            if delay is None:
+                return result
+            with timed(UPSTREAM):
+                await asyncio.sleep(delay)
+
+    async def _send(self, url: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        """Sends one GET attempt, recording its status and duration in the metrics."""
+        start = time.perf_counter()
+        status = "error"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-                return response.json(), None
-        except httpx.HTTPStatusError as e:
-            error_message = f"Error fetching data from API: {e.response.status_code} {e.response.reason_phrase}"
-            return None, error_message
-        except Exception as e:
-            error_message = f"An unexpected error occurred: {e}"
-            return None, error_message 
\ No newline at end of file
+            response = await self._get_client().get(url, params=params)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            add_phase(UPSTREAM, elapsed)
+            metrics.record_upstream(url, status, elapsed)
+
+    def _record_health(self, success: bool) -> None:
+        if self.circuit_breaker is None:
+            return
+        if success:
+            self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.record_failure()
+
+    async def iter_pages(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        page_size: int = 100,
+        max_results: Optional[int] = None,
+        prefetch: int = 2,
+    ) -> AsyncIterator[ApiResult]:
+        """
+        Walks a paginated openFDA search, yielding one (data, error_message) tuple per page.
+
+        Pages within openFDA's `skip` limit are requested by offset, with up to
+        `prefetch` page requests in flight while the consumer handles a page. Deeper pages follow the
+        `search_after` link openFDA returns in the `Link` header. Pages bypass the
+        response cache, so memory stays flat however many records are walked.
+        Iteration stops after the first error, which is yielded.
+
+        Args:
+            url: The endpoint URL.
+            params: Query parameters (search, sort, ...); limit and skip are managed here.
+            page_size: Records per page (openFDA allows up to 1000).
+            max_results: Stop after this many records; None walks every match.
+            prefetch: Maximum number of page requests in flight at once; 1 fetches one page at a time.
+        """
+        base_params = {k: v for k, v in (params or {}).items() if k not in ("limit", "skip")}
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        target = max_results if max_results is not None else float("inf")
+
+        data, response, error = await self._get(url, {**base_params, "limit": int(min(page_size, target))})
+        if error:
+            yield None, error
+            return
+        yield data, None
+
+        fetched = len(data.get("results", []))
+        total = data.get("meta", {}).get("results", {}).get("total", fetched)
+        target = min(target, total)
+        if fetched == 0 or fetched >= target:
+            return
+
+        # Offsets openFDA lets us request directly; everything beyond needs search_after
+        offsets = list(range(fetched, int(min(target, MAX_SKIP + page_size)), page_size))
+        offsets = [skip for skip in offsets if skip <= MAX_SKIP]
+        window: Deque["asyncio.Task[Tuple[Optional[Dict[str, Any]], Optional[httpx.Response], Optional[str]]]"] = deque()
+        last_response = response
+        try:
+            for skip in offsets:
+                limit = int(min(page_size, target - skip))
+                window.append(asyncio.ensure_future(self._get(url, {**base_params, "limit": limit, "skip": skip})))
+                if len(window) < max(prefetch, 1):
+                    continue
+                data, last_response, error = await window.popleft()
+                if error:
+                    yield None, error
+                    return
+                fetched += len(data.get("results", []))
+                yield data, None
+            while window:
+                data, last_response, error = await window.popleft()
+                if error:
+                    yield None, error
+                    return
+                fetched += len(data.get("results", []))
+                yield data, None
+        finally:
+            # Pages the consumer no longer wants; let them unwind so they release their connections
+            for task in window:
+                task.cancel()
+            await asyncio.gather(*window, return_exceptions=True)
+
+        # Deep pagination: follow openFDA's search_after links one page at a time
+        while fetched < target:
+            next_url = last_response.links.get("next", {}).get("url") if last_response is not None else None
+            if not next_url:
+                return
+            # The link asks for a full page; the last one only needs the records left
+            next_url = httpx.URL(next_url).copy_set_param("limit", int(min(page_size, target - fetched)))
+            data, last_response, error = await self._get(str(next_url), None)
+            if error:
+                yield None, error
+                return
+            results = data.get("results", [])
+            if not results:
+                return
+            if fetched + len(results) > target:
+                data["results"] = results[:int(target - fetched)]
+            fetched += len(data["results"])
+            yield data, None
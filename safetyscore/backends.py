@@ -0,0 +1,317 @@
+"""
+Data backends the food tools query.
+
+Every backend answers the same two operations over the openFDA food datasets:
+`search` (with sort, limit and skip) and `count` (server-side aggregation on a
+field). Queries use openFDA search syntax, which the helpers below build, so a
+tool can be pointed at the live API, the offline index or a fixture file
+without changing.
+"""
+
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from .api_client import MAX_PAGE_SIZE, ApiClient, ApiResult
+from .cache import CacheKey, ResponseCache, normalize_request
+from .local_index import ENFORCEMENT, EVENT, LocalIndex, LocalIndexError, query_index
+from .metrics import UPSTREAM, metrics, timed
+
+def match_phrase(field: str, value: str) -> str:
+    """Builds a `field:"value"` phrase term."""
+    return f'{field}:"{value}"'
+
+def match_range(field: str, start: str, end: str) -> str:
+    """Builds an inclusive `field:[start TO end]` range term."""
+    return f"{field}:[{start} TO {end}]"
+
+def all_of(*terms: str) -> str:
+    """Joins terms so that every one must match."""
+    return " AND ".join(terms)
+
+def any_of(*terms: str) -> str:
+    """Joins terms so that at least one must match."""
+    return " OR ".join(terms)
+
+def build_params(
+    query: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    skip: Optional[int] = None,
+    count: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Builds openFDA query parameters, leaving out the ones that are not set."""
+    params: Dict[str, Any] = {}
+    if query:
+        params["search"] = query
+    if count:
+        params["count"] = count
+    if sort:
+        params["sort"] = sort
+    if limit is not None:
+        params["limit"] = limit
+    if skip:
+        params["skip"] = skip
+    return params
+
+class DataBackend(ABC):
+    """
+    Interface for the data sources the tools read from.
+
+    Both operations return the same (data, error_message) tuple as
+    `ApiClient.make_request`, with data shaped like an openFDA response.
+    Backends are async context managers so the server can open and close
+    them in its lifespan.
+    """
+
+    @abstractmethod
+    async def search(
+        self,
+        dataset: str,
+        query: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: int = 1,
+        skip: int = 0,
+    ) -> ApiResult:
+        """
+        Fetches matching records.
+
+        Args:
+            dataset: ENFORCEMENT or EVENT.
+            query: An openFDA search expression; None matches everything.
+            sort: A `field:asc` or `field:desc` sort order.
+            limit: Maximum number of records to return.
+            skip: Number of records to skip.
+        """
+
+    @abstractmethod
+    async def count(
+        self,
+        dataset: str,
+        field: str,
+        query: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> ApiResult:
+        """
+        Counts matching records grouped by `field`.
+
+        Returns openFDA count buckets: {"results": [{"term": ..., "count": ...}]},
+        or {"time": ...} buckets for date fields.
+        """
+
+    async def iter_pages(
+        self,
+        dataset: str,
+        query: Optional[str] = None,
+        sort: Optional[str] = None,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+    ) -> AsyncIterator[ApiResult]:
+        """
+        Yields matching records page by page as (data, error_message) tuples.
+
+        Only one page is held at a time, so callers can walk large result sets
+        in flat memory. Iteration stops after the first error, which is yielded.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        skip = 0
+        while max_results is None or skip < max_results:
+            limit = page_size if max_results is None else min(page_size, max_results - skip)
+            data, error = await self.search(dataset, query, sort, limit=limit, skip=skip)
+            if error:
+                yield None, error
+                return
+            results = data.get("results", [])
+            yield data, None
+            skip += len(results)
+            total = data.get("meta", {}).get("results", {}).get("total", skip)
+            if not results or skip >= total:
+                return
+
+    async def version(self) -> Any:
+        """A value that changes whenever the backend's data does, or None if the backend cannot tell."""
+        return None
+
+    async def __aenter__(self) -> "DataBackend":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+class OpenFDABackend(DataBackend):
+    """Queries the live openFDA API through the shared `ApiClient`."""
+
+    def __init__(self, client: ApiClient, urls: Mapping[str, str]):
+        """
+        Args:
+            client: The client used for HTTP requests (pooling, caching and coalescing live there).
+            urls: Maps each dataset to its openFDA endpoint URL.
+        """
+        self.client = client
+        self.urls = dict(urls)
+
+    async def __aenter__(self) -> "OpenFDABackend":
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.client.__aexit__(*exc_info)
+
+    async def search(self, dataset, query=None, sort=None, limit=1, skip=0) -> ApiResult:
+        return await self.client.make_request(self.urls[dataset], params=build_params(query, sort, limit, skip))
+
+    async def count(self, dataset, field, query=None, limit=None) -> ApiResult:
+        return await self.client.make_request(self.urls[dataset], params=build_params(query, limit=limit, count=field))
+
+    async def iter_pages(self, dataset, query=None, sort=None, max_results=None, page_size=100) -> AsyncIterator[ApiResult]:
+        async for page in self.client.iter_pages(
+            self.urls[dataset], build_params(query, sort), page_size=page_size, max_results=max_results,
+        ):
+            yield page
+
+class CachedBackend(DataBackend):
+    """
+    Wraps another backend with a `ResponseCache`.
+
+    The live openFDA backend already caches inside `ApiClient`; this wrapper
+    gives the same behaviour to any other backend. The cache is cleared when
+    the inner backend's `version` changes, so results written to a local index
+    by another process, such as the sync in the parent of the HTTP workers,
+    are served stale for at most `version_check_interval` seconds. Checking
+    costs a query, so lookups in between skip it.
+    """
+
+    def __init__(
+        self,
+        inner: DataBackend,
+        cache: ResponseCache,
+        version_check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.inner = inner
+        self.cache = cache
+        self.version_check_interval = version_check_interval
+        self._clock = clock
+        self._version: Any = None
+        self._version_checked: Optional[float] = None
+
+    async def __aenter__(self) -> "CachedBackend":
+        await self.inner.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.inner.__aexit__(*exc_info)
+
+    async def _cached(self, key: CacheKey, fetch: Callable[[], Awaitable[ApiResult]]) -> ApiResult:
+        now = self._clock()
+        if self._version_checked is None or now - self._version_checked >= self.version_check_interval:
+            self._version_checked = now
+            version = await self.inner.version()
+            if version != self._version:
+                await self.cache.aclear()
+                self._version = version
+        cached = await self.cache.aget(key)
+        # The key's first element is the dataset name
+        metrics.record_cache(key[0], "miss" if cached is None else "hit")
+        if cached is not None:
+            return cached, None
+        data, error = await fetch()
+        if data is not None:
+            await self.cache.aset(key, data)
+        return data, error
+
+    async def search(self, dataset, query=None, sort=None, limit=1, skip=0) -> ApiResult:
+        key = normalize_request(dataset, build_params(query, sort, limit, skip))
+        return await self._cached(key, lambda: self.inner.search(dataset, query, sort, limit, skip))
+
+    async def count(self, dataset, field, query=None, limit=None) -> ApiResult:
+        key = normalize_request(dataset, build_params(query, limit=limit, count=field))
+        return await self._cached(key, lambda: self.inner.count(dataset, field, query, limit))
+
+    async def version(self) -> Any:
+        return await self.inner.version()
+
+    async def iter_pages(self, dataset, query=None, sort=None, max_results=None, page_size=100) -> AsyncIterator[ApiResult]:
+        # Large walks are not cached; holding them would defeat streaming
+        async for page in self.inner.iter_pages(dataset, query, sort, max_results, page_size):
+            yield page
+
+class LocalIndexBackend(DataBackend):
+    """Answers queries from a `LocalIndex` built with `python -m safetyscore.local_index ingest`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index: Optional[LocalIndex] = None
+        self._users = 0
+
+    @property
+    def index(self) -> LocalIndex:
+        if self._index is None:
+            self._index = self._open()
+        return self._index
+
+    def _open(self) -> LocalIndex:
+        if not os.path.exists(self.path):
+            raise LocalIndexError(f"Local index not found at {self.path}; run `python -m safetyscore.local_index ingest` first")
+        return LocalIndex(self.path)
+
+    async def __aenter__(self) -> "LocalIndexBackend":
+        self._users += 1
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._users = max(self._users - 1, 0)
+        if self._users == 0 and self._index is not None:
+            self._index.close()
+            self._index = None
+
+    async def _query(self, dataset: str, params: Dict[str, Any]) -> ApiResult:
+        try:
+            index = self.index
+            with timed(UPSTREAM):
+                return await asyncio.to_thread(query_index, index, dataset, params), None
+        except LocalIndexError as e:
+            return None, f"Error fetching data from local index: {e}"
+        except Exception as e:
+            return None, f"An unexpected error occurred: {e}"
+
+    async def search(self, dataset, query=None, sort=None, limit=1, skip=0) -> ApiResult:
+        return await self._query(dataset, build_params(query, sort, limit, skip))
+
+    async def version(self) -> Any:
+        try:
+            index = self.index
+        except LocalIndexError:
+            return None
+        return await asyncio.to_thread(index.version)
+
+    async def count(self, dataset, field, query=None, limit=None) -> ApiResult:
+        return await self._query(dataset, build_params(query, limit=limit, count=field))
+
+class FixtureBackend(LocalIndexBackend):
+    """
+    Serves a fixed set of records from an in-memory index.
+
+    Used for deterministic tests and load tests. Records can be passed directly
+    or loaded from a JSON file shaped like {"enforcement": [...], "event": [...]}.
+    """
+
+    def __init__(self, records: Optional[Mapping[str, List[Dict[str, Any]]]] = None, path: Optional[str] = None):
+        super().__init__(":memory:")
+        if records is None and path is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        self.records = dict(records or {})
+
+    def _open(self) -> LocalIndex:
+        index = LocalIndex(":memory:")
+        index.ingest(ENFORCEMENT, self.records.get(ENFORCEMENT, []))
+        index.ingest(EVENT, self.records.get(EVENT, []))
+        return index
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        # Keep the in-memory index for the lifetime of the backend; rebuilding it loses nothing but time
+        self._users = max(self._users - 1, 0)
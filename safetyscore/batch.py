@@ -0,0 +1,144 @@
+"""
+Batch lookups: check many product names or lot codes against the recall data at once.
+
+Items are grouped into OR-ed openFDA queries (one request answers a whole
+chunk) and matching records are attributed back to the item whose phrase they
+contain. When a chunk has more matches than one page can hold, the items that
+found nothing in that page are re-checked with their own query, so truncation
+never turns into a false "no recall". Requests run with bounded concurrency.
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Sequence
+
+from .api_client import MAX_PAGE_SIZE, is_not_found
+from .backends import DataBackend, any_of, match_phrase
+
+RECALL_SUMMARY_FIELDS = (
+    "recall_number",
+    "product_description",
+    "recalling_firm",
+    "classification",
+    "reason_for_recall",
+    "recall_initiation_date",
+    "code_info",
+    "status",
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases text and splits it into alphanumeric tokens, roughly as openFDA's analyzer does."""
+    return _TOKEN_RE.findall(text.lower())
+
+def contains_phrase(tokens: Sequence[str], phrase_tokens: Sequence[str]) -> bool:
+    """Whether `phrase_tokens` appears contiguously in `tokens`."""
+    n = len(phrase_tokens)
+    if n == 0:
+        return False
+    first = phrase_tokens[0]
+    for i in range(len(tokens) - n + 1):
+        if tokens[i] == first and list(tokens[i:i + n]) == list(phrase_tokens):
+            return True
+    return False
+
+def summarize_recall(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: record.get(field) for field in RECALL_SUMMARY_FIELDS if record.get(field) is not None}
+
+async def batch_lookup(
+    backend: DataBackend,
+    dataset: str,
+    field: str,
+    items: Sequence[str],
+    chunk_size: int = 25,
+    concurrency: int = 8,
+    page_size: int = MAX_PAGE_SIZE,
+    max_matches_per_item: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Looks up each item as a phrase in `field` and returns one result per item, in input order.
+
+    Args:
+        backend: The data backend to query.
+        dataset: The dataset to search (e.g. ENFORCEMENT).
+        field: The field each item is matched against (e.g. 'product_description').
+        items: Product names, lot codes, etc. Duplicates are looked up once.
+        chunk_size: Number of items combined into one OR-ed query.
+        concurrency: Maximum number of queries in flight at once.
+        page_size: Records fetched per query (at most 1000).
+        max_matches_per_item: Matching records included in each item's result.
+
+    Returns:
+        A list of dicts with 'query', 'recalled', 'recalls' and 'error' keys.
+    """
+    unique_items = list(dict.fromkeys(item.strip() for item in items if item and item.strip()))
+    phrases = {item: tokenize(item) for item in unique_items}
+    matches: Dict[str, List[Dict[str, Any]]] = {item: [] for item in unique_items}
+    errors: Dict[str, str] = {}
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    page_size = min(page_size, MAX_PAGE_SIZE)
+
+    def attribute(chunk: Sequence[str], records: List[Dict[str, Any]]) -> bool:
+        """Assigns records to the items they match; returns False if any record matched no item."""
+        all_attributed = True
+        for record in records:
+            tokens = tokenize(record.get(field) or "")
+            matched = False
+            for item in chunk:
+                if contains_phrase(tokens, phrases[item]):
+                    matched = True
+                    if len(matches[item]) < max_matches_per_item:
+                        matches[item].append(summarize_recall(record))
+            all_attributed = all_attributed and matched
+        return all_attributed
+
+    async def search(chunk: Sequence[str]):
+        async with semaphore:
+            query = any_of(*(match_phrase(field, item.replace('"', "")) for item in chunk))
+            return await backend.search(dataset, query=query, limit=page_size)
+
+    async def lookup_single(item: str) -> None:
+        data, error = await search([item])
+        if error:
+            if not is_not_found(error):
+                errors[item] = error
+            return
+        results = data.get("results", [])
+        attribute([item], results)
+        # openFDA's phrase matching is the source of truth for a single-item query
+        if results and not matches[item]:
+            matches[item].extend(summarize_recall(r) for r in results[:max_matches_per_item])
+
+    async def lookup_chunk(chunk: Sequence[str]) -> None:
+        data, error = await search(chunk)
+        if is_not_found(error):
+            return
+        if error:
+            # Retry a failed chunk item by item so one bad item can't hide the others
+            await asyncio.gather(*(lookup_single(item) for item in chunk))
+            return
+        results = data.get("results", [])
+        all_attributed = attribute(chunk, results)
+        total = data.get("meta", {}).get("results", {}).get("total", len(results))
+        # Re-check unmatched items if the page was truncated or openFDA matched a
+        # record our tokenizer couldn't attribute to any item
+        if total > len(results) or not all_attributed:
+            await asyncio.gather(*(lookup_single(item) for item in chunk if not matches[item]))
+
+    chunks = [unique_items[i:i + chunk_size] for i in range(0, len(unique_items), max(chunk_size, 1))]
+    await asyncio.gather(*(lookup_chunk(chunk) for chunk in chunks))
+
+    results = []
+    for item in items:
+        key = item.strip() if item else ""
+        if key not in matches:
+            results.append({"query": item, "recalled": False, "recalls": [], "error": "Empty query"})
+            continue
+        results.append({
+            "query": item,
+            "recalled": bool(matches[key]),
+            "recalls": matches[key],
+            "error": errors.get(key),
+        })
+    return results
@@ -0,0 +1,452 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Mapping, Optional, Tuple
+
+from . import decoding
+from .records import compact_response
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def normalize_request(url: str, params: Optional[Mapping[str, Any]]) -> CacheKey:
+    """
+    Builds a canonical cache key for a GET request.
+
+    The URL is stripped of a trailing '?' or '/', and parameters are sorted and
+    stringified so that {'limit': 10} and {'limit': '10'} map to the same entry.
+    """
+    normalized_url = url.strip().rstrip("?/")
+    normalized_params = tuple(
+        sorted((str(k), str(v).strip()) for k, v in (params or {}).items() if v is not None)
+    )
+    return normalized_url, normalized_params
+
+class CacheStats:
+    """Counters describing how a cache is being used."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "hit_rate": self.hit_rate,
+        }
+
+class TTLCache:
+    """
+    A bounded in-memory cache with per-entry expiry and LRU eviction.
+
+    Entries are kept in access order; once `max_entries` is reached the least
+    recently used entry is evicted to make room. An entry stored with a
+    `stale_ttl` stays available to `lookup` for that long after it stops being
+    fresh, so callers can serve it while they refresh it.
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Returns (value, seconds_until_stale), or None if the entry is missing or expired.
+
+        A negative `seconds_until_stale` means the value is stale but still servable.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        fresh_until, expires_at, value = entry
+        now = self._clock()
+        if expires_at <= now:
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if fresh_until <= now:
+            self.stats.stale_hits += 1
+        else:
+            self.stats.hits += 1
+        return value, fresh_until - now
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry goes stale (negative once stale), without counting a lookup."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= self._clock():
+            return None
+        return entry[0] - self._clock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value, or None if it is missing, stale or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock() < entry[1]:
+            # Stale but not yet expired: a miss for callers that only want fresh values
+            self.stats.misses += 1
+            return None
+        found = self.lookup(key)
+        return found[0] if found is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0) -> None:
+        """Stores a value for `ttl` seconds (plus `stale_ttl` stale), evicting the least recently used entry if full."""
+        if ttl <= 0:
+            return
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        fresh_until = self._clock() + ttl
+        self._entries[key] = (fresh_until, fresh_until + max(stale_ttl, 0.0), value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+DISK_CACHE_STATEMENTS: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        fresh_until REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries(accessed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(expires_at)",
+    # Running totals kept by triggers, so size checks never scan the table
+    """
+    CREATE TABLE IF NOT EXISTS cache_size (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        bytes INTEGER NOT NULL,
+        entries INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO cache_size (id, bytes, entries) VALUES (0, 0, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entries_ai AFTER INSERT ON cache_entries BEGIN
+        UPDATE cache_size SET bytes = bytes + new.size, entries = entries + 1 WHERE id = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entries_ad AFTER DELETE ON cache_entries BEGIN
+        UPDATE cache_size SET bytes = bytes - old.size, entries = entries - 1 WHERE id = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entries_au AFTER UPDATE OF size ON cache_entries BEGIN
+        UPDATE cache_size SET bytes = bytes + new.size - old.size WHERE id = 0;
+    END
+    """,
+]
+
+class DiskCache:
+    """
+    A persistent cache in a SQLite file, with the same interface as `TTLCache`.
+
+    Entries survive restarts, so a restarted server starts warm, and several
+    worker processes on one host can share the file: SQLite's WAL mode lets
+    readers run alongside a writer, and writers wait up to `busy_timeout` for
+    each other. Expiry uses wall-clock time so it holds across processes.
+
+    Once the cache holds more than `max_entries` entries or `max_bytes` of JSON,
+    expired entries and then the least recently used ones are evicted. A hit
+    records its access time only when the stored one is more than
+    `touch_interval` seconds old, so most reads never take the write lock the
+    workers share, at the cost of LRU order being that coarse. Every
+    `compact_every` writes, expired entries are purged and free pages returned
+    to the filesystem. A database error is treated as a miss rather than failing
+    the request.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        compact_every: int = 1000,
+        busy_timeout: float = 5.0,
+        touch_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("max_entries and max_bytes must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compact_every = compact_every
+        self.touch_interval = touch_interval
+        self.stats = CacheStats()
+        self._clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        # Autocommit mode; writes open their own IMMEDIATE transactions
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            for statement in DISK_CACHE_STATEMENTS:
+                self._conn.execute(statement)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # IMMEDIATE takes the write lock up front, so concurrent writers queue on
+        # busy_timeout instead of failing when they try to upgrade a read lock
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT entries FROM cache_size WHERE id = 0").fetchone()[0]
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def _read(self, key: Hashable, now: float) -> Optional[Tuple[str, float]]:
+        """Returns the stored JSON and its fresh-until time, deleting the entry if it has expired."""
+        encoded = self._encode_key(key)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, fresh_until, expires_at, accessed_at FROM cache_entries WHERE key = ?", (encoded,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[2] <= now:
+                    self._conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (encoded, now))
+                    self.stats.expirations += 1
+                    return None
+                if now - row[3] >= self.touch_interval:
+                    self._conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, encoded))
+                return row[0], row[1]
+        except sqlite3.Error:
+            return None
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry goes stale (negative once stale), without counting a lookup."""
+        now = self._clock()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fresh_until FROM cache_entries WHERE key = ? AND expires_at > ?",
+                    (self._encode_key(key), now),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] - now if row is not None else None
+
+    def lookup(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Returns (value, seconds_until_stale), or None if the entry is missing or expired."""
+        now = self._clock()
+        row = self._read(key, now)
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if row[1] <= now:
+            self.stats.stale_hits += 1
+        else:
+            self.stats.hits += 1
+        return decoding.loads(row[0]), row[1] - now
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value, or None if it is missing, stale or expired."""
+        now = self._clock()
+        row = self._read(key, now)
+        if row is None or row[1] <= now:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return decoding.loads(row[0])
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0) -> None:
+        """Stores a value for `ttl` seconds (plus `stale_ttl` stale), evicting entries if the cache is over its caps."""
+        if ttl <= 0:
+            return
+        encoded_value = json.dumps(value, separators=(",", ":"))
+        size = len(encoded_value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = self._clock()
+        try:
+            with self._lock, self._transaction():
+                self._conn.execute(
+                    "INSERT INTO cache_entries (key, value, size, fresh_until, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "fresh_until = excluded.fresh_until, expires_at = excluded.expires_at, "
+                    "accessed_at = excluded.accessed_at",
+                    (self._encode_key(key), encoded_value, size, now + ttl, now + ttl + max(stale_ttl, 0.0), now),
+                )
+                self._evict(now)
+            self._writes += 1
+            if self.compact_every and self._writes % self.compact_every == 0:
+                self.compact()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, now: float) -> None:
+        """Brings the cache back under its caps; runs inside the caller's write transaction."""
+        size_bytes, entries = self._conn.execute("SELECT bytes, entries FROM cache_size WHERE id = 0").fetchone()
+        if size_bytes <= self.max_bytes and entries <= self.max_entries:
+            return
+        expired = self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,)).rowcount
+        self.stats.expirations += expired
+        while True:
+            size_bytes, entries = self._conn.execute("SELECT bytes, entries FROM cache_size WHERE id = 0").fetchone()
+            if size_bytes <= self.max_bytes and entries <= self.max_entries:
+                return
+            # Evict in batches of roughly a tenth of the cache to keep transactions short
+            batch = max(1, entries - self.max_entries, entries // 10 if size_bytes > self.max_bytes else 0)
+            self.stats.evictions += self._conn.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)",
+                (batch,),
+            ).rowcount
+
+    def compact(self) -> None:
+        """Purges expired entries and returns free pages to the filesystem."""
+        with self._lock:
+            with self._transaction():
+                self.stats.expirations += self._conn.execute(
+                    "DELETE FROM cache_entries WHERE expires_at <= ?", (self._clock(),)
+                ).rowcount
+            self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def clear(self) -> None:
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class ResponseCache:
+    """
+    Caches openFDA JSON responses keyed on the normalized URL and query parameters.
+
+    TTLs are chosen per request: `count=` aggregation queries use `count_ttl`,
+    other requests use the TTL configured for their endpoint URL, falling back to
+    `default_ttl`. With a `stale_ttl`, entries remain available to `lookup` for
+    that much longer once stale, for stale-while-revalidate. Entries live in an
+    in-memory `TTLCache` unless another store, such as a `DiskCache`, is given.
+    With `compact`, in-memory entries hold their records as the slotted classes
+    in `records.py` (keeping the full records as compressed JSON if `keep_raw`).
+
+    Async callers use the `a`-prefixed methods, which run a store doing disk
+    I/O, such as a `DiskCache`, in a worker thread so SQLite reads, writes,
+    evictions and checkpoints never block the event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        default_ttl: float = 3600.0,
+        endpoint_ttls: Optional[Mapping[str, float]] = None,
+        count_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        store: Optional[Any] = None,
+        stale_ttl: float = 0.0,
+        compact: bool = False,
+        keep_raw: bool = False,
+    ):
+        self.default_ttl = default_ttl
+        self.count_ttl = count_ttl
+        self.stale_ttl = stale_ttl
+        self.endpoint_ttls = {normalize_request(url, None)[0]: ttl for url, ttl in (endpoint_ttls or {}).items()}
+        self._store = store if store is not None else TTLCache(max_entries=max_entries, clock=clock)
+        # Only in-memory entries benefit from compact records; a DiskCache stores JSON either way
+        self.compact = compact and isinstance(self._store, TTLCache)
+        self.keep_raw = keep_raw
+        # Only in-memory lookups are cheap enough to make on the event loop
+        self._offload = not isinstance(self._store, TTLCache)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._store.stats
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def ttl_for(self, key: CacheKey) -> float:
+        url, params = key
+        if self.count_ttl is not None and any(name == "count" for name, _ in params):
+            return self.count_ttl
+        return self.endpoint_ttls.get(url, self.default_ttl)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        return self._store.get(key)
+
+    def lookup(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Returns (response, seconds_until_stale) for fresh or stale entries, or None."""
+        return self._store.lookup(key)
+
+    def remaining(self, key: CacheKey) -> Optional[float]:
+        """Seconds until an entry goes stale (negative once stale), or None if it is not cached."""
+        return self._store.remaining(key)
+
+    def set(self, key: CacheKey, value: Dict[str, Any]) -> None:
+        if self.compact:
+            value = compact_response(value, self.keep_raw)
+        self._store.set(key, value, self.ttl_for(key), self.stale_ttl)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    async def _run(self, method: Callable[..., Any], *args: Any) -> Any:
+        if self._offload:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def aget(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        return await self._run(self.get, key)
+
+    async def alookup(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], float]]:
+        return await self._run(self.lookup, key)
+
+    async def aremaining(self, key: CacheKey) -> Optional[float]:
+        return await self._run(self.remaining, key)
+
+    async def aset(self, key: CacheKey, value: Dict[str, Any]) -> None:
+        await self._run(self.set, key, value)
+
+    async def aclear(self) -> None:
+        await self._run(self.clear)
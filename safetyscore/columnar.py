@@ -0,0 +1,292 @@
+"""
+Column-oriented recall data for trend analytics.
+
+`RecallColumns` holds the recalls in the local index as parallel integer
+columns rather than one dict per record: categorical fields (classification,
+firm, state, status) are dictionary encoded as codes into a list of distinct
+values, and the initiation date is stored as a YYYYMMDD integer. Filters and
+group-bys then work on whole columns at once, so counting 100k recalls per firm
+and month takes tens of milliseconds.
+
+NumPy is used when it is installed (`pip install numpy`); otherwise the columns
+are stdlib `array`s and the same operations run through `Counter`, which is
+slower but gives identical results.
+"""
+
+import importlib.util
+import operator
+import threading
+from array import array
+from collections import Counter
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# Dimension names accepted by the analytics tools, and the recall column each one encodes
+CATEGORY_COLUMNS = {
+    "classification": "classification",
+    "firm": "recalling_firm",
+    "state": "state",
+    "status": "status",
+}
+
+TIME_BUCKETS = ("month", "quarter", "year")
+
+# Code for a missing categorical value or date
+MISSING = -1
+
+def _period(date: int, bucket: str) -> int:
+    """The sequential period number of a YYYYMMDD date: months, quarters or years since year 0."""
+    year, month = date // 10000, date // 100 % 100
+    if bucket == "month":
+        return year * 12 + month - 1
+    if bucket == "quarter":
+        return year * 4 + (month - 1) // 3
+    return year
+
+def period_label(period: int, bucket: str) -> str:
+    if bucket == "month":
+        return f"{period // 12:04d}-{period % 12 + 1:02d}"
+    if bucket == "quarter":
+        return f"{period // 4:04d}-Q{period % 4 + 1}"
+    return f"{period:04d}"
+
+class RecallColumns:
+    """
+    Recalls as dictionary-encoded columns.
+
+    `categories[name]` lists the distinct values of a categorical column and
+    `codes[name][i]` is the index of recall i's value in that list (MISSING if
+    it has none). `dates[i]` is recall i's initiation date as an integer, 0 if
+    unknown.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], codes: Dict[str, Any], dates: Any, use_numpy: bool):
+        self.categories = categories
+        self.codes = codes
+        self.dates = dates
+        self.use_numpy = use_numpy
+        self._lookup = {name: {value: code for code, value in enumerate(values)} for name, values in categories.items()}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]], use_numpy: Optional[bool] = None) -> "RecallColumns":
+        """
+        Encodes rows of (classification, recalling_firm, state, status, recall_initiation_date).
+
+        Args:
+            rows: The column values of each recall, in `CATEGORY_COLUMNS` order followed by the date.
+            use_numpy: Store NumPy arrays; defaults to whether NumPy is installed.
+        """
+        names = list(CATEGORY_COLUMNS.values())
+        categories: Dict[str, List[str]] = {name: [] for name in names}
+        lookups: List[Dict[str, int]] = [{} for _ in names]
+        codes = [array("i") for _ in names]
+        dates = array("i")
+        for row in rows:
+            for column, value in enumerate(row[:len(names)]):
+                if value:
+                    lookup = lookups[column]
+                    code = lookup.get(value)
+                    if code is None:
+                        code = lookup[value] = len(lookup)
+                        categories[names[column]].append(value)
+                    codes[column].append(code)
+                else:
+                    codes[column].append(MISSING)
+            date = row[len(names)]
+            dates.append(int(date) if date and date.isdigit() else 0)
+
+        if use_numpy is None:
+            use_numpy = NUMPY_AVAILABLE
+        if use_numpy:
+            import numpy as np
+            return cls(
+                categories,
+                {name: np.frombuffer(column, dtype=np.int32) for name, column in zip(names, codes)},
+                np.frombuffer(dates, dtype=np.int32),
+                True,
+            )
+        return cls(categories, dict(zip(names, codes)), dates, False)
+
+    @classmethod
+    def from_local_index(cls, index: Any, use_numpy: Optional[bool] = None) -> "RecallColumns":
+        """Encodes every recall in a `LocalIndex`."""
+        rows = index.execute(
+            f"SELECT {', '.join(CATEGORY_COLUMNS.values())}, recall_initiation_date FROM recalls"
+        )
+        return cls.from_rows((tuple(row) for row in rows), use_numpy=use_numpy)
+
+    def select(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        **equals: Optional[str],
+    ) -> Any:
+        """
+        Selects the recalls initiated between `start_date` and `end_date` (inclusive
+        YYYYMMDD strings) whose categorical columns equal the given values, e.g.
+        `select(classification="Class I")`. Dimension names ('firm') or column
+        names ('recalling_firm') are both accepted.
+
+        Returns:
+            A selection for `group_count` and `time_series`: None for every recall,
+            otherwise a boolean mask (NumPy) or a list of row numbers.
+        """
+        tests: List[Tuple[str, int]] = []
+        for name, value in equals.items():
+            if value is None:
+                continue
+            column = CATEGORY_COLUMNS.get(name, name)
+            code = self._lookup[column].get(value)
+            if code is None:
+                return self._empty()
+            tests.append((column, code))
+        low = int(start_date) if start_date else None
+        high = int(end_date) if end_date else None
+        if not tests and low is None and high is None:
+            return None
+
+        if self.use_numpy:
+            import numpy as np
+            mask = np.ones(len(self), dtype=bool)
+            for column, code in tests:
+                mask &= self.codes[column] == code
+            if low is not None:
+                mask &= self.dates >= low
+            if high is not None:
+                mask &= (self.dates <= high) & (self.dates > 0)
+            return mask
+
+        rows: Iterable[int] = range(len(self))
+        for column, code in tests:
+            values = self.codes[column]
+            rows = [i for i in rows if values[i] == code]
+        dates = self.dates
+        if low is not None:
+            rows = [i for i in rows if dates[i] >= low]
+        if high is not None:
+            rows = [i for i in rows if 0 < dates[i] <= high]
+        return list(rows)
+
+    def _empty(self) -> Any:
+        if self.use_numpy:
+            import numpy as np
+            return np.zeros(len(self), dtype=bool)
+        return []
+
+    def _column(self, values: Any, selection: Any) -> Any:
+        """The selected entries of a column."""
+        if selection is None:
+            return values
+        if self.use_numpy:
+            return values[selection]
+        return [values[i] for i in selection]
+
+    def size(self, selection: Any = None) -> int:
+        if selection is None:
+            return len(self)
+        return int(selection.sum()) if self.use_numpy else len(selection)
+
+    def group_count(self, by: str, selection: Any = None) -> List[Tuple[str, int]]:
+        """Counts the selected recalls per value of a categorical column, most frequent first."""
+        column = CATEGORY_COLUMNS.get(by, by)
+        values = self.categories[column]
+        codes = self._column(self.codes[column], selection)
+        if self.use_numpy:
+            import numpy as np
+            counts = np.bincount(codes[codes != MISSING], minlength=len(values)).tolist()
+        else:
+            tally = Counter(codes)
+            counts = [tally[code] for code in range(len(values))]
+        return sorted(((values[code], n) for code, n in enumerate(counts) if n), key=lambda item: -item[1])
+
+    def time_series(
+        self,
+        bucket: str = "month",
+        by: Optional[str] = None,
+        selection: Any = None,
+    ) -> Tuple[List[str], Dict[str, List[int]]]:
+        """
+        Counts the selected recalls per time bucket, optionally split by a categorical column.
+
+        Periods run continuously from the first to the last with a dated recall,
+        so periods without recalls appear with a count of 0.
+
+        Returns:
+            The period labels and, per category (or 'All' when `by` is None), a
+            count for each period.
+        """
+        dates = self._column(self.dates, selection)
+        column = CATEGORY_COLUMNS.get(by, by) if by else None
+        width = len(self.categories[column]) if column else 1
+
+        if self.use_numpy:
+            import numpy as np
+            keep = dates > 0
+            if column:
+                codes = self._column(self.codes[column], selection)
+                keep &= codes != MISSING
+            dates = dates[keep]
+            if not len(dates):
+                return [], {}
+            years, months = dates // 10000, dates // 100 % 100
+            if bucket == "month":
+                periods = years * 12 + months - 1
+            elif bucket == "quarter":
+                periods = years * 4 + (months - 1) // 3
+            else:
+                periods = years
+            first, last = int(periods.min()), int(periods.max())
+            keys = (periods - first) * width
+            if column:
+                keys += codes[keep]
+            grid = np.bincount(keys, minlength=(last - first + 1) * width).reshape(-1, width).T.tolist()
+        else:
+            # Count each distinct (date, code) pair with C-level iteration, then
+            # fold the few thousand distinct dates into periods. Codes are shifted
+            # by one so that MISSING packs into the key as 0.
+            if column:
+                codes = self._column(self.codes[column], selection)
+                stride = width + 1
+                tally = Counter(map(operator.add, map(operator.mul, dates, repeat(stride)), codes))
+                pairs = ((divmod(key + 1, stride), n) for key, n in tally.items())
+            else:
+                pairs = (((date, 1), n) for date, n in Counter(dates).items())
+            cells = [
+                (_period(date, bucket), code - 1, n)
+                for (date, code), n in pairs
+                if date > 0 and code > 0
+            ]
+            if not cells:
+                return [], {}
+            first = min(period for period, _, _ in cells)
+            last = max(period for period, _, _ in cells)
+            grid = [[0] * (last - first + 1) for _ in range(width)]
+            for period, code, n in cells:
+                grid[code][period - first] += n
+
+        labels = [period_label(period, bucket) for period in range(first, last + 1)]
+        names = self.categories[column] if column else ["All"]
+        return labels, {names[code]: counts for code, counts in enumerate(grid) if any(counts)}
+
+class RecallColumnStore:
+    """Builds the `RecallColumns` of a local index once, and again only after the index has changed."""
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        self.use_numpy = use_numpy
+        self._columns: Optional[RecallColumns] = None
+        self._version: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def get(self, index: Any) -> RecallColumns:
+        """The columns for `index`, rebuilt if it has been written since they were built (blocking)."""
+        with self._lock:
+            version = (id(index),) + index.version()
+            if self._columns is None or version != self._version:
+                self._columns = RecallColumns.from_local_index(index, use_numpy=self.use_numpy)
+                self._version = version
+            return self._columns
@@ -0,0 +1,49 @@
+"""
+JSON decoding for openFDA responses, cached entries and index records.
+
+openFDA pages of 1,000 records and `count=` responses over date fields run to
+megabytes, and the stdlib decoder is the slowest step in handling them. When
+`orjson` or `msgspec` is installed (`pip install orjson`) it is used instead;
+both decode the same JSON to the same dicts and lists, so callers cannot tell
+the difference. Without either, the stdlib `json` module is used.
+"""
+
+import importlib.util
+import json
+from typing import Any, Callable, Union
+
+JsonDecoder = Callable[[Union[bytes, str]], Any]
+
+# In order of preference for "auto"
+JSON_DECODERS = ("orjson", "msgspec", "json")
+
+AVAILABLE_DECODERS = tuple(
+    name for name in JSON_DECODERS if name == "json" or importlib.util.find_spec(name) is not None
+)
+
+def get_decoder(name: str = "auto") -> JsonDecoder:
+    """
+    Returns a function decoding JSON bytes or text.
+
+    Args:
+        name: 'orjson', 'msgspec', 'json', or 'auto' for the fastest one installed.
+
+    Raises:
+        ValueError: If the named decoder is unknown or not installed.
+    """
+    if name == "auto":
+        name = AVAILABLE_DECODERS[0]
+    if name not in JSON_DECODERS:
+        raise ValueError(f"Unknown JSON decoder '{name}'; expected 'auto' or one of: {', '.join(JSON_DECODERS)}")
+    if name not in AVAILABLE_DECODERS:
+        raise ValueError(f"JSON decoder '{name}' is not installed")
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec
+        return msgspec.json.Decoder().decode
+    return json.loads
+
+# The fastest installed decoder, for modules that don't take one as a parameter
+loads = get_decoder()
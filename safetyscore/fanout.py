@@ -0,0 +1,57 @@
+"""
+Concurrent fan-out of independent backend queries.
+
+A tool that needs several unrelated openFDA responses, such as symptom counts
+and case details, starts them together with `gather_queries`, so its wall time
+is that of the slowest query rather than their sum. The queries share one
+deadline, and each one reports its own result or error.
+"""
+
+import asyncio
+from typing import Awaitable, Dict, Mapping, Optional
+
+from .api_client import ApiResult
+
+async def gather_queries(
+    queries: Mapping[str, Awaitable[ApiResult]],
+    timeout: Optional[float] = None,
+) -> Dict[str, ApiResult]:
+    """
+    Runs independent backend queries concurrently under one shared deadline.
+
+    Every query always gets an entry in the result: its own (data, error) tuple,
+    or (None, error_message) if it raised or was still running when the deadline
+    passed. Callers can then render whatever legs succeeded.
+
+    Args:
+        queries: Named awaitables returning (data, error_message) tuples.
+        timeout: Seconds allowed for all queries together; None waits indefinitely.
+
+    Returns:
+        A dict mapping each query name to its (data, error_message) tuple.
+    """
+    tasks = {name: asyncio.ensure_future(query) for name, query in queries.items()}
+    if not tasks:
+        return {}
+    try:
+        await asyncio.wait(tasks.values(), timeout=timeout)
+    except asyncio.CancelledError:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    results: Dict[str, ApiResult] = {}
+    pending = []
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            pending.append(task)
+            results[name] = (None, f"Request timed out after {timeout:g} seconds")
+        elif task.exception() is not None:
+            results[name] = (None, f"An unexpected error occurred: {task.exception()}")
+        else:
+            results[name] = task.result()
+    # Let the cancelled queries unwind (release connections, record metrics) before returning
+    await asyncio.gather(*pending, return_exceptions=True)
+    return results
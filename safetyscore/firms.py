@@ -0,0 +1,376 @@
+"""
+Precomputed recall profiles of recalling firms.
+
+`FirmProfiles` keeps one `FirmProfile` per firm: its recalls counted by
+classification, status and year, its first and last recall dates, the
+categories of its recall reasons and the states its recalled products were
+distributed to. Profiles are keyed by `firm_key`, a normalized firm name, so
+"Acme Foods, Inc." and "ACME FOODS INC" share one profile and a lookup is a
+single dictionary access.
+
+Profiles are built from recall records from any source: a local index built
+from the openFDA bulk files, or pages of recalls fetched from openFDA. They are
+updated one recall at a time. A recall seen before has its old contribution
+removed first, so a recall whose classification or status changed upstream is
+counted once, as it is now. `refresh` applies only the recalls written to a
+local index since the last refresh, which it finds in the index's
+`recall_changes` log, so profiles follow the periodic sync at the cost of the
+changed recalls.
+
+Without a local index there is nothing to precompute from, and
+`profile_from_counts` builds one firm's profile from the `count=` buckets of
+its recalls on openFDA, one query per `PROFILE_COUNT_FIELDS` field.
+"""
+
+import heapq
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .batch import tokenize
+from .fuzzy import TrigramIndex
+
+# Legal-form words dropped from the end of firm names before they are compared
+LEGAL_SUFFIXES = frozenset({
+    "co", "company", "corp", "corporation", "inc", "incorporated", "l", "lc", "llc", "llp",
+    "lp", "ltd", "limited", "p", "plc", "pllc",
+})
+
+# Categories of recall reasons, matched against `reason_for_recall`; a recall can fall into several
+REASON_CATEGORIES: Tuple[Tuple[str, "re.Pattern[str]"], ...] = tuple(
+    (category, re.compile(pattern, re.IGNORECASE)) for category, pattern in (
+        ("Undeclared allergen or ingredient", r"undeclared|allergen|not declared|undisclosed"),
+        ("Listeria monocytogenes", r"listeria"),
+        ("Salmonella", r"salmonella"),
+        ("E. coli", r"e\.\s?coli|\bstec\b|o157"),
+        ("Clostridium botulinum", r"botulin"),
+        ("Other microbial contamination", r"bacteria|microb|cronobacter|cyclospora|hepatitis|norovirus|staphylococcus"),
+        ("Foreign material", r"foreign (?:material|matter|object)|\bmetal\b|\bplastic\b|\bglass\b|\brubber\b|\bwood\b"),
+        ("Lead or other heavy metals", r"\blead\b|arsenic|cadmium|mercury|heavy metal"),
+        ("Mold or spoilage", r"\bmou?ld|spoil|yeast|fungal"),
+        ("Processing or temperature control", r"under-?process|process(?:ing)? deviation|temperature|pasteuri[sz]|seal|swell"),
+        ("Labeling", r"label|misbrand"),
+        ("Manufacturing practices", r"cgmp|\bgmp\b|good manufacturing|insanitary|sanitation|unsanitary"),
+    )
+)
+OTHER_REASON = "Other"
+
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California", "CO": "Colorado",
+    "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia", "FL": "Florida", "GA": "Georgia",
+    "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas",
+    "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan",
+    "MN": "Minnesota", "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York", "NC": "North Carolina",
+    "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania", "PR": "Puerto Rico",
+    "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas",
+    "UT": "Utah", "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming",
+}
+NATIONWIDE = "Nationwide"
+
+# Upper-case state codes, full state names (longest first, so "West Virginia" wins over "Virginia") or nationwide
+_STATE_CODE_RE = re.compile(r"\b(" + "|".join(US_STATES) + r")\b")
+_STATE_NAME_RE = re.compile(
+    r"\b(" + "|".join(sorted(US_STATES.values(), key=len, reverse=True)) + r")\b", re.IGNORECASE
+)
+_STATE_CODES = {name.lower(): code for code, name in US_STATES.items()}
+_NATIONWIDE_RE = re.compile(r"nation\s?wide|all (?:50 )?states|throughout the (?:u\.?s\.?|united states)", re.IGNORECASE)
+
+# Recall columns a profile is built from, as read from the local index
+PROFILE_COLUMNS = (
+    "recall_number",
+    "recalling_firm",
+    "classification",
+    "status",
+    "recall_initiation_date",
+    "event_id",
+    "reason_for_recall",
+    "distribution_pattern",
+)
+
+# openFDA fields counted to build a profile without a local index, per profile counter
+PROFILE_COUNT_FIELDS = {
+    "classifications": "classification.exact",
+    "statuses": "status.exact",
+    "dates": "recall_initiation_date",
+    "events": "event_id",
+    "reasons": "reason_for_recall.exact",
+    "states": "distribution_pattern.exact",
+}
+
+def firm_key(name: str) -> str:
+    """Normalizes a firm name: lower case, punctuation dropped and trailing legal forms (Inc., LLC, ...) removed."""
+    words = tokenize(name)
+    end = len(words)
+    while end > 1 and words[end - 1] in LEGAL_SUFFIXES:
+        end -= 1
+    return " ".join(words[:end])
+
+def reason_categories(reason: str) -> Tuple[str, ...]:
+    """The `REASON_CATEGORIES` a recall reason falls into, or ('Other',)."""
+    categories = tuple(category for category, pattern in REASON_CATEGORIES if pattern.search(reason))
+    return categories or (OTHER_REASON,)
+
+def distribution_states(pattern: str) -> Tuple[str, ...]:
+    """The state codes named in a distribution pattern, or ('Nationwide',) when it covers the whole country."""
+    if _NATIONWIDE_RE.search(pattern):
+        return (NATIONWIDE,)
+    states = set(_STATE_CODE_RE.findall(pattern))
+    states.update(_STATE_CODES[name.lower()] for name in _STATE_NAME_RE.findall(pattern))
+    return tuple(sorted(states))
+
+class Contribution(NamedTuple):
+    """What one recall adds to its firm's profile."""
+
+    key: str
+    name: str
+    classification: Optional[str]
+    status: Optional[str]
+    date: Optional[str]
+    event_id: Optional[str]
+    reasons: Tuple[str, ...]
+    states: Tuple[str, ...]
+
+class FirmProfile:
+    """The recall history of one firm, updated one recall at a time."""
+
+    __slots__ = ("key", "names", "total", "classifications", "statuses", "dates", "events", "reasons", "states",
+                 "first_date", "last_date")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.names: Counter = Counter()
+        self.total = 0
+        self.classifications: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.dates: Counter = Counter()
+        self.events: Counter = Counter()
+        self.reasons: Counter = Counter()
+        self.states: Counter = Counter()
+        self.first_date: Optional[str] = None
+        self.last_date: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """The firm name used by most of its recalls."""
+        return self.names.most_common(1)[0][0]
+
+    def add(self, recall: Contribution) -> None:
+        self._update(recall, 1)
+        if recall.date:
+            if self.first_date is None or recall.date < self.first_date:
+                self.first_date = recall.date
+            if self.last_date is None or recall.date > self.last_date:
+                self.last_date = recall.date
+
+    def remove(self, recall: Contribution) -> None:
+        self._update(recall, -1)
+        if recall.date and recall.date in (self.first_date, self.last_date) and not self.dates[recall.date]:
+            self.first_date = min(self.dates, default=None)
+            self.last_date = max(self.dates, default=None)
+
+    def _update(self, recall: Contribution, n: int) -> None:
+        self.total += n
+        counters = [(self.names, recall.name)]
+        if recall.classification:
+            counters.append((self.classifications, recall.classification))
+        if recall.status:
+            counters.append((self.statuses, recall.status))
+        if recall.date:
+            counters.append((self.dates, recall.date))
+        if recall.event_id:
+            counters.append((self.events, recall.event_id))
+        counters.extend((self.reasons, reason) for reason in recall.reasons)
+        counters.extend((self.states, state) for state in recall.states)
+        for counter, value in counters:
+            counter[value] += n
+            if counter[value] <= 0:
+                del counter[value]
+
+    def by_year(self) -> List[Tuple[str, int]]:
+        years: Counter = Counter()
+        for date, count in self.dates.items():
+            years[date[:4]] += count
+        return sorted(years.items())
+
+    def recalls_since(self, date: str) -> int:
+        """The number of recalls initiated on or after a YYYYMMDD date."""
+        return sum(count for day, count in self.dates.items() if day >= date)
+
+def profile_from_counts(
+    key: str,
+    names: Mapping[str, int],
+    counts: Mapping[str, List[Mapping[str, Any]]],
+) -> FirmProfile:
+    """
+    Builds a firm's profile from openFDA `count=` buckets of its recalls.
+
+    Args:
+        key: The firm's `firm_key`.
+        names: The recall count of each of the firm's names.
+        counts: The buckets of each `PROFILE_COUNT_FIELDS` counter; a missing one leaves the counter empty.
+            Reasons and distribution patterns are counted as written and folded into categories and states here.
+
+    Returns:
+        The profile. Term counts are capped at openFDA's 1,000 buckets, so the
+        events, reasons and states of a firm with more distinct values are undercounted.
+    """
+    profile = FirmProfile(key)
+    profile.names.update(names)
+    profile.total = sum(names.values())
+    for name, buckets in counts.items():
+        counter = getattr(profile, name)
+        for bucket in buckets:
+            term = str(bucket.get("time" if name == "dates" else "term") or "")
+            count = bucket.get("count", 0)
+            if not term or not count:
+                continue
+            if name == "reasons":
+                counter.update(dict.fromkeys(reason_categories(term), count))
+            elif name == "states":
+                counter.update(dict.fromkeys(distribution_states(term), count))
+            else:
+                counter[term] += count
+    profile.first_date = min(profile.dates, default=None)
+    profile.last_date = max(profile.dates, default=None)
+    return profile
+
+class FirmProfiles:
+    """
+    Recall profiles of every recalling firm, keyed by normalized firm name.
+
+    `complete` is set once the profiles have been loaded from a full local
+    index; until then they only cover the recalls added to them.
+    """
+
+    def __init__(self) -> None:
+        self.complete = False
+        self._profiles: Dict[str, FirmProfile] = {}
+        self._recalls: Dict[str, Contribution] = {}
+        self._names = TrigramIndex()
+        # The last change of the local index applied; None until the index has been loaded
+        self._seq: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def get(self, firm: str) -> Optional[FirmProfile]:
+        """The profile of the firm named `firm` (in any case and with or without its legal form), if it has recalls."""
+        return self._profiles.get(firm_key(firm))
+
+    def largest(self, n: int = 5) -> List[FirmProfile]:
+        """The `n` profiles with the most recalls."""
+        with self._lock:
+            return heapq.nlargest(n, self._profiles.values(), key=lambda profile: profile.total)
+
+    def suggest(self, firm: str, limit: int = 5) -> List[str]:
+        """The names of the firms with profiles whose normalized names are closest to `firm`."""
+        with self._lock:
+            matches = self._names.search(firm_key(firm), limit=limit * 2)
+            names = [self._profiles[match["term"]].name for match in matches if match["term"] in self._profiles]
+        return names[:limit]
+
+    def add_recalls(self, recalls: Iterable[Mapping[str, Any]]) -> int:
+        """Adds or updates recalls (openFDA records), keyed on `recall_number`; returns how many changed."""
+        changed = 0
+        with self._lock:
+            for recall in recalls:
+                number = recall.get("recall_number")
+                firm = recall.get("recalling_firm")
+                if not number or not firm:
+                    continue
+                key = firm_key(firm)
+                if not key:
+                    continue
+                contribution = Contribution(
+                    key=key,
+                    name=firm.strip(),
+                    classification=recall.get("classification"),
+                    status=recall.get("status"),
+                    date=recall.get("recall_initiation_date"),
+                    event_id=recall.get("event_id"),
+                    reasons=reason_categories(recall.get("reason_for_recall") or ""),
+                    states=distribution_states(recall.get("distribution_pattern") or ""),
+                )
+                previous = self._recalls.get(number)
+                if previous == contribution:
+                    continue
+                if previous is not None:
+                    self._remove(number)
+                profile = self._profiles.get(key)
+                if profile is None:
+                    profile = self._profiles[key] = FirmProfile(key)
+                    if key not in self._names:
+                        self._names.add(key, contribution.date)
+                profile.add(contribution)
+                self._recalls[number] = contribution
+                changed += 1
+        return changed
+
+    def remove_recalls(self, recall_numbers: Iterable[str]) -> int:
+        """Removes recalls from their firms' profiles; returns how many were known."""
+        with self._lock:
+            return sum(self._remove(number) for number in recall_numbers)
+
+    def _remove(self, number: str) -> bool:
+        contribution = self._recalls.pop(number, None)
+        if contribution is None:
+            return False
+        profile = self._profiles[contribution.key]
+        profile.remove(contribution)
+        if not profile.total:
+            del self._profiles[contribution.key]
+        return True
+
+    def load_local_index(self, index: Any, batch_size: int = 5000) -> int:
+        """Builds the profiles from every recall in a `LocalIndex`; returns the number of recalls added."""
+        with self._lock:
+            # Changes made while loading are applied again by the next refresh, which is harmless
+            seq = index.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM recall_changes")[0]["seq"]
+            added = 0
+            last = ""
+            while True:
+                rows = index.execute(
+                    f"SELECT {', '.join(PROFILE_COLUMNS)} FROM recalls "
+                    "WHERE recall_number > ? ORDER BY recall_number LIMIT ?",
+                    (last, batch_size),
+                )
+                if not rows:
+                    break
+                added += self.add_recalls(dict(row) for row in rows)
+                last = rows[-1]["recall_number"]
+            self._seq = seq
+            self.complete = True
+            return added
+
+    def refresh(self, index: Any, batch_size: int = 500) -> int:
+        """
+        Applies the recalls written to a `LocalIndex` since the last load or refresh.
+
+        Loads the whole index the first time. Returns the number of recalls
+        added, changed or removed.
+        """
+        with self._lock:
+            if self._seq is None:
+                return self.load_local_index(index)
+            changed = 0
+            while True:
+                changes = index.execute(
+                    "SELECT seq, recall_number FROM recall_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (self._seq, batch_size),
+                )
+                if not changes:
+                    return changed
+                numbers = [row["recall_number"] for row in changes]
+                rows = index.execute(
+                    f"SELECT {', '.join(PROFILE_COLUMNS)} FROM recalls "
+                    f"WHERE recall_number IN ({', '.join('?' for _ in numbers)})",
+                    numbers,
+                )
+                changed += self.add_recalls(dict(row) for row in rows)
+                found = {row["recall_number"] for row in rows}
+                changed += self.remove_recalls(number for number in numbers if number not in found)
+                self._seq = changes[-1]["seq"]
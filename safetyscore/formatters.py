@@ -0,0 +1,300 @@
+"""
+Renderers for the tool results in `models.py`.
+
+Every tool builds one result model and hands it to `render`, which returns
+either the markdown report or compact JSON holding only the requested record
+fields. The paged list tools render their records page by page with a
+`RecordStream` instead.
+"""
+
+from typing import Callable, Iterable, List, Optional, Sequence, Type
+
+from pydantic import BaseModel
+
+from .metrics import RENDER, timed
+from .models import AdverseEvent, FirmRiskProfile, Recall, RecallCounts, RecallTrends, Record, SymptomSummary
+
+OUTPUT_FORMATS = ("markdown", "json")
+
+def check_output(output_format: str, fields: Optional[Sequence[str]], record_model: Type[Record]) -> Optional[str]:
+    """Validates a tool's output arguments, returning an error message if they are invalid."""
+    if output_format not in OUTPUT_FORMATS:
+        return f"Unknown output_format '{output_format}'; expected 'markdown' or 'json'."
+    unknown = [field for field in fields or [] if field not in record_model.model_fields]
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(record_model.model_fields)}."
+    return None
+
+def to_json(result: BaseModel, fields: Optional[Sequence[str]] = None) -> str:
+    """Serializes a result model as compact JSON, keeping only `fields` of each record."""
+    include = None
+    if fields:
+        records_field = type(result).records_field
+        include = {name: True for name in type(result).model_fields if name != records_field}
+        include[records_field] = {"__all__": set(fields)}
+    return result.model_dump_json(include=include, exclude_none=True)
+
+def render(
+    result: BaseModel,
+    output_format: str,
+    fields: Optional[Sequence[str]],
+    markdown: Callable[..., str],
+) -> str:
+    """Renders `result` as JSON or, by default, with its markdown formatter."""
+    with timed(RENDER):
+        if output_format == "json":
+            return to_json(result, fields)
+        return markdown(result)
+
+class RecordStream:
+    """
+    Renders the records of a paged list tool one page at a time.
+
+    Each record is rendered as its page arrives (a markdown entry, or its JSON
+    limited to `fields`) and only the rendered text is kept, so a tool walking
+    thousands of records never holds them all as models.
+    """
+
+    def __init__(self, output_format: str, fields: Optional[Sequence[str]], format_record: Callable[[Record], str]):
+        self.output_format = output_format
+        self.include = set(fields) if fields else None
+        self.format_record = format_record
+        self.count = 0
+        self._rendered: List[str] = []
+
+    def add(self, records: Iterable[Record]) -> None:
+        with timed(RENDER):
+            for record in records:
+                if self.output_format == "json":
+                    self._rendered.append(record.model_dump_json(include=self.include, exclude_none=True))
+                else:
+                    self._rendered.append(self.format_record(record))
+                self.count += 1
+
+    def render(self, result: BaseModel, empty_message: str, header: str) -> str:
+        """
+        Renders `result`, a result model whose records list is left empty, around the records added.
+
+        JSON is the same as `to_json` of the result with the records in it. The
+        markdown is a header line, then one entry per record.
+        """
+        with timed(RENDER):
+            if self.output_format == "json":
+                records_field = type(result).records_field
+                return result.model_dump_json(exclude_none=True).replace(
+                    f'"{records_field}":[]', f'"{records_field}":[{",".join(self._rendered)}]', 1
+                )
+            error = getattr(result, "error", None)
+            if not self.count:
+                return error or empty_message
+            report_parts = [header]
+            report_parts.extend(self._rendered)
+            if error:
+                report_parts.append(f"⚠️ Results truncated after {self.count} records: {error}")
+            return "\n\n".join(report_parts)
+
+def recall_item(recall: Recall, include_code_info: bool = False) -> str:
+    item = (
+        f"- Product: {recall.product_description or 'N/A'}\n"
+        f"  Reason: {recall.reason_for_recall or 'N/A'}\n"
+        f"  Company: {recall.recalling_firm or 'N/A'}\n"
+        f"  Classification: {recall.classification or 'N/A'}"
+    )
+    if include_code_info:
+        item += f"\n  Code Info: {recall.code_info or 'N/A'}"
+    return item
+
+def dated_recall_item(recall: Recall) -> str:
+    return (
+        f"- Product: {recall.product_description or 'N/A'} on {recall.recall_initiation_date or 'N/A'}\n"
+        f"  Reason: {recall.reason_for_recall or 'N/A'}\n"
+        f"  Company: {recall.recalling_firm or 'N/A'}"
+    )
+
+def adverse_event_item(event: AdverseEvent) -> str:
+    return (
+        f"- Report Date: {event.date_created or 'N/A'}\n"
+        f"  Symptoms: {', '.join(event.reactions or ['N/A'])}\n"
+        f"  Outcome: {', '.join(event.outcomes or ['N/A'])}"
+    )
+
+def symptom_summary_report(summary: SymptomSummary) -> str:
+    """Markdown for get_symptom_summary_for_product."""
+    product_name = summary.product_name
+    count_results = summary.symptoms
+    detail_results = summary.cases
+    if not count_results and not detail_results:
+        return f"No reported symptoms or adverse events found for '{product_name}'."
+
+    report_parts = []
+
+    # 1. Symptom Summary
+    if count_results:
+        report_parts.append(f"📊 **Symptom Summary for '{product_name}'**")
+        report_parts.append("=" * 50)
+
+        total_reports = summary.total_reports
+        symptoms = []
+        for item in count_results[:10]:  # Top 10 symptoms
+            percentage = (item.count / total_reports * 100) if total_reports > 0 else 0
+            symptoms.append(f"• {item.term}: {item.count} reports ({percentage:.1f}%)")
+
+        report_parts.append(f"Total adverse event reports: {total_reports}")
+        report_parts.append("\n**Most Common Symptoms:**")
+        report_parts.extend(symptoms)
+
+    # 2. Detailed Case Analysis
+    if detail_results:
+        report_parts.append(f"\n📋 **Recent Case Details**")
+        report_parts.append("=" * 50)
+
+        for i, case in enumerate(detail_results[:5], 1):  # Top 5 cases
+            report_parts.append(f"\n**Case {i}:**")
+            report_parts.append(f"📅 Report Date: {case.date_created or 'N/A'}")
+
+            consumer = case.consumer
+            if consumer and (consumer.age or consumer.gender):
+                age = f"{consumer.age} {consumer.age_unit or ''}".strip() if consumer.age else 'N/A'
+                report_parts.append(f"👤 Patient: {age}, {consumer.gender or 'N/A'}")
+
+            reactions = case.reactions
+            if reactions:
+                report_parts.append(f"🩺 Symptoms: {', '.join(reactions[:5])}")
+                if len(reactions) > 5:
+                    report_parts.append(f"   ... and {len(reactions) - 5} more symptoms")
+
+            if case.outcomes:
+                report_parts.append(f"📈 Outcomes: {', '.join(case.outcomes)}")
+
+            if case.serious:
+                report_parts.append(f"⚠️ Serious: {', '.join(case.serious)}")
+
+            if case.products:
+                product = case.products[0]
+                if product.name_brand or product.industry_name:
+                    report_parts.append(f"🏷️ Product: {product.name_brand or 'N/A'} ({product.industry_name or 'N/A'})")
+
+    # 3. Safety Insights
+    if count_results and detail_results:
+        report_parts.append(f"\n🔍 **Safety Insights**")
+        report_parts.append("=" * 50)
+
+        serious_cases = sum(1 for case in detail_results if case.serious)
+        total_cases = len(detail_results)
+        severity_rate = (serious_cases / total_cases * 100) if total_cases > 0 else 0
+        report_parts.append(f"• Serious cases: {serious_cases}/{total_cases} ({severity_rate:.1f}%)")
+
+        outcome_counts = {}
+        for case in detail_results:
+            for outcome in case.outcomes:
+                outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+        if outcome_counts:
+            top_outcomes = sorted(outcome_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+            report_parts.append(f"• Most common outcomes: {', '.join([f'{outcome} ({count})' for outcome, count in top_outcomes])}")
+
+        dated = sum(1 for case in detail_results if case.date_created)
+        if dated:
+            report_parts.append(f"• Recent reports: {dated} cases in available data")
+
+    # Note any part of the report that could not be fetched
+    for warning in summary.warnings:
+        report_parts.append(f"\n⚠️ {warning}")
+
+    return "\n".join(report_parts)
+
+def recall_counts_report(counts: RecallCounts, description: str) -> str:
+    """Markdown for get_recall_counts; `description` says which recalls were counted."""
+    if not counts.buckets:
+        return f"No food recalls found {description}."
+
+    report_parts = [f"📊 **Recall counts by {counts.group_by} {description}**", "=" * 50]
+    if counts.group_by in ("firm", "state"):
+        report_parts.append(f"Recalls across the {counts.group_by}s listed: {counts.total}")
+    else:
+        report_parts.append(f"Total recalls: {counts.total}")
+    report_parts.append("")
+    for bucket in counts.buckets:
+        percentage = (bucket.count / counts.total * 100) if counts.total > 0 else 0
+        report_parts.append(f"• {bucket.term}: {bucket.count} ({percentage:.1f}%)")
+
+    if counts.group_by == "month" and len(counts.buckets) > 1:
+        busiest = max(counts.buckets, key=lambda bucket: bucket.count)
+        report_parts.append(f"\n📈 Busiest month: {busiest.term} with {busiest.count} recalls")
+        report_parts.append(f"• Average: {counts.total / len(counts.buckets):.1f} recalls per month")
+    return "\n".join(report_parts)
+
+def recall_trends_report(trends: RecallTrends, description: str) -> str:
+    """Markdown for get_recall_trends: one table row per period, one column per series."""
+    if not trends.periods:
+        return f"No dated food recalls found {description}."
+
+    split = f" by {trends.by}" if trends.by else ""
+    report_parts = [
+        f"📈 **Recall trend per {trends.bucket}{split} {description}**",
+        "=" * 50,
+        f"Total recalls: {trends.total} from {trends.periods[0]} to {trends.periods[-1]}",
+        "",
+    ]
+    names = [series.term for series in trends.series]
+    if len(trends.series) > 1:
+        names.append("Total")
+    report_parts.append(f"| {trends.bucket.capitalize()} | {' | '.join(names)} |")
+    report_parts.append("|" + "---|" * (len(names) + 1))
+    for i, period in enumerate(trends.periods):
+        counts = [series.counts[i] for series in trends.series]
+        if len(counts) > 1:
+            counts.append(sum(counts))
+        report_parts.append(f"| {period} | {' | '.join(str(count) for count in counts)} |")
+
+    busiest = max(range(len(trends.periods)), key=lambda i: sum(series.counts[i] for series in trends.series))
+    report_parts.append(
+        f"\n• Busiest {trends.bucket}: {trends.periods[busiest]} "
+        f"with {sum(series.counts[busiest] for series in trends.series)} recalls"
+    )
+    report_parts.append(f"• Average: {trends.total / len(trends.periods):.1f} recalls per {trends.bucket}")
+    return "\n".join(report_parts)
+
+def firm_profile_report(profile: FirmRiskProfile) -> str:
+    """Markdown for get_firm_risk_profile."""
+    classes = {bucket.term: bucket.count for bucket in profile.classifications}
+    class_i = classes.get("Class I", 0)
+    report_parts = [
+        f"🏢 **Recall Profile: {profile.firm}**",
+        "=" * 50,
+        f"• Total recalls: {profile.total} in {profile.events} recall events",
+        f"• Class I (Most Serious): {class_i}",
+        f"• Class II (Moderate): {classes.get('Class II', 0)}",
+        f"• Class III (Least Serious): {classes.get('Class III', 0)}",
+    ]
+    if profile.first_recall_date:
+        report_parts.append(f"• First recall: {profile.first_recall_date}; most recent: {profile.last_recall_date}")
+    report_parts.append(f"• Recalls in the last 12 months: {profile.recent}")
+    if profile.statuses:
+        report_parts.append(f"• Status: {', '.join(f'{bucket.term} {bucket.count}' for bucket in profile.statuses)}")
+    if profile.other_names:
+        report_parts.append(f"• Also recorded as: {', '.join(profile.other_names)}")
+
+    if profile.reasons:
+        report_parts.append("\n🔍 **Top Recall Reasons:**")
+        report_parts.extend(f"• {bucket.term}: {bucket.count} recalls" for bucket in profile.reasons)
+    if profile.states:
+        report_parts.append("\n🌍 **Top Distribution Areas:**")
+        report_parts.extend(f"• {bucket.term}: {bucket.count} recalls" for bucket in profile.states)
+    if profile.years:
+        report_parts.append("\n📅 **Recalls per Year:**")
+        report_parts.extend(f"• {bucket.term}: {bucket.count}" for bucket in profile.years)
+
+    report_parts.append("\n🛡️ **Risk Summary:**")
+    if class_i:
+        report_parts.append(f"• ⚠️ {class_i} of {profile.total} recalls ({class_i / profile.total * 100:.1f}%) were Class I - HIGH RISK")
+    else:
+        report_parts.append("• No Class I recalls on record")
+    ongoing = sum(bucket.count for bucket in profile.statuses if bucket.term == "Ongoing")
+    if ongoing:
+        report_parts.append(f"• {ongoing} recalls are still ongoing")
+    if profile.recent:
+        report_parts.append(f"• Recent activity: {profile.recent} recalls in the last 12 months")
+
+    if profile.warning:
+        report_parts.append(f"\n⚠️ {profile.warning}")
+    return "\n".join(report_parts)
@@ -0,0 +1,241 @@
+"""
+Typo-tolerant matching for product and firm names.
+
+openFDA only matches exact phrases, so a misspelt query such as "choclate chip"
+finds nothing. `FuzzyIndex` keeps a trigram index over the words used in recall
+product descriptions and over recalling firm names, learnt from the local
+index or from the recalls the tools have already fetched. Before querying, a
+tool can `resolve` a query to the closest known words; `suggest` ranks
+candidate words and firms by similarity, then by how recently they appeared in
+a recall. `refresh` indexes the recalls written to the local index since the
+last load, such as by the periodic sync, from the index's `recall_changes` log.
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .batch import tokenize
+
+# Candidates are shortlisted by shared trigrams, then ranked by edit distance
+SHORTLIST_SIZE = 50
+MIN_TRIGRAM_SIMILARITY = 0.2
+MIN_SIMILARITY = 0.6
+
+def trigrams(text: str) -> List[str]:
+    """The distinct trigrams of `text`, padded so that its first letters carry extra weight."""
+    padded = f"  {text} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance counting an adjacent transposition as one edit (e.g. "cookei" -> "cookie")."""
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+def similarity(a: str, b: str) -> float:
+    """1.0 for identical strings, falling with each edit relative to the longer string."""
+    longest = max(len(a), len(b))
+    return 1.0 - edit_distance(a, b) / longest if longest else 1.0
+
+class TrigramIndex:
+    """
+    An inverted index from trigrams to known terms, with each term's frequency
+    and the most recent recall date it appeared in.
+
+    Postings are split by the number of trigrams in the term, so a lookup only
+    visits terms of a similar length to the query; a lookup takes under a
+    millisecond with tens of thousands of terms.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._sizes: List[int] = []
+        self._counts: List[int] = []
+        self._latest: List[str] = []
+        self._postings: Dict[Tuple[str, int], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._ids
+
+    def add(self, term: str, date: Optional[str] = None) -> None:
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._ids[term] = term_id
+            grams = trigrams(term)
+            self._terms.append(term)
+            self._sizes.append(len(grams))
+            self._counts.append(0)
+            self._latest.append("")
+            for gram in grams:
+                self._postings.setdefault((gram, len(grams)), []).append(term_id)
+        self._counts[term_id] += 1
+        if date and date > self._latest[term_id]:
+            self._latest[term_id] = date
+
+    def search(self, text: str, limit: int = 5, min_similarity: float = MIN_SIMILARITY) -> List[Dict[str, Any]]:
+        """
+        Ranks known terms by similarity to `text`, then by recency, then by frequency.
+
+        Terms sharing the most trigrams with `text` are shortlisted through the
+        inverted index, and only those are compared by edit distance.
+
+        Returns:
+            Up to `limit` dicts with 'term', 'similarity', 'latest_date' and 'count' keys.
+        """
+        grams = trigrams(text)
+        # Terms much shorter or longer than the query can't be close matches
+        spread = max(2, len(grams) // 3)
+        shared: Counter = Counter()
+        for size in range(max(1, len(grams) - spread), len(grams) + spread + 1):
+            for gram in grams:
+                postings = self._postings.get((gram, size))
+                if postings:
+                    shared.update(postings)
+        ranked: List[Tuple[float, str, int, int]] = []
+        for term_id, overlap in shared.most_common(SHORTLIST_SIZE):
+            if overlap / (len(grams) + self._sizes[term_id] - overlap) < MIN_TRIGRAM_SIMILARITY:
+                break
+            score = round(similarity(text, self._terms[term_id]), 3)
+            if score >= min_similarity:
+                ranked.append((score, self._latest[term_id], self._counts[term_id], term_id))
+        ranked.sort(reverse=True)
+        return [
+            {"term": self._terms[term_id], "similarity": score, "latest_date": latest or None, "count": count}
+            for score, latest, count, term_id in ranked[:limit]
+        ]
+
+class FuzzyIndex:
+    """
+    Trigram indexes over product description words and recalling firm names.
+
+    `complete` is set once the index has been loaded from a full local index.
+    Until then it only knows the recalls the tools have fetched, so a word it
+    hasn't seen may well be spelt correctly.
+    """
+
+    def __init__(self) -> None:
+        self.words = TrigramIndex()
+        self.firms = TrigramIndex()
+        self.complete = False
+        self._seen: set = set()
+        # The last change of the local index indexed; None until the index has been loaded
+        self._seq: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add_recalls(self, recalls: Iterable[Mapping[str, Any]]) -> int:
+        """Indexes recalls (openFDA dicts) not seen before; returns how many were added."""
+        added = 0
+        with self._lock:
+            for recall in recalls:
+                number = recall.get("recall_number")
+                if number in self._seen:
+                    continue
+                if number:
+                    self._seen.add(number)
+                date = recall.get("recall_initiation_date")
+                for word in set(tokenize(recall.get("product_description") or "")):
+                    if len(word) > 1 and not word.isdigit():
+                        self.words.add(word, date)
+                firm = recall.get("recalling_firm")
+                if firm:
+                    self.firms.add(" ".join(tokenize(firm)), date)
+                added += 1
+        return added
+
+    def load_local_index(self, index: Any, batch_size: int = 5000) -> int:
+        """Indexes every recall in a `LocalIndex`; returns the number added."""
+        # Changes made while loading are indexed again by the next refresh, which is harmless
+        self._seq = index.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM recall_changes")[0]["seq"]
+        added = 0
+        last = ""
+        while True:
+            rows = index.execute(
+                "SELECT recall_number, product_description, recalling_firm, recall_initiation_date FROM recalls "
+                "WHERE recall_number > ? ORDER BY recall_number LIMIT ?",
+                (last, batch_size),
+            )
+            if not rows:
+                self.complete = self.complete or added > 0
+                return added
+            added += self.add_recalls(dict(row) for row in rows)
+            last = rows[-1]["recall_number"]
+
+    def refresh(self, index: Any, batch_size: int = 500) -> int:
+        """
+        Indexes the recalls written to a `LocalIndex` since the last load or refresh.
+
+        Loads the whole index the first time. A changed recall has its words
+        indexed again; words it no longer uses are kept, as a correction to
+        them still finds older recalls. Returns the number of recalls indexed.
+        """
+        if self._seq is None:
+            return self.load_local_index(index)
+        added = 0
+        while True:
+            changes = index.execute(
+                "SELECT seq, recall_number FROM recall_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (self._seq, batch_size),
+            )
+            if not changes:
+                return added
+            numbers = [row["recall_number"] for row in changes]
+            rows = index.execute(
+                "SELECT recall_number, product_description, recalling_firm, recall_initiation_date FROM recalls "
+                f"WHERE recall_number IN ({', '.join('?' for _ in numbers)})",
+                numbers,
+            )
+            with self._lock:
+                self._seen.difference_update(numbers)
+            added += self.add_recalls(dict(row) for row in rows)
+            self._seq = changes[-1]["seq"]
+
+    def resolve(self, query: str) -> str:
+        """
+        Replaces each unknown word of `query` with the closest known word.
+
+        Known words and words without a close enough match are kept, so the
+        query is returned unchanged when there is nothing to correct.
+        """
+        words = tokenize(query)
+        if not words or not len(self.words):
+            return query
+        corrected = []
+        changed = False
+        for word in words:
+            if word in self.words or len(word) < 3 or word.isdigit():
+                corrected.append(word)
+                continue
+            matches = self.words.search(word, limit=1)
+            if matches:
+                corrected.append(matches[0]["term"])
+                changed = True
+            else:
+                corrected.append(word)
+        return " ".join(corrected) if changed else query
+
+    def suggest(self, query: str, limit: int = 5) -> Dict[str, Any]:
+        """Returns the resolved query plus the closest product words and firm names."""
+        words = [w for w in tokenize(query) if len(w) >= 3]
+        return {
+            "query": query,
+            "resolved": self.resolve(query),
+            "words": {word: self.words.search(word, limit=limit) for word in words},
+            "firms": self.firms.search(" ".join(tokenize(query)), limit=limit),
+        }
@@ -0,0 +1,630 @@
+"""
+A local, on-disk copy of the openFDA food enforcement and adverse event data.
+
+The index is a SQLite database built from the openFDA bulk download files
+(https://open.fda.gov/apis/downloads/). Recalls get an FTS5 full-text index over
+`product_description`, `code_info` and `reason_for_recall` plus B-tree indexes on
+`classification` and `recall_initiation_date`; adverse events are indexed by
+product brand name. Every recall written is logged in `recall_changes`, so
+derived data such as the firm profiles can be updated incrementally.
+
+`query_index` answers the same `search`/`sort`/`limit`/`skip`/`count` queries
+the tools send to openFDA; `backends.LocalIndexBackend` serves the tools from it.
+
+Build or refresh an index with:
+
+    python -m safetyscore.local_index ingest --db recalls.db --download
+    python -m safetyscore.local_index ingest --db recalls.db --enforcement food-enforcement-0001-of-0001.json.zip
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import zipfile
+from typing import Any, Dict, IO, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+from . import decoding
+
+DOWNLOAD_INDEX_URL = "https://api.fda.gov/download.json"
+
+ENFORCEMENT = "enforcement"
+EVENT = "event"
+
+# Columns copied out of each enforcement record; the full record is kept in `raw`
+RECALL_COLUMNS = (
+    "recall_number",
+    "event_id",
+    "status",
+    "classification",
+    "product_type",
+    "recalling_firm",
+    "city",
+    "state",
+    "country",
+    "product_description",
+    "code_info",
+    "reason_for_recall",
+    "distribution_pattern",
+    "product_quantity",
+    "voluntary_mandated",
+    "recall_initiation_date",
+    "center_classification_date",
+    "report_date",
+    "termination_date",
+)
+RECALL_FTS_COLUMNS = ("product_description", "code_info", "reason_for_recall")
+RECALL_EXACT_COLUMNS = ("recall_number", "event_id", "status", "classification", "state", "country", "voluntary_mandated")
+RECALL_DATE_COLUMNS = ("recall_initiation_date", "center_classification_date", "report_date", "termination_date")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recalls (
+    recall_number TEXT PRIMARY KEY,
+    event_id TEXT,
+    status TEXT,
+    classification TEXT,
+    product_type TEXT,
+    recalling_firm TEXT,
+    city TEXT,
+    state TEXT,
+    country TEXT,
+    product_description TEXT,
+    code_info TEXT,
+    reason_for_recall TEXT,
+    distribution_pattern TEXT,
+    product_quantity TEXT,
+    voluntary_mandated TEXT,
+    recall_initiation_date TEXT,
+    center_classification_date TEXT,
+    report_date TEXT,
+    termination_date TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recalls_classification ON recalls(classification);
+CREATE INDEX IF NOT EXISTS idx_recalls_initiation_date ON recalls(recall_initiation_date);
+CREATE INDEX IF NOT EXISTS idx_recalls_report_date ON recalls(report_date);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS recalls_fts USING fts5(
+    product_description, code_info, reason_for_recall,
+    content='recalls', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS recalls_ai AFTER INSERT ON recalls BEGIN
+    INSERT INTO recalls_fts(rowid, product_description, code_info, reason_for_recall)
+    VALUES (new.rowid, new.product_description, new.code_info, new.reason_for_recall);
+END;
+CREATE TRIGGER IF NOT EXISTS recalls_ad AFTER DELETE ON recalls BEGIN
+    INSERT INTO recalls_fts(recalls_fts, rowid, product_description, code_info, reason_for_recall)
+    VALUES ('delete', old.rowid, old.product_description, old.code_info, old.reason_for_recall);
+END;
+CREATE TRIGGER IF NOT EXISTS recalls_au AFTER UPDATE ON recalls BEGIN
+    INSERT INTO recalls_fts(recalls_fts, rowid, product_description, code_info, reason_for_recall)
+    VALUES ('delete', old.rowid, old.product_description, old.code_info, old.reason_for_recall);
+    INSERT INTO recalls_fts(rowid, product_description, code_info, reason_for_recall)
+    VALUES (new.rowid, new.product_description, new.code_info, new.reason_for_recall);
+END;
+
+-- The recalls written since a point in time, for consumers that update incrementally
+-- (see firms.FirmProfiles.refresh); a recall keeps only its latest change. Triggers
+-- run under the upsert's conflict policy, so the old entry is deleted rather than replaced
+CREATE TABLE IF NOT EXISTS recall_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    recall_number TEXT NOT NULL UNIQUE
+);
+CREATE TRIGGER IF NOT EXISTS recall_changes_ai AFTER INSERT ON recalls BEGIN
+    DELETE FROM recall_changes WHERE recall_number = new.recall_number;
+    INSERT INTO recall_changes (recall_number) VALUES (new.recall_number);
+END;
+CREATE TRIGGER IF NOT EXISTS recall_changes_au AFTER UPDATE ON recalls BEGIN
+    DELETE FROM recall_changes WHERE recall_number = new.recall_number;
+    INSERT INTO recall_changes (recall_number) VALUES (new.recall_number);
+END;
+CREATE TRIGGER IF NOT EXISTS recall_changes_ad AFTER DELETE ON recalls BEGIN
+    DELETE FROM recall_changes WHERE recall_number = old.recall_number;
+    INSERT INTO recall_changes (recall_number) VALUES (old.recall_number);
+END;
+
+CREATE TABLE IF NOT EXISTS adverse_events (
+    report_number TEXT PRIMARY KEY,
+    date_created TEXT,
+    date_started TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_adverse_events_date_created ON adverse_events(date_created);
+
+CREATE TABLE IF NOT EXISTS adverse_event_products (
+    id INTEGER PRIMARY KEY,
+    report_number TEXT NOT NULL,
+    name_brand TEXT,
+    industry_name TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_adverse_event_products_report ON adverse_event_products(report_number);
+CREATE VIRTUAL TABLE IF NOT EXISTS adverse_event_products_fts USING fts5(
+    name_brand, content='adverse_event_products', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS adverse_event_products_ai AFTER INSERT ON adverse_event_products BEGIN
+    INSERT INTO adverse_event_products_fts(rowid, name_brand) VALUES (new.id, new.name_brand);
+END;
+CREATE TRIGGER IF NOT EXISTS adverse_event_products_ad AFTER DELETE ON adverse_event_products BEGIN
+    INSERT INTO adverse_event_products_fts(adverse_event_products_fts, rowid, name_brand)
+    VALUES ('delete', old.id, old.name_brand);
+END;
+
+CREATE TABLE IF NOT EXISTS adverse_event_reactions (
+    report_number TEXT NOT NULL,
+    reaction TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_adverse_event_reactions_report ON adverse_event_reactions(report_number);
+
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class LocalIndexError(Exception):
+    """Raised when a query cannot be answered from the local index."""
+
+# ---------------------------------------------------------------------------
+# Streaming reader for openFDA bulk files
+# ---------------------------------------------------------------------------
+
+def iter_bulk_results(stream: IO[str], chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the records in the top-level "results" array of an openFDA JSON file.
+
+    The file is read in chunks and each record is decoded on its own, so memory
+    use is bounded by the chunk size and the largest single record rather than
+    the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws() -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    def expect(char: str) -> None:
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != char:
+            found = buf[pos] if pos < len(buf) else "end of file"
+            raise ValueError(f"Malformed openFDA file: expected {char!r}, found {found!r}")
+        pos += 1
+
+    def decode_value() -> Any:
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # The value may just be split across chunks
+                if fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buf) and not eof and fill():
+                continue
+            pos = end
+            return value
+
+    expect("{")
+    skip_ws()
+    if buf[pos:pos + 1] == "}":
+        return
+    while True:
+        key = decode_value()
+        expect(":")
+        skip_ws()
+        if key == "results" and buf[pos:pos + 1] == "[":
+            pos += 1
+            skip_ws()
+            if buf[pos:pos + 1] == "]":
+                pos += 1
+            else:
+                while True:
+                    yield decode_value()
+                    skip_ws()
+                    if buf[pos:pos + 1] == ",":
+                        pos += 1
+                        continue
+                    expect("]")
+                    break
+        else:
+            decode_value()
+        skip_ws()
+        if buf[pos:pos + 1] == ",":
+            pos += 1
+            continue
+        expect("}")
+        return
+
+def iter_bulk_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields records from a bulk file, which may be a .json file or a .json.zip archive."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if not member.endswith(".json"):
+                    continue
+                with archive.open(member) as raw:
+                    yield from iter_bulk_results(io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from iter_bulk_results(f)
+
+def bulk_partition_urls(dataset: str, index_url: str = DOWNLOAD_INDEX_URL) -> List[str]:
+    """Looks up the partition file URLs for `food/<dataset>` in openFDA's download index."""
+    response = httpx.get(index_url, timeout=60.0)
+    response.raise_for_status()
+    partitions = response.json()["results"]["food"][dataset]["partitions"]
+    return [partition["file"] for partition in partitions]
+
+def download_file(url: str, directory: str) -> str:
+    """Streams a file to `directory` without holding it in memory and returns its path."""
+    path = os.path.join(directory, os.path.basename(url))
+    with httpx.stream("GET", url, timeout=httpx.Timeout(60.0, read=300.0), follow_redirects=True) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_bytes(1 << 20):
+                f.write(chunk)
+    return path
+
+# ---------------------------------------------------------------------------
+# The index
+# ---------------------------------------------------------------------------
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+class LocalIndex:
+    """A SQLite database holding openFDA food enforcement and adverse event records."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        """Runs a query and returns all rows."""
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # -- writes -------------------------------------------------------------
+
+    def upsert_recalls(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Inserts or updates enforcement records keyed on `recall_number`."""
+        columns = RECALL_COLUMNS + ("raw",)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "recall_number")
+        sql = (
+            f"INSERT INTO recalls ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(recall_number) DO UPDATE SET {updates}"
+        )
+        rows = [
+            tuple(_text(record.get(c)) for c in RECALL_COLUMNS) + (json.dumps(record, separators=(",", ":")),)
+            for record in records
+            if record.get("recall_number")
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+        return len(rows)
+
+    def upsert_adverse_events(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Inserts or replaces adverse event reports keyed on `report_number`."""
+        count = 0
+        with self._lock, self._conn:
+            for record in records:
+                report_number = record.get("report_number")
+                if not report_number:
+                    continue
+                self._conn.execute("DELETE FROM adverse_event_products WHERE report_number = ?", (report_number,))
+                self._conn.execute("DELETE FROM adverse_event_reactions WHERE report_number = ?", (report_number,))
+                self._conn.execute(
+                    "INSERT INTO adverse_events (report_number, date_created, date_started, raw) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(report_number) DO UPDATE SET date_created = excluded.date_created, "
+                    "date_started = excluded.date_started, raw = excluded.raw",
+                    (report_number, record.get("date_created"), record.get("date_started"),
+                     json.dumps(record, separators=(",", ":"))),
+                )
+                self._conn.executemany(
+                    "INSERT INTO adverse_event_products (report_number, name_brand, industry_name) VALUES (?, ?, ?)",
+                    [(report_number, p.get("name_brand"), p.get("industry_name")) for p in record.get("products", [])],
+                )
+                self._conn.executemany(
+                    "INSERT INTO adverse_event_reactions (report_number, reaction) VALUES (?, ?)",
+                    [(report_number, r) for r in record.get("reactions", [])],
+                )
+                count += 1
+        return count
+
+    def ingest(self, dataset: str, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        Streams records into the index in batches, committing after each one.
+
+        Only one batch is held in memory at a time, and because writes are upserts
+        an interrupted ingestion can simply be re-run.
+        """
+        upsert = self.upsert_recalls if dataset == ENFORCEMENT else self.upsert_adverse_events
+        total = 0
+        batch: List[Dict[str, Any]] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                total += upsert(batch)
+                batch = []
+        if batch:
+            total += upsert(batch)
+        return total
+
+    def get_meta(self, key: str) -> Optional[str]:
+        rows = self.execute("SELECT value FROM index_meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO index_meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def version(self) -> Tuple[int, int]:
+        """A value that changes whenever the index is written, through this connection or any other."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0], self._conn.total_changes
+
+    def count(self, dataset: str) -> int:
+        table = "recalls" if dataset == ENFORCEMENT else "adverse_events"
+        return self.execute(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+
+# ---------------------------------------------------------------------------
+# openFDA query translation
+# ---------------------------------------------------------------------------
+
+# field:"phrase", field:[A TO B] or field:value
+_TERM_RE = re.compile(r'([\w.]+):(?:"((?:[^"\\]|\\.)*)"|\[(\S+)\s+TO\s+(\S+)\]|([^\s"\[\]()+]+))')
+_CONNECTOR_RE = re.compile(r"^(?:\s|\+)*(AND|OR)?(?:\s|\+)*$")
+
+def parse_search(search: str) -> List[List[Tuple[str, str, Any]]]:
+    """
+    Parses an openFDA `search` expression into OR-ed groups of AND-ed terms.
+
+    Supports `field:"phrase"`, `field:value` and `field:[A TO B]` terms joined by
+    AND, OR or whitespace (which openFDA treats as OR). Each term is returned as
+    (field, kind, value) where kind is "phrase" or "range".
+    """
+    groups: List[List[Tuple[str, str, Any]]] = [[]]
+    last_end = 0
+    for match in _TERM_RE.finditer(search):
+        between = _CONNECTOR_RE.match(search[last_end:match.start()].replace("(", " ").replace(")", " "))
+        if between is None:
+            raise LocalIndexError(f"Unsupported search syntax: {search!r}")
+        if groups[-1] and between.group(1) != "AND":
+            groups.append([])
+        field, phrase, range_start, range_end, bare = match.groups()
+        if range_start is not None:
+            groups[-1].append((field, "range", (range_start, range_end)))
+        else:
+            value = phrase if phrase is not None else bare
+            groups[-1].append((field, "phrase", value.replace('\\"', '"')))
+        last_end = match.end()
+    if _CONNECTOR_RE.match(search[last_end:].replace("(", " ").replace(")", " ")) is None:
+        raise LocalIndexError(f"Unsupported search syntax: {search!r}")
+    return [group for group in groups if group]
+
+def _fts_phrase(column: str, value: str) -> str:
+    return f'{column} : "{value.replace(chr(34), chr(34) * 2)}"'
+
+# Matches nothing; used for empty phrases, which FTS5 rejects
+_NO_MATCH = ("0", [])
+
+def _sort_clause(sort: Optional[str], allowed: Iterable[str], default: str) -> str:
+    if not sort:
+        return default
+    field, _, direction = sort.partition(":")
+    if field not in allowed:
+        raise LocalIndexError(f"Unsupported sort field: {field}")
+    return f"{field} {'ASC' if direction.lower() == 'asc' else 'DESC'}"
+
+def _recall_term_sql(field: str, kind: str, value: Any) -> Tuple[str, List[Any]]:
+    exact = field.endswith(".exact")
+    column = field[:-len(".exact")] if exact else field
+    if column == "recall_termination_date":
+        column = "termination_date"
+    if column not in RECALL_COLUMNS:
+        raise LocalIndexError(f"Unsupported search field: {field}")
+    if kind == "range":
+        return f"{column} BETWEEN ? AND ?", list(value)
+    if exact or column in RECALL_EXACT_COLUMNS or column in RECALL_DATE_COLUMNS:
+        return f"{column} = ? COLLATE NOCASE", [value]
+    if column in RECALL_FTS_COLUMNS:
+        if not value.strip():
+            return _NO_MATCH
+        return "rowid IN (SELECT rowid FROM recalls_fts WHERE recalls_fts MATCH ?)", [_fts_phrase(column, value)]
+    return f"{column} LIKE ?", [f"%{value}%"]
+
+def _event_term_sql(field: str, kind: str, value: Any) -> Tuple[str, List[Any]]:
+    exact = field.endswith(".exact")
+    column = field[:-len(".exact")] if exact else field
+    if column in ("date_created", "date_started"):
+        if kind == "range":
+            return f"{column} BETWEEN ? AND ?", list(value)
+        return f"{column} = ?", [value]
+    if column == "products.name_brand":
+        if not value.strip():
+            return _NO_MATCH
+        if exact:
+            return (
+                "report_number IN (SELECT report_number FROM adverse_event_products WHERE name_brand = ? COLLATE NOCASE)",
+                [value],
+            )
+        return (
+            "report_number IN (SELECT p.report_number FROM adverse_event_products p "
+            "JOIN adverse_event_products_fts f ON f.rowid = p.id WHERE adverse_event_products_fts MATCH ?)",
+            [_fts_phrase("name_brand", value)],
+        )
+    if column == "products.industry_name":
+        return (
+            "report_number IN (SELECT report_number FROM adverse_event_products WHERE industry_name LIKE ?)",
+            [f"%{value}%"],
+        )
+    if column == "reactions":
+        return (
+            "report_number IN (SELECT report_number FROM adverse_event_reactions WHERE reaction = ? COLLATE NOCASE)",
+            [value],
+        )
+    if column == "report_number":
+        return "report_number = ?", [value]
+    raise LocalIndexError(f"Unsupported search field: {field}")
+
+def _where_clause(search: Optional[str], term_sql, *extra: str) -> Tuple[str, List[Any]]:
+    clauses = []
+    params: List[Any] = []
+    if search:
+        groups = []
+        for group in parse_search(search):
+            parts = []
+            for field, kind, value in group:
+                sql, values = term_sql(field, kind, value)
+                parts.append(sql)
+                params.extend(values)
+            groups.append("(" + " AND ".join(parts) + ")")
+        clauses.append("(" + " OR ".join(groups) + ")")
+    clauses.extend(extra)
+    return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def _response(results: List[Dict[str, Any]], skip: int, limit: int, total: int) -> Dict[str, Any]:
+    return {"meta": {"results": {"skip": skip, "limit": limit, "total": total}}, "results": results}
+
+def query_index(index: LocalIndex, dataset: str, params: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """
+    Answers an openFDA-style query from the local index.
+
+    Returns a dict shaped like an openFDA response: {"meta": ..., "results": [...]}.
+    Raises LocalIndexError for queries outside the supported subset.
+    """
+    params = dict(params or {})
+    search = params.get("search")
+    limit = int(params.get("limit", 1))
+    skip = int(params.get("skip", 0))
+    count_field = params.get("count")
+
+    if dataset == ENFORCEMENT:
+        where, values = _where_clause(search, _recall_term_sql)
+        if count_field:
+            column = count_field[:-len(".exact")] if count_field.endswith(".exact") else count_field
+            if column == "recall_termination_date":
+                column = "termination_date"
+            if column not in RECALL_COLUMNS:
+                raise LocalIndexError(f"Unsupported count field: {count_field}")
+            key = "time" if column in RECALL_DATE_COLUMNS else "term"
+            order = f"{column} ASC" if key == "time" else "count DESC"
+            where, values = _where_clause(search, _recall_term_sql, f"{column} IS NOT NULL")
+            rows = index.execute(
+                f"SELECT {column} AS value, COUNT(*) AS count FROM recalls {where} GROUP BY {column} ORDER BY {order}",
+                values,
+            )
+            if key == "term":
+                rows = rows[:int(params.get("limit", 100))]
+            return {"results": [{key: row["value"], "count": row["count"]} for row in rows]}
+        order = _sort_clause(params.get("sort"), RECALL_COLUMNS, "rowid ASC")
+        table = "recalls"
+    elif dataset == EVENT:
+        where, values = _where_clause(search, _event_term_sql)
+        if count_field:
+            if count_field not in ("reactions", "reactions.exact"):
+                raise LocalIndexError(f"Unsupported count field: {count_field}")
+            rows = index.execute(
+                f"SELECT reaction AS term, COUNT(*) AS count FROM adverse_event_reactions "
+                f"WHERE report_number IN (SELECT report_number FROM adverse_events {where}) "
+                f"GROUP BY reaction ORDER BY count DESC LIMIT ?",
+                values + [int(params.get("limit", 100))],
+            )
+            return {"results": [{"term": row["term"], "count": row["count"]} for row in rows]}
+        order = _sort_clause(params.get("sort"), ("date_created", "date_started", "report_number"), "rowid ASC")
+        table = "adverse_events"
+    else:
+        raise LocalIndexError(f"Unknown dataset: {dataset}")
+
+    total = index.execute(f"SELECT COUNT(*) AS n FROM {table} {where}", values)[0]["n"]
+    rows = index.execute(f"SELECT raw FROM {table} {where} ORDER BY {order} LIMIT ? OFFSET ?", values + [limit, skip])
+    return _response([decoding.loads(row["raw"]) for row in rows], skip, limit, total)
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def ingest_files(index: LocalIndex, dataset: str, paths: Iterable[str], batch_size: int = 1000) -> int:
+    total = 0
+    for path in paths:
+        count = index.ingest(dataset, iter_bulk_file(path), batch_size=batch_size)
+        print(f"Ingested {count} {dataset} records from {os.path.basename(path)}")
+        total += count
+    return total
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for building the local index."""
+    parser = argparse.ArgumentParser(description="Manage the local openFDA recall index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Stream openFDA bulk files into the index")
+    ingest_parser.add_argument("--db", default=os.getenv("FDA_LOCAL_INDEX_PATH", "safetysearch.db"))
+    ingest_parser.add_argument("--enforcement", nargs="*", default=[], help="food/enforcement bulk files (.json or .json.zip)")
+    ingest_parser.add_argument("--event", nargs="*", default=[], help="food/event bulk files (.json or .json.zip)")
+    ingest_parser.add_argument("--download", action="store_true", help="Download the latest bulk files from openFDA")
+    ingest_parser.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+
+    index = LocalIndex(args.db)
+    try:
+        ingest_files(index, ENFORCEMENT, args.enforcement, args.batch_size)
+        ingest_files(index, EVENT, args.event, args.batch_size)
+        if args.download:
+            workdir = tempfile.mkdtemp(prefix="safetysearch-")
+            try:
+                for dataset in (ENFORCEMENT, EVENT):
+                    for url in bulk_partition_urls(dataset):
+                        path = download_file(url, workdir)
+                        ingest_files(index, dataset, [path], args.batch_size)
+                        os.remove(path)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        print(f"Index {args.db}: {index.count(ENFORCEMENT)} recalls, {index.count(EVENT)} adverse events")
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Low-overhead metrics for tool calls, upstream requests and cache lookups.
+
+Each tool call's wall time is recorded, with the time it spent in three phases:
+- upstream: waiting on openFDA (including rate limiting and retries) or the local index
+- decode: decoding JSON responses
+- render: rendering the report or JSON result
+
+Phases are attributed through a context variable, so concurrent tool calls don't mix.
+Requests a tool runs concurrently are summed, so a fan-out tool's upstream time
+can exceed its wall time. A response fetched once for several coalesced callers
+is counted as upstream time for each of them; its decode time goes to the
+caller that fetched it.
+
+Upstream requests are counted per endpoint and status code (or 'error' for
+transport failures), every attempt separately, and cache lookups per endpoint
+as hits, stale hits or misses.
+
+Recording costs a few dictionary updates per event, so it is always on. The
+server exposes the counters in Prometheus text format at /metrics on the HTTP
+transports, and can log them as JSON lines every FDA_METRICS_LOG_INTERVAL
+seconds. Both report the process they run in, so with several workers each
+worker reports its own counters.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+TOOL_PHASES = ("upstream", "decode", "render")
+UPSTREAM, DECODE, RENDER = range(len(TOOL_PHASES))
+
+# Upper bounds in seconds of the tool latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CACHE_RESULTS = ("hit", "stale", "miss")
+
+# Seconds spent in each phase by the tool call running in the current context
+_phase_seconds: ContextVar[Optional[List[float]]] = ContextVar("phase_seconds", default=None)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+@functools.lru_cache(maxsize=256)
+def endpoint_label(url: str) -> str:
+    """The label for an endpoint: a URL's path, or a dataset name as is."""
+    return urlsplit(url).path or url
+
+def add_phase(phase: int, seconds: float) -> None:
+    """Adds `seconds` to a phase (UPSTREAM, DECODE or RENDER) of the tool call in progress, if any."""
+    timings = _phase_seconds.get()
+    if timings is not None:
+        timings[phase] += seconds
+
+@contextmanager
+def timed(phase: int) -> Iterator[None]:
+    """Times the block as a phase of the tool call in progress."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(phase, time.perf_counter() - start)
+
+def _labels(**labels: str) -> str:
+    escaped = {k: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for k, v in labels.items()}
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+class Metrics:
+    """Counters for tool calls, upstream requests and cache lookups in this process."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.time()
+        self.tool_calls: Counter = Counter()
+        self.tool_seconds: Dict[str, float] = defaultdict(float)
+        self.tool_phase_seconds: Dict[str, List[float]] = defaultdict(lambda: [0.0] * len(TOOL_PHASES))
+        self.tool_buckets: Dict[str, List[int]] = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self.upstream_requests: Counter = Counter()
+        self.upstream_seconds: Dict[str, float] = defaultdict(float)
+        self.cache_lookups: Counter = Counter()
+
+    def instrument_tool(self, fn: F) -> F:
+        """Wraps an async tool so each call's wall time and phases are recorded under its name."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def instrumented(*args: Any, **kwargs: Any) -> Any:
+            timings = [0.0] * len(TOOL_PHASES)
+            token = _phase_seconds.set(timings)
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.record_tool(name, time.perf_counter() - start, timings)
+                _phase_seconds.reset(token)
+
+        return instrumented
+
+    def record_tool(self, name: str, seconds: float, timings: List[float]) -> None:
+        self.tool_calls[name] += 1
+        self.tool_seconds[name] += seconds
+        self.tool_buckets[name][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        phases = self.tool_phase_seconds[name]
+        for i, phase_seconds in enumerate(timings):
+            phases[i] += phase_seconds
+
+    def record_upstream(self, url: str, status: str, seconds: float) -> None:
+        endpoint = endpoint_label(url)
+        self.upstream_requests[endpoint, status] += 1
+        self.upstream_seconds[endpoint] += seconds
+
+    def record_cache(self, url: str, result: str) -> None:
+        self.cache_lookups[endpoint_label(url), result] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The counters as a JSON-serializable dict."""
+        tools = {}
+        for name, calls in self.tool_calls.items():
+            total = self.tool_seconds[name]
+            phases = dict(zip(TOOL_PHASES, self.tool_phase_seconds[name]))
+            tools[name] = {"calls": calls, "seconds": round(total, 6), **{k: round(v, 6) for k, v in phases.items()}}
+
+        upstream: Dict[str, Dict[str, Any]] = {}
+        for (endpoint, status), count in self.upstream_requests.items():
+            entry = upstream.setdefault(endpoint, {"seconds": round(self.upstream_seconds[endpoint], 6), "status": {}})
+            entry["status"][status] = count
+
+        cache: Dict[str, Dict[str, Any]] = {}
+        for (endpoint, result), count in self.cache_lookups.items():
+            cache.setdefault(endpoint, dict.fromkeys(CACHE_RESULTS, 0))[result] = count
+        for counts in cache.values():
+            lookups = sum(counts[result] for result in CACHE_RESULTS)
+            counts["hit_rate"] = round((counts["hit"] + counts["stale"]) / lookups, 4) if lookups else 0.0
+
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 3), "tools": tools, "upstream": upstream, "cache": cache}
+
+    def prometheus(self) -> str:
+        """The counters in the Prometheus text exposition format."""
+        lines = [
+            "# HELP safetysearch_tool_duration_seconds Wall time of tool calls.",
+            "# TYPE safetysearch_tool_duration_seconds histogram",
+        ]
+        for name, buckets in sorted(self.tool_buckets.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"safetysearch_tool_duration_seconds_bucket{_labels(tool=name, le=le)} {cumulative}")
+            lines.append(f"safetysearch_tool_duration_seconds_sum{_labels(tool=name)} {self.tool_seconds[name]}")
+            lines.append(f"safetysearch_tool_duration_seconds_count{_labels(tool=name)} {self.tool_calls[name]}")
+
+        lines += [
+            "# HELP safetysearch_tool_phase_seconds_total Time tool calls spent waiting upstream, decoding JSON and rendering.",
+            "# TYPE safetysearch_tool_phase_seconds_total counter",
+        ]
+        for name, phases in sorted(self.tool_phase_seconds.items()):
+            for phase, seconds in zip(TOOL_PHASES, phases):
+                lines.append(f"safetysearch_tool_phase_seconds_total{_labels(tool=name, phase=phase)} {seconds}")
+
+        lines += [
+            "# HELP safetysearch_upstream_requests_total Upstream request attempts by endpoint and status.",
+            "# TYPE safetysearch_upstream_requests_total counter",
+        ]
+        for (endpoint, status), count in sorted(self.upstream_requests.items()):
+            lines.append(f"safetysearch_upstream_requests_total{_labels(endpoint=endpoint, status=status)} {count}")
+
+        lines += [
+            "# HELP safetysearch_upstream_request_seconds_total Time spent on upstream request attempts.",
+            "# TYPE safetysearch_upstream_request_seconds_total counter",
+        ]
+        for endpoint, seconds in sorted(self.upstream_seconds.items()):
+            lines.append(f"safetysearch_upstream_request_seconds_total{_labels(endpoint=endpoint)} {seconds}")
+
+        lines += [
+            "# HELP safetysearch_cache_lookups_total Response cache lookups by endpoint and result.",
+            "# TYPE safetysearch_cache_lookups_total counter",
+        ]
+        for (endpoint, result), count in sorted(self.cache_lookups.items()):
+            lines.append(f"safetysearch_cache_lookups_total{_labels(endpoint=endpoint, result=result)} {count}")
+        return "\n".join(lines) + "\n"
+
+async def log_periodically(metrics: "Metrics", interval: float) -> None:
+    """Logs a JSON snapshot of `metrics` every `interval` seconds until cancelled."""
+    if not logger.handlers:
+        # One JSON object per line on stderr; stdout carries the stdio transport
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(json.dumps({"event": "metrics", **metrics.snapshot()}))
+
+# The process-wide registry the API client, backends, formatters and tools record into
+metrics = Metrics()
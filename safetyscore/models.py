@@ -0,0 +1,153 @@
+"""
+Typed models for the openFDA records and tool results.
+
+Tools parse upstream records into these models once, then render them either as
+the markdown reports or as compact JSON (see `formatters.py`). Fields the tools
+never read are dropped on parsing.
+"""
+
+from typing import ClassVar, List, Optional
+
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+
+class Record(BaseModel):
+    """Base for openFDA records; unknown upstream fields are ignored."""
+
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+class Recall(Record):
+    """A food enforcement (recall) record."""
+
+    recall_number: Optional[str] = None
+    event_id: Optional[str] = None
+    status: Optional[str] = None
+    classification: Optional[str] = None
+    product_type: Optional[str] = None
+    recalling_firm: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    country: Optional[str] = None
+    product_description: Optional[str] = None
+    code_info: Optional[str] = None
+    reason_for_recall: Optional[str] = None
+    distribution_pattern: Optional[str] = None
+    product_quantity: Optional[str] = Field(None, validation_alias=AliasChoices("product_quantity", "quantity_in_commerce"))
+    recall_initiation_date: Optional[str] = None
+    report_date: Optional[str] = None
+    termination_date: Optional[str] = Field(None, validation_alias=AliasChoices("termination_date", "recall_termination_date"))
+
+class EventProduct(Record):
+    """A product named in an adverse event report."""
+
+    name_brand: Optional[str] = None
+    industry_name: Optional[str] = None
+    role: Optional[str] = None
+
+class Consumer(Record):
+    """The consumer an adverse event report describes."""
+
+    age: Optional[str] = None
+    age_unit: Optional[str] = None
+    gender: Optional[str] = None
+
+class AdverseEvent(Record):
+    """A food adverse event report."""
+
+    report_number: Optional[str] = None
+    date_created: Optional[str] = None
+    date_started: Optional[str] = None
+    reactions: List[str] = []
+    outcomes: List[str] = []
+    serious: List[str] = []
+    products: List[EventProduct] = []
+    consumer: Optional[Consumer] = None
+
+class SymptomCount(Record):
+    """One bucket of a `count=reactions.exact` query."""
+
+    term: str
+    count: int
+
+class CountBucket(Record):
+    """One bucket of a recall count: a classification, firm, state or 'YYYY-MM' month."""
+
+    term: str
+    count: int
+
+class RecallCounts(BaseModel):
+    """Recall counts grouped by one field, as computed by an openFDA `count=` query."""
+
+    records_field: ClassVar[str] = "buckets"
+
+    group_by: str
+    query: str
+    total: int
+    buckets: List[CountBucket] = []
+
+class TrendSeries(Record):
+    """Recall counts per period for one category, or for all recalls when the trend is not split."""
+
+    term: str
+    total: int
+    counts: List[int]
+
+class RecallTrends(BaseModel):
+    """Recall counts per time period, optionally split by a categorical field, from the columnar recall store."""
+
+    records_field: ClassVar[str] = "series"
+
+    bucket: str
+    by: Optional[str] = None
+    total: int
+    periods: List[str] = []
+    series: List[TrendSeries] = []
+
+class FirmRiskProfile(BaseModel):
+    """The recall history of one recalling firm, from its precomputed firm profile."""
+
+    records_field: ClassVar[str] = "reasons"
+
+    firm: str
+    other_names: List[str] = []
+    total: int
+    events: int
+    first_recall_date: Optional[str] = None
+    last_recall_date: Optional[str] = None
+    recent: int
+    classifications: List[CountBucket] = []
+    statuses: List[CountBucket] = []
+    years: List[CountBucket] = []
+    reasons: List[CountBucket] = []
+    states: List[CountBucket] = []
+    warning: Optional[str] = None
+
+class RecallSearchResult(BaseModel):
+    """Recalls matching a tool's openFDA query; `error` is set if paging stopped early."""
+
+    records_field: ClassVar[str] = "recalls"
+
+    query: str
+    total: int
+    recalls: List[Recall] = []
+    error: Optional[str] = None
+
+class AdverseEventSearchResult(BaseModel):
+    """Adverse event reports matching a tool's openFDA query; `error` is set if paging stopped early."""
+
+    records_field: ClassVar[str] = "events"
+
+    query: str
+    total: int
+    events: List[AdverseEvent] = []
+    error: Optional[str] = None
+
+class SymptomSummary(BaseModel):
+    """Symptom counts and recent cases for one product."""
+
+    records_field: ClassVar[str] = "cases"
+
+    product_name: str
+    total_reports: int
+    symptoms: List[SymptomCount] = []
+    cases: List[AdverseEvent] = []
+    warnings: List[str] = []
@@ -0,0 +1,146 @@
+"""
+Opt-in cProfile captures of sampled tool calls.
+
+A `ToolProfiler` profiles a random `sample_rate` fraction of tool calls, plus
+the next N calls after `arm(N)`. The server arms it on SIGUSR1, so a capture
+can be triggered without a restart. Each capture is written to `directory` as
+a `.prof` file, which `pstats` or snakeviz can load, next to a `.txt` summary
+of the top functions by cumulative and own time. Only the newest `keep`
+captures are kept.
+
+The profiler sees everything the event loop runs while a captured call is in
+progress, so time spent waiting on openFDA shows up under the selector's
+`poll`, decoding under the JSON decoder and report building under
+`formatters`/`reports`. Work done by concurrent calls is included too. One
+call is captured at a time; other calls in the meantime run unprofiled.
+"""
+
+import asyncio
+import cProfile
+import functools
+import io
+import os
+import pstats
+import random
+import signal
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+class ToolProfiler:
+    """Captures cProfile profiles of sampled or explicitly armed tool calls."""
+
+    def __init__(
+        self,
+        directory: str = "profiles",
+        sample_rate: float = 0.0,
+        keep: int = 50,
+        top_n: int = 30,
+        min_seconds: float = 0.0,
+    ):
+        """
+        Args:
+            directory: Where captures are written; created on first use.
+            sample_rate: Fraction of tool calls profiled; 0 profiles only armed calls.
+            keep: Number of most recent captures kept; older ones are deleted.
+            top_n: Functions listed in each summary, per sort order.
+            min_seconds: Calls faster than this are profiled but not written.
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.top_n = top_n
+        self.min_seconds = min_seconds
+        self.armed = 0
+        self.captures = 0
+        self._active = False
+        self._random = random.Random()
+
+    def arm(self, calls: int = 10) -> None:
+        """Profiles the next `calls` tool calls, whatever the sample rate."""
+        self.armed = calls
+
+    def _should_capture(self) -> bool:
+        if self._active:
+            return False
+        if self.armed > 0:
+            self.armed -= 1
+            return True
+        return self.sample_rate > 0 and self._random.random() < self.sample_rate
+
+    def profile_tool(self, fn: F) -> F:
+        """Wraps an async tool so its sampled calls are profiled."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def profiled(*args: Any, **kwargs: Any) -> Any:
+            if not self._should_capture():
+                return await fn(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler (e.g. a coverage tool) is active
+                return await fn(*args, **kwargs)
+            self._active = True
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._active = False
+                seconds = time.perf_counter() - start
+                if seconds >= self.min_seconds:
+                    await asyncio.to_thread(self._write, profile, name, kwargs, seconds)
+
+        return profiled
+
+    def _write(self, profile: cProfile.Profile, tool: str, arguments: Dict[str, Any], seconds: float) -> str:
+        """Writes one capture and its summary, prunes old captures and returns the path without extension."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.captures += 1
+        stem = os.path.join(
+            self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.captures:04d}-{tool}"
+        )
+        profile.dump_stats(stem + ".prof")
+
+        summary = io.StringIO()
+        summary.write(f"tool: {tool}\narguments: {repr(arguments)[:500]}\nwall time: {seconds * 1000:.1f} ms\n")
+        stats = pstats.Stats(profile, stream=summary).strip_dirs()
+        for order, label in (("cumulative", "cumulative"), ("tottime", "own")):
+            summary.write(f"\nTop {self.top_n} functions by {label} time:\n")
+            stats.sort_stats(order).print_stats(self.top_n)
+        with open(stem + ".txt", "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+
+        self._prune()
+        return stem
+
+    def _prune(self) -> None:
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".prof")),
+            key=lambda entry: (entry.stat().st_mtime, entry.name),
+        )
+        for entry in profiles[:max(len(profiles) - self.keep, 0)]:
+            for path in (entry.path, entry.path[:-len(".prof")] + ".txt"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def install_signal_handler(self, calls: int = 10, signum: Optional[int] = getattr(signal, "SIGUSR1", None)) -> bool:
+        """
+        Arms the profiler for the next `calls` tool calls whenever the process receives `signum`.
+
+        Returns:
+            Whether the handler was installed; it can't be on platforms without
+            SIGUSR1 or outside the main thread.
+        """
+        if signum is None:
+            return False
+        try:
+            signal.signal(signum, lambda *_: self.arm(calls))
+        except ValueError:
+            return False
+        return True
@@ -0,0 +1,178 @@
+"""
+Compact in-memory forms of openFDA recall and adverse event records.
+
+A parsed openFDA record is a dict of two dozen or more fields, most of which no
+tool reads, and every copy of a repeated value such as "Class II" or a firm
+name is a separate string. The response cache holds thousands of them. The
+classes here keep only the fields the tools use (those of the models in
+`models.py`, plus the aliases openFDA sends them under) in `__slots__`, intern
+the values that repeat across records, and are immutable so that cached
+responses can be shared safely between callers.
+
+They implement `Mapping`, so code written against the response dicts (`.get`,
+`in`, `Recall.model_validate`) works on them unchanged. The original record can
+optionally be kept as compressed JSON, decoded only when `.raw` is read.
+"""
+
+import json
+import sys
+import zlib
+from collections.abc import Mapping
+from typing import Any, ClassVar, Dict, FrozenSet, Iterator, Optional, Tuple
+
+from . import decoding
+
+class CompactRecord(Mapping):
+    """
+    Base for the compact record classes.
+
+    Subclasses list their fields in `FIELDS` (which also become their
+    `__slots__`), the fields whose values repeat across records in `INTERNED`,
+    list fields in `LISTS`, and fields holding nested records in `NESTED`.
+    Absent fields are stored as None and left out of the mapping, as they
+    would be missing from the response dict.
+    """
+
+    __slots__ = ("_raw",)
+
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+    INTERNED: ClassVar[FrozenSet[str]] = frozenset()
+    LISTS: ClassVar[FrozenSet[str]] = frozenset()
+    NESTED: ClassVar[Dict[str, type]] = {}
+
+    def __init__(self, record: Mapping, keep_raw: bool = False):
+        for name in self.FIELDS:
+            value = record.get(name)
+            if value is not None:
+                value = self._compact_value(name, value)
+            object.__setattr__(self, name, value)
+        raw = zlib.compress(json.dumps(record, separators=(",", ":")).encode("utf-8")) if keep_raw else None
+        object.__setattr__(self, "_raw", raw)
+
+    def _compact_value(self, name: str, value: Any) -> Any:
+        nested = self.NESTED.get(name)
+        if nested is not None:
+            if isinstance(value, list):
+                return tuple(nested(item) for item in value if isinstance(item, Mapping))
+            return nested(value) if isinstance(value, Mapping) else None
+        if name in self.LISTS:
+            return tuple(sys.intern(v) if isinstance(v, str) else v for v in value)
+        if name in self.INTERNED and isinstance(value, str):
+            return sys.intern(value)
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._raw is not None:
+            # Fields outside the compact set are still reachable when the raw record was kept
+            return self.raw[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self.FIELDS if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    @property
+    def raw(self) -> Optional[Dict[str, Any]]:
+        """The original openFDA record, decoded on each access, or None if it was not kept."""
+        if self._raw is None:
+            return None
+        return decoding.loads(zlib.decompress(self._raw))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The compact fields as plain JSON-serializable values."""
+        result = {}
+        for name, value in self.items():
+            if isinstance(value, tuple):
+                value = [item.to_dict() if isinstance(item, CompactRecord) else item for item in value]
+            elif isinstance(value, CompactRecord):
+                value = value.to_dict()
+            result[name] = value
+        return result
+
+class CompactRecall(CompactRecord):
+    """A food enforcement record, keeping the fields of `models.Recall`."""
+
+    FIELDS = (
+        "recall_number",
+        "event_id",
+        "status",
+        "classification",
+        "product_type",
+        "recalling_firm",
+        "city",
+        "state",
+        "country",
+        "product_description",
+        "code_info",
+        "reason_for_recall",
+        "distribution_pattern",
+        "product_quantity",
+        "quantity_in_commerce",
+        "recall_initiation_date",
+        "report_date",
+        "termination_date",
+        "recall_termination_date",
+    )
+    INTERNED = frozenset({
+        "status",
+        "classification",
+        "product_type",
+        "recalling_firm",
+        "city",
+        "state",
+        "country",
+        "distribution_pattern",
+        "recall_initiation_date",
+        "report_date",
+        "termination_date",
+        "recall_termination_date",
+    })
+    __slots__ = FIELDS
+
+class CompactEventProduct(CompactRecord):
+    FIELDS = ("name_brand", "industry_name", "role")
+    INTERNED = frozenset(FIELDS)
+    __slots__ = FIELDS
+
+class CompactConsumer(CompactRecord):
+    FIELDS = ("age", "age_unit", "gender")
+    INTERNED = frozenset(FIELDS)
+    __slots__ = FIELDS
+
+class CompactAdverseEvent(CompactRecord):
+    """A food adverse event report, keeping the fields of `models.AdverseEvent`."""
+
+    FIELDS = ("report_number", "date_created", "date_started", "reactions", "outcomes", "serious", "products", "consumer")
+    INTERNED = frozenset({"date_created", "date_started"})
+    LISTS = frozenset({"reactions", "outcomes", "serious"})
+    NESTED = {"products": CompactEventProduct, "consumer": CompactConsumer}
+    __slots__ = FIELDS
+
+def compact_record(record: Any, keep_raw: bool = False) -> Any:
+    """Converts a recall or adverse event dict to its compact form; anything else is returned unchanged."""
+    if not isinstance(record, dict):
+        return record
+    if "recall_number" in record:
+        return CompactRecall(record, keep_raw)
+    if "report_number" in record:
+        return CompactAdverseEvent(record, keep_raw)
+    return record
+
+def compact_response(data: Dict[str, Any], keep_raw: bool = False) -> Dict[str, Any]:
+    """A copy of an openFDA response with its result records in compact form (count buckets are left as they are)."""
+    results = data.get("results")
+    if not isinstance(results, list):
+        return data
+    return {**data, "results": [compact_record(record, keep_raw) for record in results]}
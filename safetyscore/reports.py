@@ -0,0 +1,179 @@
+"""
+The recall analysis report shared by the product description and product type tools.
+
+`RecallAnalysis` collects every aggregate the report needs (class counts, top
+firms, recent activity, date range) while the per-recall details are rendered,
+so building a report is a single pass over the records however many there are.
+The tools differ only in wording, which lives in a `RecallReportTemplate`.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from .models import Recall
+
+CLASSIFICATIONS = ("Class I", "Class II", "Class III")
+
+class RecallAnalysis:
+    """Aggregates over a set of recalls, updated one recall at a time."""
+
+    __slots__ = ("recent_since", "total", "class_counts", "firms", "recent", "earliest", "latest")
+
+    def __init__(self, recent_since: str):
+        self.recent_since = recent_since
+        self.total = 0
+        self.class_counts: Counter = Counter()
+        self.firms: Counter = Counter()
+        self.recent = 0
+        self.earliest: Optional[str] = None
+        self.latest: Optional[str] = None
+
+    def add(self, recall: Recall) -> None:
+        self.total += 1
+        self.class_counts[recall.classification] += 1
+        self.firms[recall.recalling_firm or "Unknown"] += 1
+        date = recall.recall_initiation_date
+        if date:
+            if date >= self.recent_since:
+                self.recent += 1
+            if self.earliest is None or date < self.earliest:
+                self.earliest = date
+            if self.latest is None or date > self.latest:
+                self.latest = date
+
+    def top_firms(self, n: int = 3) -> List[Tuple[str, int]]:
+        return self.firms.most_common(n)
+
+@dataclass(frozen=True)
+class RecallReportTemplate:
+    """The wording of one recall analysis report; `{subject}` is replaced by the tool's query."""
+
+    title: str
+    empty_message: str
+    summary_heading: str
+    class_i_severity: str
+    class_i_advice: Tuple[str, ...]
+    class_ii_advice: Tuple[str, ...]
+    recent_heading: str
+    recent_note: Optional[str] = None
+    show_top_firms: bool = False
+    show_contact: bool = False
+
+PRODUCT_DESCRIPTION_TEMPLATE = RecallReportTemplate(
+    title="🚨 **Food Recall Analysis for '{subject}'**",
+    empty_message="No food recalls found for '{subject}'.",
+    summary_heading="📊 **Recall Summary:**",
+    class_i_severity="IMMEDIATE ACTION REQUIRED",
+    class_i_advice=(
+        "Check if you have any of the affected products",
+        "Do not consume products with matching codes",
+        "Contact the company for refund/replacement",
+    ),
+    class_ii_advice=(
+        "Monitor for symptoms if consumed",
+        "Consider returning affected products",
+    ),
+    recent_heading="🆕 **Recent Activity:**",
+    show_contact=True,
+)
+
+PRODUCT_TYPE_TEMPLATE = RecallReportTemplate(
+    title="🚨 **Product Type Recall Analysis: '{subject}'**",
+    empty_message="No food recalls found for product type '{subject}'.",
+    summary_heading="📊 **Recall Summary for {subject} Products:**",
+    class_i_severity="HIGH RISK",
+    class_i_advice=(
+        "Exercise caution when purchasing {subject} products",
+        "Check product codes before consumption",
+        "Monitor for any safety alerts",
+    ),
+    class_ii_advice=(
+        "Be aware of potential issues with {subject} products",
+        "Check expiration dates and storage conditions",
+    ),
+    recent_heading="📈 **Recent Trend:**",
+    recent_note="This indicates ongoing safety concerns with {subject} products",
+    show_top_firms=True,
+)
+
+def one_year_ago() -> str:
+    return (datetime.now() - timedelta(days=365)).strftime('%Y%m%d')
+
+def recall_analysis_report(
+    recalls: Iterable[Recall],
+    template: RecallReportTemplate,
+    subject: str,
+    recent_since: Optional[str] = None,
+) -> str:
+    """
+    Renders a recall analysis report in a single pass over `recalls`.
+
+    Args:
+        recalls: The recalls to analyze, most recent first.
+        template: The report wording.
+        subject: The query the report is about.
+        recent_since: YYYYMMDD date from which recalls count as recent; defaults to one year ago.
+
+    Returns:
+        The markdown report, or the template's empty message if there are no recalls.
+    """
+    analysis = RecallAnalysis(recent_since or one_year_ago())
+    details: List[str] = []
+    for recall in recalls:
+        analysis.add(recall)
+        details.append(f"\n**Recall #{analysis.total}:**")
+        details.append(f"🏷️ Product: {recall.product_description or 'N/A'}")
+        details.append(f"🏢 Company: {recall.recalling_firm or 'N/A'}")
+        details.append(f"⚠️ Classification: {recall.classification or 'N/A'}")
+        details.append(f"📅 Recall Date: {recall.recall_initiation_date or 'N/A'}")
+        if recall.termination_date:
+            details.append(f"📅 Termination Date: {recall.termination_date}")
+        details.append(f"🔍 Reason: {recall.reason_for_recall or 'N/A'}")
+        if recall.distribution_pattern:
+            details.append(f"🌍 Distribution: {recall.distribution_pattern}")
+        if recall.code_info:
+            details.append(f"🔢 Product Codes: {recall.code_info}")
+        if recall.product_quantity:
+            details.append(f"📦 Quantity Affected: {recall.product_quantity}")
+        if template.show_contact and recall.recalling_firm:
+            details.append(f"📞 Contact: {recall.recalling_firm}")
+
+    if not analysis.total:
+        return template.empty_message.format(subject=subject)
+
+    class_i, class_ii, class_iii = (analysis.class_counts[c] for c in CLASSIFICATIONS)
+    report_parts = [
+        template.title.format(subject=subject),
+        "=" * 60,
+        template.summary_heading.format(subject=subject),
+        f"• Total recalls found: {analysis.total}",
+        f"• Class I (Most Serious): {class_i}",
+        f"• Class II (Moderate): {class_ii}",
+        f"• Class III (Least Serious): {class_iii}",
+    ]
+    if analysis.earliest:
+        report_parts.append(f"• Date range: {analysis.earliest} to {analysis.latest}")
+
+    if template.show_top_firms:
+        report_parts.append(f"\n🏢 **Top Companies with Recalls:**")
+        report_parts.extend(f"• {firm}: {count} recalls" for firm, count in analysis.top_firms())
+
+    report_parts.append(f"\n📋 **Detailed Recall Information:**")
+    report_parts.extend(details)
+
+    report_parts.append(f"\n🛡️ **Safety Recommendations:**")
+    if class_i:
+        report_parts.append(f"• ⚠️ {class_i} Class I recalls detected - {template.class_i_severity}")
+        report_parts.extend(f"• {step.format(subject=subject)}" for step in template.class_i_advice)
+    if class_ii:
+        report_parts.append(f"• ⚠️ {class_ii} Class II recalls - MODERATE RISK")
+        report_parts.extend(f"• {step.format(subject=subject)}" for step in template.class_ii_advice)
+
+    if analysis.recent:
+        report_parts.append(f"\n{template.recent_heading} {analysis.recent} recalls in the last 12 months")
+        if template.recent_note:
+            report_parts.append(f"• {template.recent_note.format(subject=subject)}")
+
+    return "\n".join(report_parts)
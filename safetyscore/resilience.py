@@ -0,0 +1,184 @@
+"""
+Client-side protection for the openFDA quota: a token-bucket rate limiter,
+retry with jittered exponential backoff, and a circuit breaker.
+"""
+
+import asyncio
+import email.utils
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+class RateLimiter:
+    """
+    A token bucket shared by every request the client makes.
+
+    Tokens refill continuously at `rate_per_minute`, up to `burst`. A request
+    waits until a token is available, so bursts are smoothed out to the quota
+    instead of being rejected upstream. After a 429, `pause` stops issuing
+    tokens until openFDA's Retry-After has passed. An optional `daily_limit`
+    fails requests fast once the day's quota is used up.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = 240.0,
+        burst: Optional[int] = None,
+        daily_limit: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst if burst is not None else max(1, int(rate_per_minute // 6))
+        self.daily_limit = daily_limit
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._day = time.strftime("%Y%m%d", time.gmtime())
+        self._used_today = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take_daily(self) -> bool:
+        if not self.daily_limit:
+            return True
+        today = time.strftime("%Y%m%d", time.gmtime())
+        if today != self._day:
+            self._day, self._used_today = today, 0
+        if self._used_today >= self.daily_limit:
+            return False
+        self._used_today += 1
+        return True
+
+    async def acquire(self) -> bool:
+        """Waits for a token. Returns False if the daily quota is exhausted."""
+        if not self._take_daily():
+            return False
+        # The lock keeps waiters in FIFO order so tokens are handed out fairly
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self._paused_until - self._clock()
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+                await self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stops issuing tokens for `seconds` (used when openFDA answers 429)."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+        self._tokens = 0.0
+
+class RetryPolicy:
+    """Retry with full-jitter exponential backoff, honouring Retry-After when given."""
+
+    RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, status_code: int) -> bool:
+        return status_code in self.RETRYABLE_STATUS_CODES
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait before retry number `attempt` (1-based), or None to stop retrying.
+
+        A Retry-After longer than `max_delay` stops retries rather than holding
+        the caller for that long.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class CircuitBreaker:
+    """
+    Fails requests fast while openFDA is down.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests
+    are rejected without going upstream. Once `reset_timeout` has passed a single
+    trial request is let through (half-open); its success closes the circuit and
+    its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial request through."""
+        return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.retry_in() <= 0:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def is_trial(self) -> bool:
+        """Whether the request `allow` just let through is the half-open trial."""
+        return self.state == self.HALF_OPEN and self._trial_in_flight
+
+    def release(self) -> None:
+        """
+        Ends a half-open trial without recording an outcome, so the next request becomes the trial.
+
+        For trials that say nothing about upstream health (a 429, an unexpected
+        error or a cancelled request); otherwise the circuit would stay half-open
+        with its trial slot taken for good.
+        """
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+            self._trial_in_flight = False
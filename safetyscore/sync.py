@@ -0,0 +1,143 @@
+"""
+Incremental sync of the local recall index from the live openFDA API.
+
+Instead of re-downloading the bulk files, `sync_recalls` asks openFDA only for
+recalls initiated, reported or terminated since the last sync and upserts them
+into the index. The watermark is stored in the index's `index_meta` table and
+only advances after a complete pass; each pass looks back `overlap_days` before
+it, because openFDA publishes records (and late changes such as a termination
+date) some time after the dates they carry.
+
+Run it once from the command line:
+
+    python -m safetyscore.sync --db recalls.db
+
+or periodically inside the server by setting FDA_SYNC_INTERVAL (see `periodic_sync`).
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from .api_client import MAX_PAGE_SIZE, ApiClient, is_not_found
+from .backends import DataBackend, OpenFDABackend, any_of, match_range
+from .local_index import ENFORCEMENT, LocalIndex
+
+WATERMARK_KEY = "enforcement_sync_watermark"
+
+# A recall enters the window when it is initiated or reported, and again when it is terminated
+SYNC_DATE_FIELDS = ("recall_initiation_date", "report_date", "termination_date")
+
+# Where a first sync of an empty index starts: openFDA's enforcement data begins in 2004
+EARLIEST_DATE = "20040101"
+
+def sync_window(index: LocalIndex, overlap_days: int, today: datetime) -> Dict[str, str]:
+    """The date range the next sync covers: from the watermark (minus the overlap) to today."""
+    watermark = index.get_meta(WATERMARK_KEY)
+    if watermark is None:
+        # No sync has run yet; continue from whatever the bulk ingestion loaded
+        watermark = index.execute("SELECT MAX(report_date) AS latest FROM recalls")[0]["latest"]
+    if watermark is None:
+        start = EARLIEST_DATE
+    else:
+        start = (datetime.strptime(watermark, "%Y%m%d") - timedelta(days=overlap_days)).strftime("%Y%m%d")
+    return {"since": start, "until": today.strftime("%Y%m%d")}
+
+async def sync_recalls(
+    index: LocalIndex,
+    source: DataBackend,
+    overlap_days: int = 30,
+    page_size: int = MAX_PAGE_SIZE,
+    today: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Upserts recalls initiated, reported or terminated since the last sync.
+
+    Args:
+        index: The local index to update.
+        source: Where to fetch recalls from, normally an `OpenFDABackend`.
+        overlap_days: Days before the watermark to look at again, to catch late-published records and changes.
+        page_size: Records fetched per request.
+        today: The end of the sync window; defaults to now.
+
+    Returns:
+        A dict with the 'since' and 'until' dates synced, the number of records
+        'upserted', and an 'error' message if the sync stopped early (in which
+        case the watermark is left where it was).
+    """
+    window = sync_window(index, overlap_days, today or datetime.now())
+    query = any_of(*(match_range(field, window["since"], window["until"]) for field in SYNC_DATE_FIELDS))
+
+    upserted = 0
+    error = None
+    async for data, page_error in source.iter_pages(ENFORCEMENT, query, None, page_size=page_size):
+        if page_error:
+            # A 404 just means nothing changed in the window
+            error = None if is_not_found(page_error) else page_error
+            break
+        records = data.get("results", [])
+        if records:
+            upserted += await asyncio.to_thread(index.ingest, ENFORCEMENT, records)
+
+    if error is None:
+        index.set_meta(WATERMARK_KEY, window["until"])
+    return dict(window, upserted=upserted, error=error)
+
+async def periodic_sync(
+    index_path: str,
+    source: DataBackend,
+    interval: float,
+    overlap_days: int = 30,
+    on_synced: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> None:
+    """
+    Runs `sync_recalls` every `interval` seconds until cancelled.
+
+    Meant to run as a background task in the server process. A failed sync is
+    retried at the next interval; `on_synced`, if given, is called with the
+    result of every pass. Readers of the index, in this process or the HTTP
+    workers, pick up the changes themselves: cached backends notice its
+    `version` change, and the firm profiles and fuzzy index apply the recalls
+    logged in `recall_changes`.
+    """
+    index = LocalIndex(index_path)
+    try:
+        async with source:
+            while True:
+                try:
+                    result = await sync_recalls(index, source, overlap_days=overlap_days)
+                except Exception as e:
+                    result = {"upserted": 0, "error": f"An unexpected error occurred: {e}"}
+                if on_synced is not None:
+                    on_synced(result)
+                await asyncio.sleep(interval)
+    finally:
+        index.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for a one-off incremental sync."""
+    parser = argparse.ArgumentParser(description="Sync recent openFDA food recalls into the local index.")
+    parser.add_argument("--db", default=os.getenv("FDA_LOCAL_INDEX_PATH", "safetysearch.db"))
+    parser.add_argument("--url", default=os.getenv("FDA_RECALL_API_URL", "https://api.fda.gov/food/enforcement.json"))
+    parser.add_argument("--overlap-days", type=int, default=int(os.getenv("FDA_SYNC_OVERLAP_DAYS", "30")))
+    args = parser.parse_args(argv)
+
+    async def run() -> Dict[str, Any]:
+        client = ApiClient(api_key=os.getenv("FDA_API_KEY") or None)
+        async with OpenFDABackend(client, urls={ENFORCEMENT: args.url}) as source:
+            return await sync_recalls(index, source, overlap_days=args.overlap_days)
+
+    index = LocalIndex(args.db)
+    try:
+        result = asyncio.run(run())
+        print(f"Synced recalls from {result['since']} to {result['until']}: {result['upserted']} upserted")
+        if result["error"]:
+            print(f"Sync stopped early, watermark unchanged: {result['error']}")
+            raise SystemExit(1)
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
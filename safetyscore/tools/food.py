@@ -1,514 +1,904 @@
-import httpx
+import asyncio
 from mcp.server.fastmcp import FastMCP
 from datetime import datetime, timedelta
-from ..api_client import ApiClient
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .. import formatters
+from ..aggregations import MAX_BUCKETS, RECALL_COUNT_FIELDS, count_recalls, parse_date, recall_count_query
+from ..api_client import ApiClient, ApiResult, empty_if_not_found, is_not_found
+from ..batch import batch_lookup
+from ..cache import DiskCache, ResponseCache
+from ..columnar import CATEGORY_COLUMNS, TIME_BUCKETS, RecallColumnStore
+from ..decoding import get_decoder
+from ..fanout import gather_queries
+from ..firms import PROFILE_COUNT_FIELDS, FirmProfile, FirmProfiles, firm_key, profile_from_counts
+from ..fuzzy import FuzzyIndex
+from ..local_index import LocalIndex
+from ..metrics import log_periodically, metrics
+from ..models import (
+    AdverseEvent,
+    AdverseEventSearchResult,
+    CountBucket,
+    FirmRiskProfile,
+    Recall,
+    RecallCounts,
+    RecallSearchResult,
+    RecallTrends,
+    SymptomCount,
+    SymptomSummary,
+    TrendSeries,
+)
+from ..profiling import ToolProfiler
+from ..reports import PRODUCT_DESCRIPTION_TEMPLATE, PRODUCT_TYPE_TEMPLATE, one_year_ago, recall_analysis_report
+from ..resilience import CircuitBreaker, RateLimiter, RetryPolicy
+from ..sync import periodic_sync
+from ..backends import (
+    ENFORCEMENT,
+    EVENT,
+    CachedBackend,
+    DataBackend,
+    FixtureBackend,
+    LocalIndexBackend,
+    OpenFDABackend,
+    any_of,
+    match_phrase,
+    match_range,
+)
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from a .env file if it exists
-load_dotenv()
+# Settings are read from the environment when this module is first imported;
+# the server loads a .env file, if there is one, before importing it
 
 # Get API URLs from environment variables with fallbacks to the public defaults
 RECALL_API_URL = os.getenv("FDA_RECALL_API_URL", "https://api.fda.gov/food/enforcement.json")
 ADVERSE_EVENT_API_URL = os.getenv("FDA_ADVERSE_EVENT_API_URL", "https://api.fda.gov/food/event.json")
 
-api_client = ApiClient()
+# HTTP connection pool settings for the shared openFDA client
+HTTP_TIMEOUT = float(os.getenv("FDA_HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("FDA_HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("FDA_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("FDA_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP2_ENABLED = os.getenv("FDA_HTTP2", "true").lower() in ("1", "true", "yes")
 
-def register_food_tools(mcp: FastMCP):
-    @mcp.tool()
-    async def search_recalls_by_product_description(query: str) -> str:
-        """Searches for food recalls by matching a query against the product description with detailed analysis."""
-        search_query = f'product_description:"{query}"'
-        
-        # Use params to let httpx handle URL encoding properly
-        params = {
-            'search': search_query,
-            'limit': 10,
-            'sort': 'recall_initiation_date:desc'
-        }
-        
-        data, error = await api_client.make_request(RECALL_API_URL, params=params)
-        if error:
-            return error
+# Response cache settings; recall and event data only change daily upstream
+CACHE_ENABLED = os.getenv("FDA_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("FDA_CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_RECALL = float(os.getenv("FDA_CACHE_TTL_RECALL", "21600"))
+CACHE_TTL_ADVERSE_EVENT = float(os.getenv("FDA_CACHE_TTL_ADVERSE_EVENT", "21600"))
+CACHE_TTL_COUNT = float(os.getenv("FDA_CACHE_TTL_COUNT", "43200"))
 
-        results = data.get("results", [])
-        if not results:
-            return f"No food recalls found for '{query}'."
+# Setting FDA_CACHE_PATH keeps openFDA responses in a SQLite file instead of in
+# memory, so the cache survives restarts and is shared by workers on one host
+CACHE_PATH = os.getenv("FDA_CACHE_PATH", "")
+CACHE_MAX_BYTES = int(os.getenv("FDA_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
 
-        # Build comprehensive report
-        report_parts = []
-        report_parts.append(f"🚨 **Food Recall Analysis for '{query}'**")
-        report_parts.append("=" * 60)
-        
-        # Summary statistics
-        total_recalls = len(results)
-        class_i_recalls = sum(1 for r in results if r.get('classification') == 'Class I')
-        class_ii_recalls = sum(1 for r in results if r.get('classification') == 'Class II')
-        class_iii_recalls = sum(1 for r in results if r.get('classification') == 'Class III')
-        
-        report_parts.append(f"📊 **Recall Summary:**")
-        report_parts.append(f"• Total recalls found: {total_recalls}")
-        report_parts.append(f"• Class I (Most Serious): {class_i_recalls}")
-        report_parts.append(f"• Class II (Moderate): {class_ii_recalls}")
-        report_parts.append(f"• Class III (Least Serious): {class_iii_recalls}")
-        
-        # Detailed recall information
-        report_parts.append(f"\n📋 **Detailed Recall Information:**")
-        
-        for i, recall in enumerate(results, 1):
-            report_parts.append(f"\n**Recall #{i}:**")
-            
-            # Basic product info
-            product = recall.get('product_description', 'N/A')
-            report_parts.append(f"🏷️ Product: {product}")
-            
-            # Company and contact info
-            company = recall.get('recalling_firm', 'N/A')
-            report_parts.append(f"🏢 Company: {company}")
-            
-            # Classification and seriousness
-            classification = recall.get('classification', 'N/A')
-            report_parts.append(f"⚠️ Classification: {classification}")
-            
-            # Dates
-            recall_date = recall.get('recall_initiation_date', 'N/A')
-            termination_date = recall.get('recall_termination_date', 'N/A')
-            report_parts.append(f"📅 Recall Date: {recall_date}")
-            if termination_date != 'N/A':
-                report_parts.append(f"📅 Termination Date: {termination_date}")
-            
-            # Reason and details
-            reason = recall.get('reason_for_recall', 'N/A')
-            report_parts.append(f"🔍 Reason: {reason}")
-            
-            # Distribution info
-            distribution = recall.get('distribution_pattern', 'N/A')
-            if distribution != 'N/A':
-                report_parts.append(f"🌍 Distribution: {distribution}")
-            
-            # Code information
-            code_info = recall.get('code_info', 'N/A')
-            if code_info != 'N/A':
-                report_parts.append(f"🔢 Product Codes: {code_info}")
-            
-            # Quantity affected
-            quantity = recall.get('quantity_in_commerce', 'N/A')
-            if quantity != 'N/A':
-                report_parts.append(f"📦 Quantity Affected: {quantity}")
-            
-            # Contact information
-            contact = recall.get('recalling_firm', 'N/A')
-            if contact != 'N/A':
-                report_parts.append(f"📞 Contact: {contact}")
-        
-        # Safety recommendations
-        report_parts.append(f"\n🛡️ **Safety Recommendations:**")
-        if class_i_recalls > 0:
-            report_parts.append(f"• ⚠️ {class_i_recalls} Class I recalls detected - IMMEDIATE ACTION REQUIRED")
-            report_parts.append(f"• Check if you have any of the affected products")
-            report_parts.append(f"• Do not consume products with matching codes")
-            report_parts.append(f"• Contact the company for refund/replacement")
-        
-        if class_ii_recalls > 0:
-            report_parts.append(f"• ⚠️ {class_ii_recalls} Class II recalls - MODERATE RISK")
-            report_parts.append(f"• Monitor for symptoms if consumed")
-            report_parts.append(f"• Consider returning affected products")
-        
-        # Recent activity indicator
-        recent_recalls = [r for r in results if r.get('recall_initiation_date', '') >= '20240101']
-        if recent_recalls:
-            report_parts.append(f"\n🆕 **Recent Activity:** {len(recent_recalls)} recalls in 2024")
-        
-        return "\n".join(report_parts)
+# Stale-while-revalidate: expired responses are still served for FDA_CACHE_STALE_TTL
+# seconds while a fresh copy is fetched in the background, and the most requested
+# responses are refreshed every FDA_CACHE_REFRESH_INTERVAL seconds before they go stale
+CACHE_STALE_TTL = float(os.getenv("FDA_CACHE_STALE_TTL", "3600"))
+CACHE_REFRESH_INTERVAL = float(os.getenv("FDA_CACHE_REFRESH_INTERVAL", "300"))
+CACHE_REFRESH_TOP_N = int(os.getenv("FDA_CACHE_REFRESH_TOP_N", "20"))
+CACHE_REFRESH_MARGIN = float(os.getenv("FDA_CACHE_REFRESH_MARGIN", "600"))
 
-    @mcp.tool()
-    async def search_recalls_by_product_type(product_type: str) -> str:
-        """Searches for recalls where the product description contains a product type with detailed analysis."""
-        search_query = f'product_description:"{product_type}"'
-        
-        params = {
-            'search': search_query,
-            'limit': 10,
-            'sort': 'recall_initiation_date:desc'
-        }
+# In-memory cache entries keep only the record fields the tools read, in slotted
+# records; FDA_CACHE_KEEP_RAW also keeps each full record as compressed JSON
+CACHE_COMPACT_RECORDS = os.getenv("FDA_CACHE_COMPACT_RECORDS", "true").lower() in ("1", "true", "yes")
+CACHE_KEEP_RAW = os.getenv("FDA_CACHE_KEEP_RAW", "false").lower() in ("1", "true", "yes")
 
-        data, error = await api_client.make_request(RECALL_API_URL, params=params)
-        if error:
-            return error
+response_cache = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    endpoint_ttls={
+        RECALL_API_URL: CACHE_TTL_RECALL,
+        ADVERSE_EVENT_API_URL: CACHE_TTL_ADVERSE_EVENT,
+    },
+    count_ttl=CACHE_TTL_COUNT,
+    store=DiskCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES) if CACHE_PATH else None,
+    stale_ttl=CACHE_STALE_TTL,
+    compact=CACHE_COMPACT_RECORDS,
+    keep_raw=CACHE_KEEP_RAW,
+) if CACHE_ENABLED else None
 
-        results = data.get("results", [])
-        if not results:
-            return f"No food recalls found for product type '{product_type}'."
+# openFDA quota protection. The default rate matches openFDA's 240 requests per
+# minute; FDA_DAILY_LIMIT=0 disables the daily cap (1,000 without a key, 120,000 with one)
+API_KEY = os.getenv("FDA_API_KEY") or None
+RATE_LIMIT_PER_MINUTE = float(os.getenv("FDA_RATE_LIMIT_PER_MINUTE", "240"))
+RATE_LIMIT_BURST = int(os.getenv("FDA_RATE_LIMIT_BURST", "40"))
+DAILY_LIMIT = int(os.getenv("FDA_DAILY_LIMIT", "0"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("FDA_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("FDA_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("FDA_RETRY_MAX_DELAY", "10"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("FDA_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("FDA_CIRCUIT_RESET_TIMEOUT", "30"))
 
-        # Build comprehensive report
-        report_parts = []
-        report_parts.append(f"🚨 **Product Type Recall Analysis: '{product_type}'**")
-        report_parts.append("=" * 60)
-        
-        # Summary statistics
-        total_recalls = len(results)
-        class_i_recalls = sum(1 for r in results if r.get('classification') == 'Class I')
-        class_ii_recalls = sum(1 for r in results if r.get('classification') == 'Class II')
-        class_iii_recalls = sum(1 for r in results if r.get('classification') == 'Class III')
-        
-        report_parts.append(f"📊 **Recall Summary for {product_type} Products:**")
-        report_parts.append(f"• Total recalls found: {total_recalls}")
-        report_parts.append(f"• Class I (Most Serious): {class_i_recalls}")
-        report_parts.append(f"• Class II (Moderate): {class_ii_recalls}")
-        report_parts.append(f"• Class III (Least Serious): {class_iii_recalls}")
-        
-        # Company analysis
-        companies = {}
-        for recall in results:
-            company = recall.get('recalling_firm', 'Unknown')
-            companies[company] = companies.get(company, 0) + 1
-        
-        top_companies = sorted(companies.items(), key=lambda x: x[1], reverse=True)[:3]
-        report_parts.append(f"\n🏢 **Top Companies with Recalls:**")
-        for company, count in top_companies:
-            report_parts.append(f"• {company}: {count} recalls")
-        
-        # Detailed recall information
-        report_parts.append(f"\n📋 **Detailed Recall Information:**")
-        
-        for i, recall in enumerate(results, 1):
-            report_parts.append(f"\n**Recall #{i}:**")
-            
-            # Basic product info
-            product = recall.get('product_description', 'N/A')
-            report_parts.append(f"🏷️ Product: {product}")
-            
-            # Company and contact info
-            company = recall.get('recalling_firm', 'N/A')
-            report_parts.append(f"🏢 Company: {company}")
-            
-            # Classification and seriousness
-            classification = recall.get('classification', 'N/A')
-            report_parts.append(f"⚠️ Classification: {classification}")
-            
-            # Dates
-            recall_date = recall.get('recall_initiation_date', 'N/A')
-            termination_date = recall.get('recall_termination_date', 'N/A')
-            report_parts.append(f"📅 Recall Date: {recall_date}")
-            if termination_date != 'N/A':
-                report_parts.append(f"📅 Termination Date: {termination_date}")
-            
-            # Reason and details
-            reason = recall.get('reason_for_recall', 'N/A')
-            report_parts.append(f"🔍 Reason: {reason}")
-            
-            # Distribution info
-            distribution = recall.get('distribution_pattern', 'N/A')
-            if distribution != 'N/A':
-                report_parts.append(f"🌍 Distribution: {distribution}")
-            
-            # Code information
-            code_info = recall.get('code_info', 'N/A')
-            if code_info != 'N/A':
-                report_parts.append(f"🔢 Product Codes: {code_info}")
-            
-            # Quantity affected
-            quantity = recall.get('quantity_in_commerce', 'N/A')
-            if quantity != 'N/A':
-                report_parts.append(f"📦 Quantity Affected: {quantity}")
-        
-        # Safety recommendations
-        report_parts.append(f"\n🛡️ **Safety Recommendations:**")
-        if class_i_recalls > 0:
-            report_parts.append(f"• ⚠️ {class_i_recalls} Class I recalls detected - HIGH RISK")
-            report_parts.append(f"• Exercise caution when purchasing {product_type} products")
-            report_parts.append(f"• Check product codes before consumption")
-            report_parts.append(f"• Monitor for any safety alerts")
-        
-        if class_ii_recalls > 0:
-            report_parts.append(f"• ⚠️ {class_ii_recalls} Class II recalls - MODERATE RISK")
-            report_parts.append(f"• Be aware of potential issues with {product_type} products")
-            report_parts.append(f"• Check expiration dates and storage conditions")
-        
-        # Trend analysis
-        recent_recalls = [r for r in results if r.get('recall_initiation_date', '') >= '20240101']
-        if recent_recalls:
-            report_parts.append(f"\n📈 **Recent Trend:** {len(recent_recalls)} recalls in 2024")
-            report_parts.append(f"• This indicates ongoing safety concerns with {product_type} products")
-        
-        return "\n".join(report_parts)
+# JSON decoder for openFDA responses: "auto" picks orjson or msgspec when installed, else the stdlib
+JSON_DECODER = os.getenv("FDA_JSON_DECODER", "auto")
 
-    @mcp.tool()
-    async def search_recalls_by_specific_product(product_name: str) -> str:
-        """Checks for any ongoing recalls for a single, specific food product."""
-        search_query = f'product_description:"{product_name}"'
-        
-        # Use params to let httpx handle URL encoding properly
-        params = {
-            'search': search_query,
-            'limit': 1
-        }
-        
-        data, error = await api_client.make_request(RECALL_API_URL, params=params)
+api_client = ApiClient(
+    timeout=HTTP_TIMEOUT,
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    http2=HTTP2_ENABLED,
+    cache=response_cache,
+    api_key=API_KEY,
+    rate_limiter=RateLimiter(
+        rate_per_minute=RATE_LIMIT_PER_MINUTE,
+        burst=RATE_LIMIT_BURST,
+        daily_limit=DAILY_LIMIT,
+    ) if RATE_LIMIT_PER_MINUTE > 0 else None,
+    retry_policy=RetryPolicy(
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+    ),
+    circuit_breaker=CircuitBreaker(
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT,
+    ),
+    refresh_interval=CACHE_REFRESH_INTERVAL,
+    refresh_top_n=CACHE_REFRESH_TOP_N,
+    refresh_margin=CACHE_REFRESH_MARGIN,
+    json_decoder=get_decoder(JSON_DECODER),
+)
+
+# Data backend: "api" queries openFDA live, "local" answers from an index built
+# with `python -m safetyscore.local_index ingest`, "fixture" serves a JSON file
+DATA_BACKEND = os.getenv("FDA_DATA_BACKEND", "api").lower()
+LOCAL_INDEX_PATH = os.getenv("FDA_LOCAL_INDEX_PATH", "safetysearch.db")
+FIXTURE_PATH = os.getenv("FDA_FIXTURE_PATH", "")
+
+# Shared deadline in seconds for tools that run several upstream queries concurrently
+FANOUT_TIMEOUT = float(os.getenv("FDA_FANOUT_TIMEOUT", "20"))
+
+# Paging for tools that accept max_results; pages are parsed into models as they arrive
+PAGE_SIZE = int(os.getenv("FDA_PAGE_SIZE", "100"))
+MAX_RESULTS = int(os.getenv("FDA_MAX_RESULTS", "25000"))
+
+# Batch lookup settings
+BATCH_MAX_ITEMS = int(os.getenv("FDA_BATCH_MAX_ITEMS", "5000"))
+BATCH_CHUNK_SIZE = int(os.getenv("FDA_BATCH_CHUNK_SIZE", "25"))
+BATCH_CONCURRENCY = int(os.getenv("FDA_BATCH_CONCURRENCY", "8"))
+
+# Typo-tolerant product matching, learnt from the local index (when present) and from fetched recalls
+FUZZY_ENABLED = os.getenv("FDA_FUZZY_MATCHING", "true").lower() in ("1", "true", "yes")
+
+# Incremental sync of the local index from openFDA while the server runs; 0 disables it
+SYNC_INTERVAL = float(os.getenv("FDA_SYNC_INTERVAL", "0"))
+SYNC_OVERLAP_DAYS = int(os.getenv("FDA_SYNC_OVERLAP_DAYS", "30"))
+# Seconds between checks for recalls a sync (in this or another process) wrote to the local index
+INDEX_REFRESH_INTERVAL = float(os.getenv("FDA_INDEX_REFRESH_INTERVAL", "60"))
+
+# Seconds between JSON log lines of the tool, upstream and cache metrics; 0 disables them
+METRICS_LOG_INTERVAL = float(os.getenv("FDA_METRICS_LOG_INTERVAL", "0"))
+
+# cProfile captures of a sampled fraction of tool calls, written to FDA_PROFILE_DIR;
+# SIGUSR1 captures the next FDA_PROFILE_TRIGGER_CALLS calls whatever the rate
+PROFILE_SAMPLE_RATE = float(os.getenv("FDA_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("FDA_PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("FDA_PROFILE_KEEP", "50"))
+PROFILE_MIN_SECONDS = float(os.getenv("FDA_PROFILE_MIN_SECONDS", "0"))
+PROFILE_TRIGGER_CALLS = int(os.getenv("FDA_PROFILE_TRIGGER_CALLS", "10"))
+
+def create_backend(kind: str = DATA_BACKEND) -> DataBackend:
+    """Creates the data backend the tools query, as selected by FDA_DATA_BACKEND."""
+    if kind == "api":
+        # Caching already happens inside the ApiClient
+        return OpenFDABackend(api_client, urls={ENFORCEMENT: RECALL_API_URL, EVENT: ADVERSE_EVENT_API_URL})
+    if kind == "local":
+        backend = LocalIndexBackend(LOCAL_INDEX_PATH)
+    elif kind == "fixture":
+        if not FIXTURE_PATH:
+            raise ValueError("FDA_FIXTURE_PATH must be set when FDA_DATA_BACKEND=fixture")
+        backend = FixtureBackend(path=FIXTURE_PATH)
+    else:
+        raise ValueError(f"Unknown FDA_DATA_BACKEND '{kind}'; expected 'api', 'local' or 'fixture'")
+    if not CACHE_ENABLED:
+        return backend
+    return CachedBackend(backend, ResponseCache(
+        max_entries=CACHE_MAX_ENTRIES,
+        endpoint_ttls={ENFORCEMENT: CACHE_TTL_RECALL, EVENT: CACHE_TTL_ADVERSE_EVENT},
+        count_ttl=CACHE_TTL_COUNT,
+        compact=CACHE_COMPACT_RECORDS,
+        keep_raw=CACHE_KEEP_RAW,
+    ))
+
+default_backend = create_backend()
+
+fuzzy_index = FuzzyIndex() if FUZZY_ENABLED else None
+
+# Recall profiles of every firm in the local index, kept current as the index changes
+firm_profiles = FirmProfiles()
+
+tool_profiler = ToolProfiler(
+    directory=PROFILE_DIR,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    keep=PROFILE_KEEP,
+    min_seconds=PROFILE_MIN_SECONDS,
+)
+
+async def load_fuzzy_index() -> int:
+    """
+    Indexes the recalls in the local index file (if there is one) in the fuzzy index; returns the number added.
+
+    Loads every recall the first time, then only the recalls written since.
+    """
+    if fuzzy_index is None or not os.path.exists(LOCAL_INDEX_PATH):
+        return 0
+
+    def load() -> int:
+        index = LocalIndex(LOCAL_INDEX_PATH)
+        try:
+            return fuzzy_index.refresh(index)
+        finally:
+            index.close()
+
+    return await asyncio.to_thread(load)
+
+async def keep_fuzzy_index_current() -> None:
+    """Loads the fuzzy index, then indexes the recalls synced since every FDA_INDEX_REFRESH_INTERVAL seconds."""
+    await load_fuzzy_index()
+    if INDEX_REFRESH_INTERVAL <= 0:
+        return
+    while True:
+        await asyncio.sleep(INDEX_REFRESH_INTERVAL)
+        try:
+            await load_fuzzy_index()
+        except Exception:
+            # A failed refresh leaves the index as it was; try again next time
+            pass
+
+async def load_firm_profiles() -> int:
+    """Builds the firm profiles from the local index, if it is the data backend; returns the number of recalls added."""
+    if DATA_BACKEND != "local" or not os.path.exists(LOCAL_INDEX_PATH):
+        return 0
+
+    def load() -> int:
+        index = LocalIndex(LOCAL_INDEX_PATH)
+        try:
+            return firm_profiles.refresh(index)
+        finally:
+            index.close()
+
+    return await asyncio.to_thread(load)
+
+def start_sync() -> Optional["asyncio.Task[None]"]:
+    """Starts the periodic recall sync into the local index, if FDA_SYNC_INTERVAL is set and the backend is local."""
+    if DATA_BACKEND != "local" or SYNC_INTERVAL <= 0:
+        return None
+
+    # The cached backend of every process, this one or an HTTP worker, notices the index changed and drops
+    # its cached results, and the firm profiles apply the changed recalls on their next lookup
+    source = OpenFDABackend(api_client, urls={ENFORCEMENT: RECALL_API_URL})
+    return asyncio.ensure_future(
+        periodic_sync(LOCAL_INDEX_PATH, source, SYNC_INTERVAL, overlap_days=SYNC_OVERLAP_DAYS)
+    )
+
+def start_metrics_log() -> Optional["asyncio.Task[None]"]:
+    """Starts logging the metrics every FDA_METRICS_LOG_INTERVAL seconds, if it is set."""
+    if METRICS_LOG_INTERVAL <= 0:
+        return None
+    return asyncio.ensure_future(log_periodically(metrics, METRICS_LOG_INTERVAL))
+
+def register_food_tools(
+    mcp: FastMCP,
+    backend: Optional[DataBackend] = None,
+    fuzzy: Optional[FuzzyIndex] = None,
+    profiler: Optional[ToolProfiler] = None,
+    firms: Optional[FirmProfiles] = None,
+):
+    """
+    Registers the food safety tools, answering from `backend` (the configured default if omitted).
+
+    Product searches correct typos with `fuzzy`, defaulting to the shared fuzzy index.
+    Sampled tool calls are profiled by `profiler`, defaulting to the shared one.
+    Firm profiles of a local index are kept in `firms`, defaulting to the shared
+    profiles for the default backend and to new ones for any other.
+    """
+    if firms is None:
+        firms = firm_profiles if backend is None or backend is default_backend else FirmProfiles()
+    if backend is None:
+        backend = default_backend
+    if fuzzy is None:
+        fuzzy = fuzzy_index
+    if profiler is None:
+        profiler = tool_profiler
+    # Columnar copy of the local index for the trend tool, rebuilt after the index changes
+    recall_columns = RecallColumnStore()
+
+    def tool() -> Callable[[Callable[..., Any]], Any]:
+        """Registers a tool on `mcp` whose calls are timed in `metrics` and sampled by `profiler`."""
+        return lambda fn: mcp.tool()(profiler.profile_tool(metrics.instrument_tool(fn)))
+
+    async def search_product_phrase(text: str, field: str, **search_args: Any) -> Tuple[ApiResult, str]:
+        """
+        Searches recalls for the phrase `text` in `field`, correcting typos with the fuzzy index.
+
+        A complete fuzzy index corrects the phrase before querying; otherwise the
+        exact phrase is tried first and a corrected one only if it finds nothing.
+
+        Returns:
+            The (data, error_message) tuple and the phrase actually searched.
+        """
+        phrase = fuzzy.resolve(text) if fuzzy is not None and fuzzy.complete else text
+        data, error = await backend.search(ENFORCEMENT, query=match_phrase(field, phrase), **search_args)
+        no_match = is_not_found(error) or (not error and not data.get("results"))
+        if no_match and fuzzy is not None and not fuzzy.complete:
+            corrected = fuzzy.resolve(text)
+            if corrected != phrase:
+                phrase = corrected
+                data, error = await backend.search(ENFORCEMENT, query=match_phrase(field, phrase), **search_args)
+        if data and fuzzy is not None:
+            fuzzy.add_recalls(data.get("results", []))
+        return (data, error), phrase
+
+    def corrected_note(text: str, phrase: str) -> str:
+        return f"🔎 No exact match for '{text}'; showing results for '{phrase}'.\n\n" if phrase != text else ""
+
+    async def recall_report(
+        text: str,
+        output_format: str,
+        fields: Optional[List[str]],
+        markdown: Callable[[RecallSearchResult, str], str],
+    ) -> str:
+        """Fetches the ten most recent recalls whose description matches `text` and renders them."""
+        invalid = formatters.check_output(output_format, fields, Recall)
+        if invalid:
+            return invalid
+        found, phrase = await search_product_phrase(
+            text, 'product_description', sort='recall_initiation_date:desc', limit=10,
+        )
+        data, error = empty_if_not_found(found)
         if error:
             return error
+        results = data.get("results", [])
+        result = RecallSearchResult(
+            query=match_phrase('product_description', phrase),
+            total=data.get("meta", {}).get("results", {}).get("total", len(results)),
+            recalls=[Recall.model_validate(r) for r in results],
+        )
+        return formatters.render(
+            result, output_format, fields, lambda result: corrected_note(text, phrase) + markdown(result, phrase)
+        )
 
-        if data.get("results"):
-            recall = data["results"][0]
-            reason = recall.get('reason_for_recall', 'N/A')
-            company = recall.get('recalling_firm', 'N/A')
-            return f"Found a recall for '{product_name}': Reason - {reason}, Company - {company}."
-        else:
-            return f"No recalls found for '{product_name}'."
+    @tool()
+    async def search_recalls_by_product_description(
+        query: str,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Searches for food recalls by matching a query against the product description with detailed analysis.
 
-    @mcp.tool()
-    async def search_recalls_by_classification(classification: str) -> str:
-        """Searches for food recalls by a specific classification (e.g., 'Class I')."""
-        search_query = f'classification:"{classification}"'
-        
-        params = {
-            'search': search_query,
-            'limit': 5
-        }
-        
-        data, error = await api_client.make_request(RECALL_API_URL, params=params)
+        Set output_format to 'json' for compact structured results, optionally limited to the recall `fields` listed.
+        """
+        return await recall_report(
+            query,
+            output_format,
+            fields,
+            lambda result, phrase: recall_analysis_report(result.recalls, PRODUCT_DESCRIPTION_TEMPLATE, phrase),
+        )
+
+    @tool()
+    async def search_recalls_by_product_type(
+        product_type: str,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Searches for recalls where the product description contains a product type with detailed analysis.
+
+        Set output_format to 'json' for compact structured results, optionally limited to the recall `fields` listed.
+        """
+        return await recall_report(
+            product_type,
+            output_format,
+            fields,
+            lambda result, phrase: recall_analysis_report(result.recalls, PRODUCT_TYPE_TEMPLATE, phrase),
+        )
+
+    @tool()
+    async def search_recalls_by_specific_product(
+        product_name: str,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Checks for any ongoing recalls for a single, specific food product.
+
+        Set output_format to 'json' for compact structured results, optionally limited to the recall `fields` listed.
+        """
+        invalid = formatters.check_output(output_format, fields, Recall)
+        if invalid:
+            return invalid
+        found, phrase = await search_product_phrase(product_name, 'product_description', limit=1)
+        data, error = empty_if_not_found(found)
         if error:
             return error
 
         results = data.get("results", [])
-        if not results:
-            return f"No food recalls found for classification '{classification}'."
-
-        formatted_results = [
-            (
-                f"- Product: {r.get('product_description', 'N/A')}\n"
-                f"  Reason: {r.get('reason_for_recall', 'N/A')}\n"
-                f"  Company: {r.get('recalling_firm', 'N/A')}\n"
-                f"  Classification: {r.get('classification', 'N/A')}"
+        result = RecallSearchResult(
+            query=match_phrase('product_description', phrase),
+            total=data.get("meta", {}).get("results", {}).get("total", len(results)),
+            recalls=[Recall.model_validate(r) for r in results],
+        )
+
+        def markdown(result: RecallSearchResult) -> str:
+            if not result.recalls:
+                return f"No recalls found for '{product_name}'."
+            recall = result.recalls[0]
+            return corrected_note(product_name, phrase) + (
+                f"Found a recall for '{phrase}': "
+                f"Reason - {recall.reason_for_recall or 'N/A'}, Company - {recall.recalling_firm or 'N/A'}."
             )
-            for r in results
-        ]
-        
-        return f"Found recalls for classification '{classification}':\n\n" + "\n\n".join(formatted_results)
 
-    @mcp.tool()
-    async def search_recalls_by_code_info(code_info: str) -> str:
-        """Searches for food recalls by a specific code info (lot codes, batch numbers, etc.)."""
-        # Clean the code info to remove any extra characters and ensure proper encoding
-        search_query = f'code_info:"{code_info}"'
-        
-        params = {
-            'search': search_query,
-            'limit': 5
+        return formatters.render(result, output_format, fields, markdown)
+
+    @tool()
+    async def suggest_recall_search_terms(query: str, limit: int = 5) -> Dict[str, Any]:
+        """Suggests correctly spelt product words and recalling firm names close to a possibly misspelt query."""
+        if fuzzy is None:
+            return {"error": "Fuzzy matching is disabled (FDA_FUZZY_MATCHING=false)."}
+        return fuzzy.suggest(query, limit=limit)
+
+    async def run_batch_lookup(field: str, items: List[str]) -> Dict[str, Any]:
+        if len(items) > BATCH_MAX_ITEMS:
+            return {"error": f"Too many items: {len(items)} (maximum is {BATCH_MAX_ITEMS})", "results": []}
+        results = await batch_lookup(
+            backend,
+            ENFORCEMENT,
+            field,
+            items,
+            chunk_size=BATCH_CHUNK_SIZE,
+            concurrency=BATCH_CONCURRENCY,
+        )
+        return {
+            "checked": len(results),
+            "recalled": sum(1 for r in results if r["recalled"]),
+            "errors": sum(1 for r in results if r["error"]),
+            "results": results,
         }
-        
-        data, error = await api_client.make_request(RECALL_API_URL, params=params)
-        if error:
-            return error
 
-        results = data.get("results", [])
-        if not results:
-            return f"No food recalls found containing code info '{code_info}'."
-
-        formatted_results = [
-            (
-                f"- Product: {r.get('product_description', 'N/A')}\n"
-                f"  Reason: {r.get('reason_for_recall', 'N/A')}\n"
-                f"  Company: {r.get('recalling_firm', 'N/A')}\n"
-                f"  Classification: {r.get('classification', 'N/A')}\n"
-                f"  Code Info: {r.get('code_info', 'N/A')}"
-            )
-            for r in results
-        ]
-        
-        return f"Found recalls containing code info '{code_info}':\n\n" + "\n\n".join(formatted_results)
+    @tool()
+    async def search_recalls_by_specific_products(product_names: List[str]) -> Dict[str, Any]:
+        """Checks many specific food products for recalls in one call and returns a per-product result."""
+        return await run_batch_lookup('product_description', product_names)
+
+    async def stream_report(
+        dataset: str,
+        query: str,
+        sort: Optional[str],
+        max_results: int,
+        output_format: str,
+        fields: Optional[List[str]],
+        empty_message: str,
+        header: Callable[[int, int], str],
+        format_record: Callable[[Any], str],
+    ) -> str:
+        """Pages through matching records, rendering each page as it arrives so only the rendered text is kept."""
+        result_model, record_model = (
+            (RecallSearchResult, Recall) if dataset == ENFORCEMENT else (AdverseEventSearchResult, AdverseEvent)
+        )
+        invalid = formatters.check_output(output_format, fields, record_model)
+        if invalid:
+            return invalid
+        if not 1 <= max_results <= MAX_RESULTS:
+            return f"max_results must be between 1 and {MAX_RESULTS}."
+
+        stream = formatters.RecordStream(output_format, fields, format_record)
+        total = 0
+        truncated = None
+        async for page in backend.iter_pages(dataset, query, sort, max_results=max_results, page_size=PAGE_SIZE):
+            data, error = empty_if_not_found(page)
+            if error:
+                if not stream.count:
+                    return error
+                truncated = error
+                break
+            results = data.get("results", [])
+            if not stream.count:
+                if not results:
+                    break
+                total = data.get("meta", {}).get("results", {}).get("total", len(results))
+            stream.add(record_model.model_validate(r) for r in results)
+
+        result = result_model(query=query, total=total, error=truncated)
+        return stream.render(result, empty_message, header(total, min(total, max_results)))
+
+    def showing(total: int, shown: int) -> str:
+        return f" (showing {shown})" if shown < total else ""
+
+    @tool()
+    async def search_recalls_by_classification(
+        classification: str,
+        max_results: int = 5,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Searches for food recalls by a specific classification (e.g., 'Class I').
 
-    @mcp.tool()
-    async def search_recalls_by_date(days: int = 30) -> str:
-        """Searches for food recalls initiated in the last N days."""
+        Set output_format to 'json' for compact structured results, optionally limited to the recall `fields` listed.
+        """
+        return await stream_report(
+            ENFORCEMENT,
+            match_phrase('classification', classification),
+            None,
+            max_results,
+            output_format,
+            fields,
+            f"No food recalls found for classification '{classification}'.",
+            lambda total, shown: f"Found recalls for classification '{classification}'{showing(total, shown)}:",
+            formatters.recall_item,
+        )
+
+    @tool()
+    async def search_recalls_by_code_info(
+        code_info: str,
+        max_results: int = 5,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Searches for food recalls by a specific code info (lot codes, batch numbers, etc.).
+
+        Set output_format to 'json' for compact structured results, optionally limited to the recall `fields` listed.
+        """
+        return await stream_report(
+            ENFORCEMENT,
+            match_phrase('code_info', code_info),
+            None,
+            max_results,
+            output_format,
+            fields,
+            f"No food recalls found containing code info '{code_info}'.",
+            lambda total, shown: f"Found recalls containing code info '{code_info}'{showing(total, shown)}:",
+            lambda r: formatters.recall_item(r, include_code_info=True),
+        )
+
+    @tool()
+    async def search_recalls_by_code_infos(code_infos: List[str]) -> Dict[str, Any]:
+        """Checks many lot codes or batch numbers for recalls in one call and returns a per-code result."""
+        return await run_batch_lookup('code_info', code_infos)
+
+    @tool()
+    async def search_recalls_by_date(
+        days: int = 30,
+        max_results: int = 10,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Searches for food recalls initiated in the last N days.
+
+        Set output_format to 'json' for compact structured results, optionally limited to the recall `fields` listed.
+        """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
         start_date_str = start_date.strftime('%Y%m%d')
         end_date_str = end_date.strftime('%Y%m%d')
 
-        search_query = f"recall_initiation_date:[{start_date_str} TO {end_date_str}]"
-        
-        params = {
-            'search': search_query,
-            'sort': 'recall_initiation_date:desc',
-            'limit': 10
-        }
+        return await stream_report(
+            ENFORCEMENT,
+            match_range('recall_initiation_date', start_date_str, end_date_str),
+            'recall_initiation_date:desc',
+            max_results,
+            output_format,
+            fields,
+            f"No food recalls found in the last {days} days.",
+            lambda total, shown: f"Found {total} food recalls in the last {days} days{showing(total, shown)}:",
+            formatters.dated_recall_item,
+        )
 
-        data, error = await api_client.make_request(RECALL_API_URL, params=params)
-        if error:
-            return error
+    @tool()
+    async def search_adverse_events_by_product(
+        product_name: str,
+        max_results: int = 5,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Searches for adverse event reports related to a specific food product.
 
-        results = data.get("results", [])
-        if not results:
-            return f"No food recalls found in the last {days} days."
-
-        formatted_results = [
-            (
-                f"- Product: {r.get('product_description', 'N/A')} on {r.get('recall_initiation_date', 'N/A')}\n"
-                f"  Reason: {r.get('reason_for_recall', 'N/A')}\n"
-                f"  Company: {r.get('recalling_firm', 'N/A')}"
+        Set output_format to 'json' for compact structured results, optionally limited to the event `fields` listed.
+        """
+        return await stream_report(
+            EVENT,
+            match_phrase('products.name_brand', product_name),
+            None,
+            max_results,
+            output_format,
+            fields,
+            f"No adverse event reports found for '{product_name}'.",
+            lambda total, shown: f"Found {total} adverse event reports for '{product_name}'{showing(total, shown)}:",
+            formatters.adverse_event_item,
+        )
+
+    @tool()
+    async def get_symptom_summary_for_product(
+        product_name: str,
+        output_format: str = "markdown",
+        fields: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Gets detailed symptom analysis and adverse event information for a specific food product.
+
+        Set output_format to 'json' for compact structured results, optionally limited to the case `fields` listed.
+        """
+        invalid = formatters.check_output(output_format, fields, AdverseEvent)
+        if invalid:
+            return invalid
+        search_query = match_phrase('products.name_brand', product_name)
+        
+        # The symptom counts and the case details are independent, so fetch them concurrently
+        responses = await gather_queries({
+            'counts': backend.count(EVENT, 'reactions.exact', query=search_query),
+            'details': backend.search(EVENT, query=search_query, sort='date_created:desc', limit=10),
+        }, timeout=FANOUT_TIMEOUT)
+        count_data, count_error = responses['counts']
+        detail_data, detail_error = responses['details']
+
+        # Only give up if neither leg succeeded; otherwise report what we have
+        if count_error and detail_error:
+            return count_error
+
+        symptoms = [SymptomCount.model_validate(item) for item in (count_data or {}).get("results", [])]
+        warnings = []
+        if count_error and not is_not_found(count_error):
+            warnings.append(f"Symptom summary unavailable: {count_error}")
+        if detail_error and not is_not_found(detail_error):
+            warnings.append(f"Case details unavailable: {detail_error}")
+
+        summary = SymptomSummary(
+            product_name=product_name,
+            total_reports=sum(item.count for item in symptoms),
+            symptoms=symptoms,
+            cases=[AdverseEvent.model_validate(r) for r in (detail_data or {}).get("results", [])],
+            warnings=warnings,
+        )
+        return formatters.render(summary, output_format, fields, formatters.symptom_summary_report)
+
+    def parse_window(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Dict[str, str], Optional[str]]:
+        """Normalizes the optional window dates; returns them with an error message if either is invalid."""
+        dates = {}
+        for name, value in (("start_date", start_date), ("end_date", end_date)):
+            if value:
+                dates[name] = parse_date(value)
+                if dates[name] is None:
+                    return dates, f"Invalid {name} '{value}'; expected YYYYMMDD or YYYY-MM-DD."
+        return dates, None
+
+    def describe_window(dates: Dict[str, str], *filters: Optional[str]) -> str:
+        """Describes which recalls were counted, for the report headings."""
+        quoted = [f"'{value}'" for value in filters if value]
+        return " ".join(
+            part for part in (
+                f"for {', '.join(quoted)}" if quoted else "",
+                f"from {dates.get('start_date', 'the start')} to {dates.get('end_date', 'today')}" if dates else "",
+            ) if part
+        ) or "across all recalls"
+
+    @tool()
+    async def get_recall_counts(
+        group_by: str = "classification",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        classification: Optional[str] = None,
+        firm: Optional[str] = None,
+        product: Optional[str] = None,
+        limit: int = 25,
+        output_format: str = "markdown",
+    ) -> str:
+        """
+        Counts food recalls grouped by 'classification', 'firm', 'state' or 'month', computed by openFDA in one request.
+
+        Use this for totals and trends rather than paging through recalls. Optionally restrict the count to recalls
+        initiated between start_date and end_date (YYYYMMDD or YYYY-MM-DD), to one classification (e.g. 'Class I'),
+        to one recalling firm, or to products whose description contains `product`. `limit` caps the number of
+        firms or states listed. Set output_format to 'json' for compact structured results.
+        """
+        invalid = formatters.check_output(output_format, None, CountBucket)
+        if invalid:
+            return invalid
+        if group_by not in RECALL_COUNT_FIELDS:
+            return f"Unknown group_by '{group_by}'; expected one of: {', '.join(RECALL_COUNT_FIELDS)}."
+        if not 1 <= limit <= MAX_BUCKETS:
+            return f"limit must be between 1 and {MAX_BUCKETS}."
+        dates, invalid = parse_window(start_date, end_date)
+        if invalid:
+            return invalid
+
+        query = recall_count_query(
+            dates.get("start_date"), dates.get("end_date"), classification=classification, firm=firm, product=product,
+        )
+        counted = await count_recalls(backend, group_by, query, limit)
+        if counted["error"]:
+            return counted["error"]
+        buckets = [CountBucket.model_validate(bucket) for bucket in counted["buckets"]]
+        counts = RecallCounts(
+            group_by=group_by,
+            query=query,
+            total=sum(bucket.count for bucket in buckets),
+            buckets=buckets,
+        )
+
+        description = describe_window(dates, classification, firm, product)
+        return formatters.render(
+            counts, output_format, None, lambda counts: formatters.recall_counts_report(counts, description)
+        )
+
+    def local_index() -> Optional[LocalIndex]:
+        """The local index behind `backend`, or None when the tools query openFDA live."""
+        inner = backend.inner if isinstance(backend, CachedBackend) else backend
+        return inner.index if isinstance(inner, LocalIndexBackend) else None
+
+    @tool()
+    async def get_recall_trends(
+        bucket: str = "month",
+        by: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        classification: Optional[str] = None,
+        firm: Optional[str] = None,
+        state: Optional[str] = None,
+        top_n: int = 5,
+        output_format: str = "markdown",
+    ) -> str:
+        """
+        Counts food recalls per 'month', 'quarter' or 'year', optionally split by 'classification', 'firm', 'state'
+        or 'status', across every recall in the local index.
+
+        Optionally restrict the trend to recalls initiated between start_date and end_date (YYYYMMDD or YYYY-MM-DD)
+        and to an exact classification (e.g. 'Class I'), recalling firm name or state code. When split, the top_n
+        largest series are shown and the rest are combined as 'Other'. Set output_format to 'json' for compact
+        structured results. Requires FDA_DATA_BACKEND=local.
+        """
+        invalid = formatters.check_output(output_format, None, TrendSeries)
+        if invalid:
+            return invalid
+        if bucket not in TIME_BUCKETS:
+            return f"Unknown bucket '{bucket}'; expected one of: {', '.join(TIME_BUCKETS)}."
+        if by is not None and by not in CATEGORY_COLUMNS:
+            return f"Unknown by '{by}'; expected one of: {', '.join(CATEGORY_COLUMNS)}."
+        if top_n < 1:
+            return "top_n must be at least 1."
+        dates, invalid = parse_window(start_date, end_date)
+        if invalid:
+            return invalid
+
+        try:
+            index = local_index()
+        except Exception as e:
+            return f"Error opening the local index: {e}"
+        if index is None:
+            return "Recall trends are computed from the local index; set FDA_DATA_BACKEND=local to use them."
+
+        def compute() -> Tuple[List[str], Dict[str, List[int]]]:
+            columns = recall_columns.get(index)
+            selection = columns.select(
+                dates.get("start_date"), dates.get("end_date"),
+                classification=classification, firm=firm, state=state,
             )
-            for r in results
-        ]
-        
-        return f"Found {len(results)} food recalls in the last {days} days:\n\n" + "\n\n".join(formatted_results)
+            return columns.time_series(bucket, by, selection)
 
-    @mcp.tool()
-    async def search_adverse_events_by_product(product_name: str) -> str:
-        """Searches for adverse event reports related to a specific food product."""
-        search_query = f'products.name_brand:"{product_name}"'
-        
-        params = {
-            'search': search_query,
-            'limit': 5
-        }
-        
-        data, error = await api_client.make_request(ADVERSE_EVENT_API_URL, params=params)
+        periods, counts = await asyncio.to_thread(compute)
+        series = sorted(
+            (TrendSeries(term=term, total=sum(values), counts=values) for term, values in counts.items()),
+            key=lambda series: -series.total,
+        )
+        if len(series) > top_n:
+            rest = series[top_n:]
+            other = [sum(values) for values in zip(*(s.counts for s in rest))]
+            series = series[:top_n] + [TrendSeries(term="Other", total=sum(other), counts=other)]
+        trends = RecallTrends(
+            bucket=bucket,
+            by=by,
+            total=sum(s.total for s in series),
+            periods=periods,
+            series=series,
+        )
+        description = describe_window(dates, classification, firm, state)
+        return formatters.render(
+            trends, output_format, None, lambda trends: formatters.recall_trends_report(trends, description)
+        )
+
+    async def fetch_firm_profile(firm: str) -> Tuple[Optional[FirmProfile], List[str], Optional[str]]:
+        """
+        Builds a firm's profile from openFDA `count=` queries, which the response cache keeps.
+
+        The first query counts recalls per firm name matching the words of `firm`.
+        The names with the same `firm_key` are then counted by each of
+        `PROFILE_COUNT_FIELDS` concurrently, so a profile costs a handful of small
+        requests however many recalls the firm has.
+
+        Returns:
+            The profile (None if no firm name matched), the firm names openFDA
+            matched, most recalls first, and an error message if a count failed.
+        """
+        key = firm_key(firm)
+        data, error = await backend.count(
+            ENFORCEMENT, 'recalling_firm.exact', query=match_phrase('recalling_firm', key), limit=MAX_BUCKETS
+        )
         if error:
-            return error
+            return None, [], None if is_not_found(error) else error
+        names = {str(bucket.get("term")): bucket.get("count", 0) for bucket in data.get("results", [])}
+        suggestions = sorted(names, key=names.get, reverse=True)
+        names = {name: count for name, count in names.items() if firm_key(name) == key}
+        if not names:
+            return None, suggestions, None
 
-        results = data.get("results", [])
-        if not results:
-            return f"No adverse event reports found for '{product_name}'."
-
-        formatted_results = [
-            (
-                f"- Report Date: {r.get('date_created', 'N/A')}\n"
-                f"  Symptoms: {', '.join(r.get('reactions', ['N/A']))}\n"
-                f"  Outcome: {', '.join(r.get('outcomes', ['N/A']))}"
-            )
-            for r in results
-        ]
-        
-        return f"Found {len(results)} adverse event reports for '{product_name}':\n\n" + "\n\n".join(formatted_results)
+        query = any_of(*(match_phrase('recalling_firm.exact', name) for name in names))
+        responses = await gather_queries({
+            counter: backend.count(ENFORCEMENT, field, query=query, limit=None if counter == "dates" else MAX_BUCKETS)
+            for counter, field in PROFILE_COUNT_FIELDS.items()
+        }, timeout=FANOUT_TIMEOUT)
+        counts = {}
+        errors = []
+        for counter, (data, error) in responses.items():
+            if error and not is_not_found(error):
+                errors.append(f"{counter}: {error}")
+            counts[counter] = (data or {}).get("results", [])
+        return profile_from_counts(key, names, counts), suggestions, "; ".join(errors) or None
 
-    @mcp.tool()
-    async def get_symptom_summary_for_product(product_name: str) -> str:
-        """Gets detailed symptom analysis and adverse event information for a specific food product."""
-        search_query = f'products.name_brand:"{product_name}"'
-        
-        # First, get symptom count summary
-        count_params = {
-            'search': search_query,
-            'count': 'reactions.exact'
-        }
-        
-        count_data, count_error = await api_client.make_request(ADVERSE_EVENT_API_URL, params=count_params)
-        if count_error:
-            return count_error
+    def risk_profile(profile: FirmProfile, top_n: int, warning: Optional[str]) -> FirmRiskProfile:
+        def buckets(items: Any) -> List[CountBucket]:
+            return [CountBucket(term=term, count=count) for term, count in items]
 
-        count_results = count_data.get("results", [])
-        
-        # Then, get detailed case information
-        detail_params = {
-            'search': search_query,
-            'limit': 10,
-            'sort': 'date_created:desc'
-        }
-        
-        detail_data, detail_error = await api_client.make_request(ADVERSE_EVENT_API_URL, params=detail_params)
-        if detail_error:
-            return detail_error
+        return FirmRiskProfile(
+            firm=profile.name,
+            other_names=[name for name in profile.names if name != profile.name],
+            total=profile.total,
+            events=len(profile.events),
+            first_recall_date=profile.first_date,
+            last_recall_date=profile.last_date,
+            recent=profile.recalls_since(one_year_ago()),
+            classifications=buckets(sorted(profile.classifications.items())),
+            statuses=buckets(profile.statuses.most_common()),
+            years=buckets(profile.by_year()),
+            reasons=buckets(profile.reasons.most_common(top_n)),
+            states=buckets(profile.states.most_common(top_n)),
+            warning=warning,
+        )
 
-        detail_results = detail_data.get("results", [])
-        
-        if not count_results and not detail_results:
-            return f"No reported symptoms or adverse events found for '{product_name}'."
+    @tool()
+    async def get_firm_risk_profile(firm: str, top_n: int = 5, output_format: str = "markdown") -> str:
+        """
+        Gets the recall history of a recalling firm: recalls by classification, status and year, first and most
+        recent recall dates, the top_n most common recall reasons and distribution states.
 
-        # Build comprehensive report
-        report_parts = []
-        
-        # 1. Symptom Summary
-        if count_results:
-            report_parts.append(f"📊 **Symptom Summary for '{product_name}'**")
-            report_parts.append("=" * 50)
-            
-            symptoms = []
-            total_reports = sum(item['count'] for item in count_results)
-            
-            for item in count_results[:10]:  # Top 10 symptoms
-                percentage = (item['count'] / total_reports * 100) if total_reports > 0 else 0
-                symptoms.append(f"• {item['term']}: {item['count']} reports ({percentage:.1f}%)")
-            
-            report_parts.append(f"Total adverse event reports: {total_reports}")
-            report_parts.append("\n**Most Common Symptoms:**")
-            report_parts.extend(symptoms)
-        
-        # 2. Detailed Case Analysis
-        if detail_results:
-            report_parts.append(f"\n📋 **Recent Case Details**")
-            report_parts.append("=" * 50)
-            
-            for i, case in enumerate(detail_results[:5], 1):  # Top 5 cases
-                report_parts.append(f"\n**Case {i}:**")
-                
-                # Basic case info
-                report_date = case.get('date_created', 'N/A')
-                report_parts.append(f"📅 Report Date: {report_date}")
-                
-                # Patient demographics
-                patient = case.get('patient', {})
-                age = patient.get('patientonsetage', 'N/A')
-                sex = patient.get('patientsex', 'N/A')
-                if age != 'N/A' or sex != 'N/A':
-                    report_parts.append(f"👤 Patient: {age} years old, {sex}")
-                
-                # Symptoms
-                reactions = case.get('reactions', [])
-                if reactions:
-                    report_parts.append(f"🩺 Symptoms: {', '.join(reactions[:5])}")
-                    if len(reactions) > 5:
-                        report_parts.append(f"   ... and {len(reactions) - 5} more symptoms")
-                
-                # Outcomes
-                outcomes = case.get('outcomes', [])
-                if outcomes:
-                    report_parts.append(f"📈 Outcomes: {', '.join(outcomes)}")
-                
-                # Seriousness
-                serious = case.get('serious', [])
-                if serious:
-                    report_parts.append(f"⚠️ Serious: {', '.join(serious)}")
-                
-                # Product details
-                products = case.get('products', [])
-                if products:
-                    product = products[0]
-                    brand_name = product.get('name_brand', 'N/A')
-                    generic_name = product.get('name_generic', 'N/A')
-                    if brand_name != 'N/A' or generic_name != 'N/A':
-                        report_parts.append(f"🏷️ Product: {brand_name} ({generic_name})")
-        
-        # 3. Safety Insights
-        if count_results and detail_results:
-            report_parts.append(f"\n🔍 **Safety Insights**")
-            report_parts.append("=" * 50)
-            
-            # Calculate severity indicators
-            serious_cases = sum(1 for case in detail_results if case.get('serious'))
-            total_cases = len(detail_results)
-            severity_rate = (serious_cases / total_cases * 100) if total_cases > 0 else 0
-            
-            report_parts.append(f"• Serious cases: {serious_cases}/{total_cases} ({severity_rate:.1f}%)")
-            
-            # Most common outcomes
-            all_outcomes = []
-            for case in detail_results:
-                all_outcomes.extend(case.get('outcomes', []))
-            
-            if all_outcomes:
-                outcome_counts = {}
-                for outcome in all_outcomes:
-                    outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
-                
-                top_outcomes = sorted(outcome_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-                report_parts.append(f"• Most common outcomes: {', '.join([f'{outcome} ({count})' for outcome, count in top_outcomes])}")
-            
-            # Timeline analysis
-            if detail_results:
-                dates = [case.get('date_created') for case in detail_results if case.get('date_created')]
-                if dates:
-                    report_parts.append(f"• Recent reports: {len(dates)} cases in available data")
-        
-        return "\n".join(report_parts) 
\ No newline at end of file
+        Firm names are matched without regard to case, punctuation or legal form ('Inc.', 'LLC'). With
+        FDA_DATA_BACKEND=local the profile is precomputed for every firm in the local index, so a lookup is a
+        dictionary access; otherwise it is built from a few cached openFDA count queries on the firm's recalls.
+        Set output_format to 'json' for compact structured results.
+        """
+        invalid = formatters.check_output(output_format, None, CountBucket)
+        if invalid:
+            return invalid
+        if top_n < 1:
+            return "top_n must be at least 1."
+        if not firm_key(firm):
+            return "firm must contain at least one letter or digit."
+
+        try:
+            index = local_index()
+        except Exception as e:
+            return f"Error opening the local index: {e}"
+        warning = None
+        if index is not None:
+            # Picks up the recalls the sync has written since the last call
+            await asyncio.to_thread(firms.refresh, index)
+            profile = firms.get(firm)
+            suggestions = firms.suggest(firm) if profile is None else []
+        else:
+            profile, suggestions, warning = await fetch_firm_profile(firm)
+            if warning and profile is None:
+                return warning
+
+        if profile is None:
+            message = f"No food recalls found for a firm named '{firm}'."
+            if suggestions:
+                message += f" Similar firms: {'; '.join(suggestions[:5])}."
+            return message
+        if warning:
+            warning = f"Profile built without some of its counts: {warning}"
+        result = risk_profile(profile, top_n, warning)
+        return formatters.render(result, output_format, None, formatters.firm_profile_report)
@@ -1,15 +1,226 @@
+import argparse
+import asyncio
+import functools
+import importlib
+import os
+import threading
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from safetyscore.tools.food import register_food_tools
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from safetyscore.metrics import metrics
+from safetyscore.resilience import RateLimiter
+
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+
+def env_flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+@functools.lru_cache(maxsize=None)
+def food_tools() -> ModuleType:
+    """
+    Imports the food tools, with the HTTP client, caches and backends they use, on first use.
+
+    Importing them takes longer than starting the server, so it waits until a
+    client lists or calls a tool, or until `serve_data` starts them in the
+    background. A .env file is loaded first so its settings apply; `main` has
+    already loaded it, but the `mcp` CLI imports this module without calling `main`.
+    """
+    load_dotenv()
+    return importlib.import_module("safetyscore.tools.food")
+
+class SafetySearch(FastMCP):
+    """A FastMCP server that registers its tools when a client first lists or calls them."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.tools_registered = False
+
+    def register_tools(self) -> None:
+        if not self.tools_registered:
+            # Register all the tools from their respective modules
+            food_tools().register_food_tools(self)
+            self.tools_registered = True
+
+    async def list_tools(self) -> List[Any]:
+        self.register_tools()
+        return await super().list_tools()
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Sequence[Any]:
+        self.register_tools()
+        return await super().call_tool(name, arguments)
+
+async def run_data_services() -> None:
+    """Opens the data backend (e.g. the openFDA connection pool) and runs the background tasks until cancelled."""
+    # Imported in a thread so the event loop answers `initialize` in the meantime
+    food = await asyncio.to_thread(food_tools)
+    async with food.default_backend:
+        # Keeps a local index up to date when FDA_SYNC_INTERVAL is set
+        sync_task = food.start_sync()
+        # Typo correction is at its best once it has seen every recall in the local index, synced ones included
+        fuzzy_task = asyncio.ensure_future(food.keep_fuzzy_index_current())
+        # Firm profiles are precomputed from the local index so lookups don't scan it
+        firms_task = asyncio.ensure_future(food.load_firm_profiles())
+        # Logs tool, upstream and cache metrics when FDA_METRICS_LOG_INTERVAL is set
+        metrics_task = food.start_metrics_log()
+        # `kill -USR1 <pid>` profiles the next tool calls without a restart
+        food.tool_profiler.install_signal_handler(food.PROFILE_TRIGGER_CALLS)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            tasks = [task for task in (sync_task, fuzzy_task, firms_task, metrics_task) if task is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+@asynccontextmanager
+async def serve_data() -> AsyncIterator[None]:
+    """Runs `run_data_services` in the background until exit, without delaying startup."""
+    services = asyncio.ensure_future(run_data_services())
+    try:
+        yield
+    finally:
+        services.cancel()
+        await asyncio.gather(services, return_exceptions=True)
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Opens the data backend on startup and closes it on shutdown (stdio serves a single session)."""
+    async with serve_data():
+        yield
+
+def create_server(**settings: Any) -> SafetySearch:
+    """Creates the SafetySearch MCP server; `settings` are FastMCP settings. Tools are registered on first use."""
+    return SafetySearch("SafetySearch", **settings)
 
 # Create the MCP server
-mcp = FastMCP("SafetySearch")
+mcp = create_server(lifespan=lifespan)
 
-# Register all the tools from their respective modules
-register_food_tools(mcp)
+async def health(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok")
 
-def main():
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+def create_http_app() -> Starlette:
+    """
+    Builds the ASGI app served by one HTTP worker process.
+
+    uvicorn calls this factory in every worker, so each worker opens its own
+    connection pool and cache. They stay open for the worker's lifetime; the
+    FastMCP lifespan would instead run once per MCP session. The transport and
+    session mode are read from MCP_TRANSPORT and MCP_STATELESS_HTTP, which
+    `main` sets for the workers it starts.
+    """
+    transport = os.getenv("MCP_TRANSPORT", "streamable-http")
+    server = create_server(stateless_http=env_flag("MCP_STATELESS_HTTP"))
+    app = server.sse_app() if transport == "sse" else server.streamable_http_app()
+
+    @asynccontextmanager
+    async def worker_lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with serve_data():
+            if transport == "sse":
+                yield
+            else:
+                async with server.session_manager.run():
+                    yield
+
+    app.router.lifespan_context = worker_lifespan
+    app.router.routes.append(Route("/healthz", health))
+    app.router.routes.append(Route("/metrics", prometheus_metrics))
+    return app
+
+def share_quota(workers: int) -> None:
+    """
+    Splits the openFDA rate and daily limits between `workers` processes, and this one if it runs the sync.
+
+    Each worker runs its own limiter, so without this the server as a whole
+    would send `workers` times the configured rate. Workers read the shares
+    from the environment they inherit; this process's client was built before
+    the split, so its limiter is replaced with the sync's share.
+    """
+    food = food_tools()
+    syncing = food.DATA_BACKEND == "local" and food.SYNC_INTERVAL > 0
+    shares = workers + 1 if syncing else workers
+    daily_limit = max(1, food.DAILY_LIMIT // shares) if food.DAILY_LIMIT > 0 else 0
+    if daily_limit:
+        os.environ["FDA_DAILY_LIMIT"] = str(daily_limit)
+    if food.RATE_LIMIT_PER_MINUTE > 0:
+        rate_per_minute = food.RATE_LIMIT_PER_MINUTE / shares
+        burst = max(1, food.RATE_LIMIT_BURST // shares)
+        os.environ["FDA_RATE_LIMIT_PER_MINUTE"] = str(rate_per_minute)
+        os.environ["FDA_RATE_LIMIT_BURST"] = str(burst)
+        food.api_client.rate_limiter = RateLimiter(
+            rate_per_minute=rate_per_minute, burst=burst, daily_limit=daily_limit
+        )
+
+def sync_in_background() -> None:
+    """Runs the local index sync (if FDA_SYNC_INTERVAL is set) in a thread of this process rather than in every worker."""
+
+    async def run() -> None:
+        task = food_tools().start_sync()
+        if task is not None:
+            await task
+
+    threading.Thread(target=asyncio.run, args=(run(),), name="safetysearch-sync", daemon=True).start()
+    os.environ["FDA_SYNC_INTERVAL"] = "0"
+
+def serve_http(args: argparse.Namespace) -> None:
+    """Serves the MCP server over streamable HTTP or SSE with uvicorn, in one or more worker processes."""
+    import uvicorn
+
+    stateless = args.stateless
+    if args.workers > 1:
+        if args.transport == "sse":
+            raise SystemExit(
+                "The SSE transport keeps each session in one process; use --transport streamable-http with several workers."
+            )
+        stateless = True
+        share_quota(args.workers)
+        sync_in_background()
+    os.environ["MCP_TRANSPORT"] = args.transport
+    os.environ["MCP_STATELESS_HTTP"] = "true" if stateless else "false"
+
+    uvicorn.run(
+        "server:create_http_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        limit_concurrency=args.max_concurrency or None,
+        backlog=int(os.getenv("MCP_BACKLOG", "2048")),
+        timeout_keep_alive=float(os.getenv("MCP_KEEPALIVE_TIMEOUT", "5")),
+        # Seconds open requests get to finish on shutdown before they are cancelled
+        timeout_graceful_shutdown=float(os.getenv("MCP_GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+    )
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the SafetySearch MCP server."""
-    mcp.run()
+    # Load environment variables from a .env file if it exists, before any settings are read
+    load_dotenv()
+
+    # Transport and HTTP serving settings; the options override the MCP_* variables of the same names
+    parser = argparse.ArgumentParser(description="Run the SafetySearch MCP server.")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.getenv("MCP_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", "1")), help="worker processes for the HTTP transports")
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("MCP_MAX_CONCURRENCY", "256")), help="connections per worker before answering 503; 0 for no limit")
+    # Stateless streamable HTTP needs no session affinity, so any worker can answer any request
+    parser.add_argument("--stateless", action="store_true", default=env_flag("MCP_STATELESS_HTTP"), help="stateless streamable HTTP (always on with several workers)")
+    args = parser.parse_args(argv)
+
+    if args.transport == "stdio":
+        mcp.run()
+    else:
+        serve_http(args)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
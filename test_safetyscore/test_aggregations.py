@@ -0,0 +1,98 @@
+"""
+Tests for the recall count tool built on openFDA count= queries.
+"""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.aggregations import fold_months, recall_count_query
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import ENFORCEMENT, FixtureBackend, OpenFDABackend
+from safetyscore.cache import ResponseCache
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+def get_tools(backend):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=backend)
+    return {name: tool.fn for name, tool in mcp._tool_manager._tools.items()}
+
+def test_fold_months_fills_gaps_between_months():
+    days = [
+        {"time": "20231130", "count": 2},
+        {"time": "20240102", "count": 1},
+        {"time": "20240131", "count": 4},
+    ]
+    assert fold_months(days) == [
+        {"term": "2023-11", "count": 2},
+        {"term": "2023-12", "count": 0},
+        {"term": "2024-01", "count": 5},
+    ]
+    assert fold_months([]) == []
+
+@pytest.mark.asyncio
+async def test_counts_come_from_the_fixture_backend():
+    tools = get_tools(FixtureBackend(path=FIXTURE_PATH))
+
+    report = await tools["get_recall_counts"](group_by="firm", product="ice cream")
+    assert "Recall counts by firm for 'ice cream'" in report
+    assert "• Example Creamery Inc.: 2 (100.0%)" in report
+
+    # Whole state codes, as written in the records
+    result = json.loads(await tools["get_recall_counts"](group_by="state", output_format="json"))
+    assert result["buckets"] == [{"term": "WI", "count": 2}, {"term": "CA", "count": 1}]
+
+    result = json.loads(await tools["get_recall_counts"](
+        group_by="month", start_date="2023-11-01", end_date="20240131", output_format="json",
+    ))
+    assert result["total"] == 2
+    assert result["buckets"] == [
+        {"term": "2023-11", "count": 1},
+        {"term": "2023-12", "count": 0},
+        {"term": "2024-01", "count": 1},
+    ]
+
+    assert await tools["get_recall_counts"](firm="Nobody") == "No food recalls found for 'Nobody'."
+    assert (await tools["get_recall_counts"](group_by="county")).startswith("Unknown group_by 'county'")
+    assert (await tools["get_recall_counts"](start_date="2024-02-30")).startswith("Invalid start_date")
+
+@pytest.mark.asyncio
+async def test_a_trend_costs_one_cached_count_request():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"results": [
+            {"time": "20240105", "count": 3},
+            {"time": "20240220", "count": 1},
+        ]})
+
+    client = ApiClient(transport=httpx.MockTransport(handler), cache=ResponseCache(max_entries=8, count_ttl=3600))
+    url = "https://fda.test/food/enforcement.json"
+    tools = get_tools(OpenFDABackend(client, urls={ENFORCEMENT: url}))
+
+    async with client:
+        first = await tools["get_recall_counts"](group_by="month", classification="Class I", start_date="20240101")
+        second = await tools["get_recall_counts"](group_by="month", classification="Class I", start_date="20240101")
+
+    assert first == second
+    assert "• 2024-01: 3 (75.0%)" in first
+    assert len(requests) == 1
+    assert dict(requests[0].url.params) == {
+        "search": recall_count_query("20240101", classification="Class I"),
+        "count": "recall_initiation_date",
+    }
+
+    async with client:
+        await tools["get_recall_counts"](group_by="state")
+    assert requests[-1].url.params["count"] == "state.exact"
@@ -0,0 +1,167 @@
+"""
+Tests for the shared openFDA ApiClient.
+These tests use an in-memory httpx transport, so they run without network access.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.api_client import ApiClient
+from safetyscore.cache import ResponseCache
+
+RECALL_URL = "https://api.fda.gov/food/enforcement.json"
+
+def make_transport(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.params.get("search") == "missing":
+            return httpx.Response(404, json={"error": {"code": "NOT_FOUND"}})
+        return httpx.Response(200, json={"results": [{"recalling_firm": "Acme"}]})
+    return httpx.MockTransport(handler)
+
+@pytest.mark.asyncio
+async def test_pool_is_shared_and_closed_by_last_user():
+    calls = []
+    client = ApiClient(transport=make_transport(calls))
+
+    async with client:
+        pool = client._client
+        async with client:
+            data, error = await client.make_request(RECALL_URL, {"search": "ice cream"})
+            assert error is None
+            assert data["results"][0]["recalling_firm"] == "Acme"
+        # The inner exit must not close the pool the outer user still holds
+        assert client.is_open
+        await client.make_request(RECALL_URL, {"search": "ice cream"})
+        assert client._client is pool
+
+    assert not client.is_open
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_http_errors_are_returned_as_messages():
+    client = ApiClient(transport=make_transport([]))
+    async with client:
+        data, error = await client.make_request(RECALL_URL, {"search": "missing"})
+    assert data is None
+    assert error == "Error fetching data from API: 404 Not Found"
+
+@pytest.mark.asyncio
+async def test_cached_responses_skip_upstream():
+    calls = []
+    client = ApiClient(transport=make_transport(calls), cache=ResponseCache(max_entries=8))
+    async with client:
+        first, _ = await client.make_request(RECALL_URL, {"search": "ice cream", "limit": 10})
+        second, _ = await client.make_request(RECALL_URL, {"limit": "10", "search": "ice cream"})
+        # Errors are never cached
+        await client.make_request(RECALL_URL, {"search": "missing"})
+        await client.make_request(RECALL_URL, {"search": "missing"})
+    assert first == second
+    assert len(calls) == 3
+    assert client.cache.stats.hits == 1
+
+def make_slow_transport(calls, release: asyncio.Event):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await release.wait()
+        if request.url.params.get("search") == "missing":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"results": [{"recalling_firm": "Acme"}]})
+    return httpx.MockTransport(handler)
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_fetch():
+    calls = []
+    release = asyncio.Event()
+    client = ApiClient(transport=make_slow_transport(calls, release))
+    async with client:
+        waiters = [
+            asyncio.create_task(client.make_request(RECALL_URL, {"search": "ice cream", "limit": 10}))
+            for _ in range(10)
+        ]
+        failing = [asyncio.create_task(client.make_request(RECALL_URL, {"search": "missing"})) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        errors = await asyncio.gather(*failing)
+
+    assert len(calls) == 2
+    assert all(data["results"][0]["recalling_firm"] == "Acme" for data, _ in results)
+    assert all(error == "Error fetching data from API: 404 Not Found" for _, error in errors)
+    assert client._inflight == {}
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_does_not_cancel_the_shared_fetch():
+    calls = []
+    release = asyncio.Event()
+    client = ApiClient(transport=make_slow_transport(calls, release))
+    async with client:
+        first = asyncio.create_task(client.make_request(RECALL_URL, {"search": "ice cream"}))
+        second = asyncio.create_task(client.make_request(RECALL_URL, {"search": "ice cream"}))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        data, error = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    assert error is None and data["results"]
+    assert len(calls) == 1
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_counting_transport(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"version": len(calls)})
+    return httpx.MockTransport(handler)
+
+@pytest.mark.asyncio
+async def test_stale_responses_are_served_while_revalidating():
+    calls, clock = [], FakeClock()
+    cache = ResponseCache(default_ttl=60, stale_ttl=600, clock=clock)
+    client = ApiClient(transport=make_counting_transport(calls), cache=cache)
+    async with client:
+        first, _ = await client.make_request(RECALL_URL, {"search": "ice cream"})
+        clock.now = 120
+        # The stale copy comes back at once; the refresh happens in the background
+        stale, _ = await client.make_request(RECALL_URL, {"search": "ice cream"})
+        assert stale == first == {"version": 1}
+        await asyncio.gather(*client._background)
+        fresh, _ = await client.make_request(RECALL_URL, {"search": "ice cream"})
+    assert fresh == {"version": 2}
+    assert len(calls) == 2
+    assert cache.stats.stale_hits == 1
+
+@pytest.mark.asyncio
+async def test_hot_keys_are_refreshed_before_they_go_stale():
+    calls, clock = [], FakeClock()
+    cache = ResponseCache(default_ttl=600, clock=clock)
+    client = ApiClient(
+        transport=make_counting_transport(calls), cache=cache,
+        refresh_interval=3600, refresh_top_n=1, refresh_margin=120,
+    )
+    async with client:
+        for _ in range(3):
+            await client.make_request(RECALL_URL, {"search": "hot"})
+        await client.make_request(RECALL_URL, {"search": "cold"})
+        assert await client.refresh_hot() == 0  # still fresh for 600s
+
+        clock.now = 500
+        assert await client.refresh_hot() == 1
+        data, _ = await client.make_request(RECALL_URL, {"search": "hot"})
+        assert client._refresh_task is not None
+    assert data == {"version": 3}
+    assert client._refresh_task is None
@@ -0,0 +1,138 @@
+"""
+Tests for the pluggable data backends.
+The food tools are exercised against a fixture backend, so results are deterministic and offline.
+"""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import (
+    ENFORCEMENT,
+    EVENT,
+    CachedBackend,
+    FixtureBackend,
+    LocalIndexBackend,
+    OpenFDABackend,
+    all_of,
+    match_phrase,
+    match_range,
+)
+from safetyscore.cache import ResponseCache
+from safetyscore.local_index import LocalIndex
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def get_tools(backend):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=backend)
+    return {name: tool.fn for name, tool in mcp._tool_manager._tools.items()}
+
+def test_query_helpers_build_openfda_syntax():
+    query = all_of(match_phrase("product_description", "ice cream"), match_range("report_date", "20240101", "20241231"))
+    assert query == 'product_description:"ice cream" AND report_date:[20240101 TO 20241231]'
+
+@pytest.mark.asyncio
+async def test_openfda_backend_sends_search_and_count_params():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"results": []})
+
+    client = ApiClient(transport=httpx.MockTransport(handler))
+    backend = OpenFDABackend(client, urls={ENFORCEMENT: "https://fda.test/food/enforcement.json", EVENT: "https://fda.test/food/event.json"})
+    async with backend:
+        await backend.search(ENFORCEMENT, query='classification:"Class I"', sort="report_date:desc", limit=5)
+        await backend.count(EVENT, "reactions.exact", query='products.name_brand:"Cheerios"')
+
+    assert requests[0].url.path == "/food/enforcement.json"
+    assert dict(requests[0].url.params) == {"search": 'classification:"Class I"', "sort": "report_date:desc", "limit": "5"}
+    assert requests[1].url.path == "/food/event.json"
+    assert dict(requests[1].url.params) == {"search": 'products.name_brand:"Cheerios"', "count": "reactions.exact"}
+
+@pytest.mark.asyncio
+async def test_cached_backend_reuses_results():
+    inner = FixtureBackend(path=FIXTURE_PATH)
+    backend = CachedBackend(inner, ResponseCache(max_entries=8))
+    async with backend:
+        first, _ = await backend.search(ENFORCEMENT, query=match_phrase("classification", "Class II"), limit=5)
+        second, _ = await backend.search(ENFORCEMENT, query=match_phrase("classification", "Class II"), limit=5)
+    assert first is second
+    assert backend.cache.stats.hits == 1
+
+@pytest.mark.asyncio
+async def test_cached_backend_drops_results_once_another_process_writes_the_index(tmp_path):
+    path = str(tmp_path / "index.db")
+    with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+        recalls = json.load(f)[ENFORCEMENT]
+    index = LocalIndex(path)
+    index.ingest(ENFORCEMENT, recalls)
+    index.close()
+
+    clock = FakeClock()
+    inner = LocalIndexBackend(path)
+    backend = CachedBackend(inner, ResponseCache(max_entries=8), version_check_interval=1.0, clock=clock)
+    query = match_phrase("classification", "Class I")
+    async with backend:
+        first, _ = await backend.search(ENFORCEMENT, query=query, limit=5)
+        assert (await backend.search(ENFORCEMENT, query=query, limit=5))[0] is first
+
+        # A write through another connection, as the sync in the parent of the HTTP workers makes
+        writer = LocalIndex(path)
+        writer.ingest(ENFORCEMENT, [dict(recalls[1], classification="Class I")])
+        writer.close()
+        # Lookups within the check interval don't query the index's version
+        assert (await backend.search(ENFORCEMENT, query=query, limit=5))[0] is first
+        clock.now += 1.0
+        second, _ = await backend.search(ENFORCEMENT, query=query, limit=5)
+    assert len(first["results"]) == 1
+    assert len(second["results"]) == 2
+
+@pytest.mark.asyncio
+async def test_food_tools_answer_from_fixture_backend():
+    tools = get_tools(FixtureBackend(path=FIXTURE_PATH))
+
+    report = await tools["search_recalls_by_product_description"](query="ice cream")
+    assert "Total recalls found: 2" in report
+    assert "Class I (Most Serious): 1" in report
+
+    result = await tools["search_recalls_by_code_info"](code_info="222268")
+    assert "Example Creamery Inc." in result
+
+    summary = await tools["get_symptom_summary_for_product"](product_name="Lucky Charms")
+    assert "NAUSEA: 2 reports" in summary
+
+    result = await tools["search_recalls_by_specific_product"](product_name="Nonexistent Snack")
+    assert result == "No recalls found for 'Nonexistent Snack'."
+
+@pytest.mark.asyncio
+async def test_tools_report_openfda_404_as_no_matches():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"error": {"code": "NOT_FOUND", "message": "No matches found!"}})
+
+    client = ApiClient(transport=httpx.MockTransport(handler))
+    tools = get_tools(OpenFDABackend(client, urls={ENFORCEMENT: "https://fda.test/food/enforcement.json", EVENT: "https://fda.test/food/event.json"}))
+    assert await tools["search_recalls_by_code_info"](code_info="000000") == "No food recalls found containing code info '000000'."
+    assert await tools["search_recalls_by_product_description"](query="zzzz") == "No food recalls found for 'zzzz'."
+    assert await tools["search_recalls_by_product_type"](product_type="zzzz", output_format="json") == (
+        '{"query":"product_description:\\"zzzz\\"","total":0,"recalls":[]}'
+    )
+    assert await tools["search_recalls_by_specific_product"](product_name="zzzz") == "No recalls found for 'zzzz'."
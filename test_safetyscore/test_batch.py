@@ -0,0 +1,55 @@
+"""
+Tests for batch product / lot code lookups.
+"""
+
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.backends import ENFORCEMENT, FixtureBackend
+from safetyscore.batch import batch_lookup, contains_phrase, tokenize
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+class RecordingBackend(FixtureBackend):
+    """A fixture backend that records the queries it receives."""
+
+    def __init__(self, **kwargs):
+        super().__init__(path=FIXTURE_PATH)
+        self.queries = []
+        self.kwargs = kwargs
+
+    async def search(self, dataset, query=None, sort=None, limit=1, skip=0):
+        self.queries.append(query)
+        return await super().search(dataset, query=query, sort=sort, limit=self.kwargs.get("limit", limit), skip=skip)
+
+def test_contains_phrase_uses_contiguous_tokens():
+    tokens = tokenize("Chocolate Chip Cookie Dough Ice Cream, 1.5 qt")
+    assert contains_phrase(tokens, tokenize("cookie dough"))
+    assert not contains_phrase(tokens, tokenize("chocolate cream"))
+
+@pytest.mark.asyncio
+async def test_items_are_combined_into_or_queries_and_attributed():
+    backend = RecordingBackend()
+    items = ["ice cream", "Bakery Bread", "Nonexistent Snack", "ice cream", "  "]
+    results = await batch_lookup(backend, ENFORCEMENT, "product_description", items, chunk_size=10)
+
+    assert len(backend.queries) == 1
+    assert [r["query"] for r in results] == items
+    assert [r["recalled"] for r in results] == [True, True, False, True, False]
+    assert {r["recall_number"] for r in results[0]["recalls"]} == {"F-0001-2024", "F-0003-2023"}
+    assert results[1]["recalls"][0]["recalling_firm"] == "Sunrise Bakery LLC"
+    assert results[4]["error"] == "Empty query"
+
+@pytest.mark.asyncio
+async def test_truncated_pages_fall_back_to_single_item_queries():
+    # A page size of 1 truncates the chunk, so unmatched items must be re-checked on their own
+    backend = RecordingBackend(limit=1)
+    results = await batch_lookup(backend, ENFORCEMENT, "code_info", ["222268", "9999"], chunk_size=2)
+
+    assert [r["recalled"] for r in results] == [True, True]
+    assert len(backend.queries) == 2
@@ -0,0 +1,155 @@
+"""
+Tests for the TTL + LRU response cache and its persistent SQLite store.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.api_client import ApiClient
+from safetyscore.cache import DiskCache, ResponseCache, TTLCache, normalize_request
+
+RECALL_URL = "https://api.fda.gov/food/enforcement.json"
+EVENT_URL = "https://api.fda.gov/food/event.json"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_normalize_request_is_order_and_type_insensitive():
+    a = normalize_request(RECALL_URL + "?", {"limit": 10, "search": 'product_description:"ice cream"'})
+    b = normalize_request(RECALL_URL, {"search": 'product_description:"ice cream"', "limit": "10"})
+    assert a == b
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=4, clock=clock)
+    cache.set("k", {"v": 1}, ttl=10)
+    assert cache.get("k") == {"v": 1}
+    clock.now = 10
+    assert cache.get("k") is None
+    assert cache.stats.expirations == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+def test_ttl_depends_on_endpoint_and_count_queries():
+    cache = ResponseCache(default_ttl=5, endpoint_ttls={RECALL_URL: 100, EVENT_URL: 50}, count_ttl=500)
+    assert cache.ttl_for(normalize_request(RECALL_URL, {"search": "x"})) == 100
+    assert cache.ttl_for(normalize_request(EVENT_URL, {"search": "x"})) == 50
+    assert cache.ttl_for(normalize_request(EVENT_URL, {"search": "x", "count": "reactions.exact"})) == 500
+    assert cache.ttl_for(normalize_request("https://example.com/other.json", None)) == 5
+
+def test_disk_cache_survives_restarts(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(store=DiskCache(path))
+    key = normalize_request(RECALL_URL, {"search": 'classification:"Class I"'})
+    cache.set(key, {"results": [{"recall_number": "F-1"}]})
+    cache._store.close()
+
+    restarted = ResponseCache(store=DiskCache(path))
+    assert restarted.get(key) == {"results": [{"recall_number": "F-1"}]}
+    assert restarted.stats.hits == 1
+
+def test_disk_cache_expiry_and_size_caps(tmp_path):
+    clock = FakeClock()
+    cache = DiskCache(str(tmp_path / "cache.db"), max_entries=3, max_bytes=1000, touch_interval=0, clock=clock)
+    for i in range(3):
+        clock.now += 1
+        cache.set(("k", i), {"i": i}, ttl=10)
+    clock.now += 1
+    assert cache.get(("k", 0)) == {"i": 0}  # now the most recently used
+    cache.set(("k", 3), {"i": 3}, ttl=10)
+    assert len(cache) == 3
+    assert cache.get(("k", 1)) is None
+    assert cache.stats.evictions == 1
+
+    cache.set(("big",), {"blob": "x" * 900}, ttl=10)
+    assert cache.size_bytes <= 1000
+    assert cache.get(("big",)) is not None
+
+    clock.now += 60
+    assert cache.get(("big",)) is None
+    cache.compact()
+    assert len(cache) == 0
+
+def test_disk_cache_hits_do_not_wait_for_the_write_lock(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "cache.db")
+    cache = DiskCache(path, busy_timeout=0.1, touch_interval=60, clock=clock)
+    cache.set(("k",), {"i": 0}, ttl=600)
+
+    # Another worker holds the write lock
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    clock.now += 30
+    assert cache.get(("k",)) == {"i": 0}
+    writer.execute("ROLLBACK")
+
+    # Once the access time is older than touch_interval, a hit records it again
+    clock.now += 60
+    assert cache.get(("k",)) == {"i": 0}
+    assert writer.execute("SELECT accessed_at FROM cache_entries").fetchone()[0] == 90
+    writer.close()
+
+def test_disk_cache_is_shared_by_concurrent_writers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    caches = [DiskCache(path) for _ in range(4)]
+
+    def write(worker):
+        for i in range(50):
+            caches[worker].set((worker, i), {"worker": worker, "i": i}, ttl=60)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(caches[0]) == 200
+    assert caches[0].get((3, 49)) == {"worker": 3, "i": 49}
+
+class ThreadRecordingDiskCache(DiskCache):
+    """A DiskCache noting the thread each lookup and write runs in."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def lookup(self, key):
+        self.threads.append(threading.get_ident())
+        return super().lookup(key)
+
+    def set(self, key, value, ttl, stale_ttl=0.0):
+        self.threads.append(threading.get_ident())
+        super().set(key, value, ttl, stale_ttl)
+
+@pytest.mark.asyncio
+async def test_disk_cache_io_runs_off_the_event_loop(tmp_path):
+    store = ThreadRecordingDiskCache(str(tmp_path / "cache.db"))
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"results": [{"recall_number": "F-1"}]}))
+    async with ApiClient(transport=transport, cache=ResponseCache(store=store)) as client:
+        first, _ = await client.make_request(RECALL_URL, {"search": "x"})
+        second, _ = await client.make_request(RECALL_URL, {"search": "x"})
+    assert first == second == {"results": [{"recall_number": "F-1"}]}
+    assert store.stats.hits == 1
+    # A miss, its write and a hit, none of them on the event loop's thread
+    assert len(store.threads) == 3
+    assert threading.get_ident() not in store.threads
@@ -0,0 +1,88 @@
+"""
+Tests for the columnar recall store and the trend tool built on it.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.backends import FixtureBackend
+from safetyscore.columnar import NUMPY_AVAILABLE, RecallColumns, RecallColumnStore
+from safetyscore.local_index import ENFORCEMENT, LocalIndex
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+ROWS = [
+    ("Class I", "Acme Foods", "CA", "Ongoing", "20231215"),
+    ("Class II", "Acme Foods", "CA", "Terminated", "20240110"),
+    ("Class II", "Best Bakery", "WI", "Terminated", "20240305"),
+    ("Class I", "Best Bakery", None, "Ongoing", "20240320"),
+    ("Class III", "Acme Foods", "CA", "Ongoing", None),
+]
+
+def test_group_by_and_time_buckets_without_numpy():
+    columns = RecallColumns.from_rows(ROWS, use_numpy=False)
+    assert columns.categories["recalling_firm"] == ["Acme Foods", "Best Bakery"]
+    assert columns.group_count("firm") == [("Acme Foods", 3), ("Best Bakery", 2)]
+    assert columns.group_count("state") == [("CA", 3), ("WI", 1)]
+
+    periods, counts = columns.time_series("month", by="classification")
+    assert periods == ["2023-12", "2024-01", "2024-02", "2024-03"]
+    assert counts == {"Class I": [1, 0, 0, 1], "Class II": [0, 1, 0, 1]}
+
+    selection = columns.select(start_date="20240101", firm="Best Bakery")
+    assert columns.size(selection) == 2
+    assert columns.time_series("quarter", selection=selection) == (["2024-Q1"], {"All": [2]})
+    assert columns.size(columns.select(firm="Nobody")) == 0
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="NumPy is not installed")
+def test_numpy_columns_give_the_same_results():
+    def summarize(columns):
+        return (
+            columns.group_count("classification"),
+            columns.time_series("month", by="state"),
+            columns.time_series("year", selection=columns.select(end_date="20240131", status="Ongoing")),
+        )
+
+    assert summarize(RecallColumns.from_rows(ROWS, use_numpy=True)) == summarize(RecallColumns.from_rows(ROWS, use_numpy=False))
+
+def test_store_rebuilds_after_the_index_changes(tmp_path):
+    with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+        recalls = json.load(f)[ENFORCEMENT]
+    index = LocalIndex(str(tmp_path / "index.db"))
+    index.ingest(ENFORCEMENT, recalls[:2])
+    store = RecallColumnStore(use_numpy=False)
+    first = store.get(index)
+    assert len(first) == 2
+    assert store.get(index) is first
+
+    # A write through another connection, as the periodic sync makes
+    writer = LocalIndex(str(tmp_path / "index.db"))
+    writer.ingest(ENFORCEMENT, recalls[2:])
+    writer.close()
+    assert len(store.get(index)) == 3
+    index.close()
+
+@pytest.mark.asyncio
+async def test_trend_tool_splits_and_combines_series():
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=FixtureBackend(path=FIXTURE_PATH))
+    get_recall_trends = mcp._tool_manager._tools["get_recall_trends"].fn
+
+    report = await get_recall_trends(bucket="quarter", by="firm", top_n=1)
+    assert "| Quarter | Example Creamery Inc. | Other | Total |" in report
+    assert "| 2024-Q1 | 1 | 1 | 2 |" in report
+
+    result = json.loads(await get_recall_trends(bucket="year", state="WI", output_format="json"))
+    assert result["periods"] == ["2023", "2024"]
+    assert result["series"] == [{"term": "All", "total": 2, "counts": [1, 1]}]
+
+    assert (await get_recall_trends(by="county")).startswith("Unknown by 'county'")
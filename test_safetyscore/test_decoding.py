@@ -0,0 +1,54 @@
+"""
+Tests for the pluggable JSON decoders.
+"""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.api_client import ApiClient
+from safetyscore.decoding import AVAILABLE_DECODERS, get_decoder
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+with open(FIXTURE_PATH, "rb") as f:
+    FIXTURE_BYTES = f.read()
+
+@pytest.mark.parametrize("name", AVAILABLE_DECODERS)
+def test_installed_decoders_agree_with_the_stdlib(name):
+    decoder = get_decoder(name)
+    assert decoder(FIXTURE_BYTES) == json.loads(FIXTURE_BYTES)
+    assert decoder(FIXTURE_BYTES.decode("utf-8")) == json.loads(FIXTURE_BYTES)
+
+def test_unknown_decoders_are_rejected():
+    assert get_decoder("json") is json.loads
+    with pytest.raises(ValueError, match="Unknown JSON decoder"):
+        get_decoder("simdjson")
+
+@pytest.mark.asyncio
+async def test_client_decodes_responses_with_the_configured_decoder():
+    decoded = []
+
+    def decoder(content):
+        decoded.append(content)
+        return json.loads(content)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("search") == "broken":
+            return httpx.Response(200, content=b"{not json")
+        return httpx.Response(200, json={"results": [{"term": "NAUSEA", "count": 2}]})
+
+    async with ApiClient(transport=httpx.MockTransport(handler), json_decoder=decoder) as client:
+        data, error = await client.make_request("https://fda.test/food/event.json", {"count": "reactions.exact"})
+        assert (data, error) == ({"results": [{"term": "NAUSEA", "count": 2}]}, None)
+        assert isinstance(decoded[0], bytes)
+
+        data, error = await client.make_request("https://fda.test/food/event.json", {"search": "broken"})
+        assert data is None
+        assert error.startswith("An unexpected error occurred")
@@ -0,0 +1,90 @@
+"""
+Tests for concurrent fan-out of independent backend queries.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import ENFORCEMENT, EVENT, OpenFDABackend
+from safetyscore.fanout import gather_queries
+from safetyscore.resilience import RetryPolicy
+from safetyscore.tools.food import register_food_tools
+
+UPSTREAM_DELAY = 0.3
+
+def make_delayed_backend(fail_counts=False):
+    """An openFDA backend whose stub upstream answers every request after UPSTREAM_DELAY seconds."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(UPSTREAM_DELAY)
+        if "count" in request.url.params:
+            if fail_counts:
+                return httpx.Response(500)
+            return httpx.Response(200, json={"results": [{"term": "NAUSEA", "count": 3}]})
+        return httpx.Response(200, json={"results": [
+            {"date_created": "20240102", "reactions": ["NAUSEA"], "outcomes": ["Other Outcome"]},
+        ]})
+
+    client = ApiClient(transport=httpx.MockTransport(handler), retry_policy=RetryPolicy(max_attempts=1))
+    return OpenFDABackend(client, urls={ENFORCEMENT: "https://fda.test/food/enforcement.json", EVENT: "https://fda.test/food/event.json"})
+
+def get_symptom_tool(backend):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=backend)
+    return mcp._tool_manager._tools["get_symptom_summary_for_product"].fn
+
+@pytest.mark.asyncio
+async def test_symptom_summary_wall_time_is_max_not_sum():
+    backend = make_delayed_backend()
+    tool = get_symptom_tool(backend)
+    async with backend:
+        started = time.perf_counter()
+        report = await tool(product_name="Lucky Charms")
+        elapsed = time.perf_counter() - started
+
+    assert "NAUSEA: 3 reports" in report
+    assert "Recent Case Details" in report
+    # Sequential queries would take 2 * UPSTREAM_DELAY
+    assert elapsed < UPSTREAM_DELAY * 1.6
+
+@pytest.mark.asyncio
+async def test_symptom_summary_reports_partial_results():
+    backend = make_delayed_backend(fail_counts=True)
+    tool = get_symptom_tool(backend)
+    async with backend:
+        report = await tool(product_name="Lucky Charms")
+
+    assert "Recent Case Details" in report
+    assert "Symptom summary unavailable: Error fetching data from API: 500" in report
+
+@pytest.mark.asyncio
+async def test_shared_deadline_cancels_slow_legs():
+    async def fast():
+        return {"results": []}, None
+
+    cleaned_up = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        finally:
+            cleaned_up.append("slow")
+        return {"results": []}, None
+
+    started = time.perf_counter()
+    results = await gather_queries({"fast": fast(), "slow": slow()}, timeout=0.1)
+    assert time.perf_counter() - started < 1
+    assert results["fast"] == ({"results": []}, None)
+    assert results["slow"] == (None, "Request timed out after 0.1 seconds")
+    # The cancelled leg has finished unwinding by the time the results are returned
+    assert cleaned_up == ["slow"]
@@ -0,0 +1,196 @@
+"""
+Tests for the precomputed firm profiles and the firm risk profile tool.
+"""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import FixtureBackend, OpenFDABackend
+from safetyscore.cache import ResponseCache
+from safetyscore.firms import (
+    PROFILE_COUNT_FIELDS,
+    FirmProfiles,
+    distribution_states,
+    firm_key,
+    profile_from_counts,
+    reason_categories,
+)
+from safetyscore.local_index import ENFORCEMENT, LocalIndex
+from safetyscore.resilience import RetryPolicy
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+    RECALLS = json.load(f)[ENFORCEMENT]
+
+def recall(number, firm="Acme Foods, Inc.", classification="Class II", date="20240101", **fields):
+    return dict(
+        recall_number=number, recalling_firm=firm, classification=classification, recall_initiation_date=date, **fields
+    )
+
+def test_firm_names_reasons_and_states_are_normalized():
+    assert firm_key("Acme Foods, Inc.") == firm_key("ACME FOODS INC") == "acme foods"
+    assert firm_key("Example Foods Company 1, LLC") == "example foods company 1"
+    assert firm_key("Company Inc") == "company"
+
+    assert reason_categories("Undeclared peanuts") == ("Undeclared allergen or ingredient",)
+    assert reason_categories("Potential Listeria monocytogenes contamination") == ("Listeria monocytogenes",)
+    assert reason_categories("Product may contain pieces of metal") == ("Foreign material",)
+    assert reason_categories("Unknown") == ("Other",)
+
+    assert distribution_states("Distributed in CA, NV and West Virginia") == ("CA", "NV", "WV")
+    assert distribution_states("Nationwide distribution") == ("Nationwide",)
+    assert distribution_states("Distributed in stores") == ()
+
+def test_updated_recalls_replace_their_old_contribution():
+    profiles = FirmProfiles()
+    assert profiles.add_recalls([
+        recall("F-1", classification="Class I", date="20230105", status="Ongoing", event_id="1",
+               reason_for_recall="Listeria", distribution_pattern="CA"),
+        recall("F-2", firm="ACME FOODS INC", date="20240301", status="Ongoing", event_id="1",
+               reason_for_recall="Undeclared milk", distribution_pattern="CA, OR"),
+        recall("F-3", firm="Best Bakery", date="20240201"),
+    ]) == 3
+    profile = profiles.get("acme foods")
+    assert (profile.total, len(profile.events), profile.first_date, profile.last_date) == (2, 1, "20230105", "20240301")
+    assert profile.states == {"CA": 2, "OR": 1}
+    assert len(profiles) == 2
+
+    # Re-adding a recall unchanged is a no-op; a changed one moves its counts
+    assert profiles.add_recalls([recall("F-3", firm="Best Bakery", date="20240201")]) == 0
+    assert profiles.add_recalls([
+        recall("F-1", classification="Class I", date="20230105", status="Terminated", event_id="1",
+               reason_for_recall="Listeria", distribution_pattern="CA"),
+        recall("F-2", firm="Best Bakery", date="20240301"),
+    ]) == 2
+    profile = profiles.get("Acme Foods")
+    assert (profile.total, profile.last_date, profile.statuses) == (1, "20230105", {"Terminated": 1})
+    assert profile.states == {"CA": 1}
+    assert profiles.get("best bakery").total == 2
+
+    assert profiles.remove_recalls(["F-1"]) == 1
+    assert profiles.get("Acme Foods") is None
+    assert profiles.suggest("Best Bakry") == ["Best Bakery"]
+
+def test_refresh_applies_only_the_recalls_written_since(tmp_path):
+    index = LocalIndex(str(tmp_path / "index.db"))
+    index.ingest(ENFORCEMENT, RECALLS)
+    profiles = FirmProfiles()
+    assert profiles.refresh(index) == 3
+    assert profiles.complete
+    assert profiles.get("example creamery").total == 2
+    assert profiles.refresh(index) == 0
+
+    # A write through another connection, as the periodic sync makes
+    writer = LocalIndex(str(tmp_path / "index.db"))
+    writer.ingest(ENFORCEMENT, [
+        dict(RECALLS[2], recalling_firm="Sunrise Bakery LLC"),
+        dict(RECALLS[0], recall_number="F-0004-2024", recall_initiation_date="20240601"),
+    ])
+    writer.close()
+    assert profiles.refresh(index) == 2
+    assert profiles.get("Example Creamery Inc.").last_date == "20240601"
+    assert profiles.get("Example Creamery Inc.").total == 2
+    assert profiles.get("sunrise bakery").total == 2
+    index.close()
+
+@pytest.mark.asyncio
+async def test_profile_tool_answers_from_the_local_index():
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=FixtureBackend(path=FIXTURE_PATH))
+    get_firm_risk_profile = mcp._tool_manager._tools["get_firm_risk_profile"].fn
+
+    report = await get_firm_risk_profile(firm="EXAMPLE CREAMERY")
+    assert "🏢 **Recall Profile: Example Creamery Inc.**" in report
+    assert "• Total recalls: 2" in report
+    assert "• Class I (Most Serious): 1" in report
+    assert "• First recall: 20231101; most recent: 20240115" in report
+    assert "• Undeclared allergen or ingredient: 1 recalls" in report
+
+    result = json.loads(await get_firm_risk_profile(firm="Sunrise Bakery", output_format="json"))
+    assert result["total"] == 1
+    assert result["classifications"] == [{"term": "Class II", "count": 1}]
+    assert result["reasons"] == [{"term": "Listeria monocytogenes", "count": 1}]
+
+    missing = await get_firm_risk_profile(firm="Exampel Creamery")
+    assert missing.startswith("No food recalls found for a firm named 'Exampel Creamery'.")
+    assert "Example Creamery Inc." in missing
+
+def test_profile_from_counts_folds_reasons_and_states():
+    profile = profile_from_counts("acme foods", {"Acme Foods, Inc.": 3, "ACME FOODS INC": 1}, {
+        "classifications": [{"term": "Class I", "count": 1}, {"term": "Class II", "count": 3}],
+        "dates": [{"time": "20230105", "count": 1}, {"time": "20240301", "count": 3}],
+        "events": [{"term": "1", "count": 4}],
+        "reasons": [{"term": "Undeclared milk", "count": 3}, {"term": "Undeclared peanuts and Listeria", "count": 1}],
+        "states": [{"term": "CA, NV", "count": 1}, {"term": "California", "count": 2}],
+    })
+    assert (profile.name, profile.total, len(profile.events)) == ("Acme Foods, Inc.", 4, 1)
+    assert (profile.first_date, profile.last_date) == ("20230105", "20240301")
+    assert profile.reasons == {"Undeclared allergen or ingredient": 4, "Listeria monocytogenes": 1}
+    assert profile.states == {"CA": 3, "NV": 1}
+    assert not profile.statuses
+
+def count_buckets(field, firms):
+    """openFDA `count=` buckets of the fixture recalls of `firms` on `field`."""
+    column = field[:-len(".exact")] if field.endswith(".exact") else field
+    counts = {}
+    for recall in RECALLS:
+        if recall["recalling_firm"] in firms and recall.get(column):
+            counts[recall[column]] = counts.get(recall[column], 0) + 1
+    key = "time" if column == "recall_initiation_date" else "term"
+    return [{key: term, "count": count} for term, count in counts.items()]
+
+@pytest.mark.asyncio
+async def test_profile_tool_builds_the_profile_from_openfda_counts():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        field, search = request.url.params["count"], request.url.params["search"]
+        if field == "recalling_firm.exact":
+            # The phrase search also matches a different firm sharing its words
+            results = count_buckets(field, ["Example Creamery Inc."]) + [{"term": "Example Creamery Farms", "count": 5}]
+        else:
+            results = count_buckets(field, [firm for firm in ("Example Creamery Inc.", "Sunrise Bakery LLC") if f'"{firm}"' in search])
+        return httpx.Response(200, json={"results": results})
+
+    client = ApiClient(
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(max_attempts=1),
+        cache=ResponseCache(max_entries=16, count_ttl=3600),
+    )
+    backend = OpenFDABackend(client, urls={ENFORCEMENT: "https://fda.test/food/enforcement.json"})
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=backend)
+    get_firm_risk_profile = mcp._tool_manager._tools["get_firm_risk_profile"].fn
+
+    result = json.loads(await get_firm_risk_profile(firm="Example Creamery, Inc.", output_format="json"))
+    assert requests[0].url.params["search"] == 'recalling_firm:"example creamery"'
+    assert {request.url.params["search"] for request in requests[1:]} == {'recalling_firm.exact:"Example Creamery Inc."'}
+    assert len(requests) == 1 + len(PROFILE_COUNT_FIELDS)
+    assert result["firm"] == "Example Creamery Inc."
+    assert result["total"] == 2
+    assert (result["first_recall_date"], result["last_recall_date"]) == ("20231101", "20240115")
+    assert result["classifications"] == [{"term": "Class I", "count": 1}, {"term": "Class II", "count": 1}]
+
+    # The counts are cached, so asking again costs no request
+    await get_firm_risk_profile(firm="EXAMPLE CREAMERY")
+    assert len(requests) == 1 + len(PROFILE_COUNT_FIELDS)
+
+    missing = await get_firm_risk_profile(firm="Example Creamery Farm Stand")
+    assert missing == (
+        "No food recalls found for a firm named 'Example Creamery Farm Stand'. "
+        "Similar firms: Example Creamery Farms; Example Creamery Inc.."
+    )
+    await client.aclose()
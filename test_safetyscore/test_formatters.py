@@ -0,0 +1,78 @@
+"""
+Tests for the structured (JSON) output mode and the record models behind both output formats.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.backends import FixtureBackend
+from safetyscore.models import Recall
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+@pytest.fixture
+def tools():
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=FixtureBackend(path=FIXTURE_PATH))
+    return {name: tool.fn for name, tool in mcp._tool_manager._tools.items()}
+
+def test_recall_model_accepts_legacy_field_names():
+    recall = Recall.model_validate({"recall_number": "F-1", "quantity_in_commerce": "10 cases", "unused": "x"})
+    assert recall.product_quantity == "10 cases"
+    assert recall.model_dump(exclude_none=True) == {"recall_number": "F-1", "product_quantity": "10 cases"}
+
+@pytest.mark.asyncio
+async def test_json_output_is_compact_and_restricted_to_fields(tools):
+    output = await tools["search_recalls_by_product_description"](
+        query="ice cream", output_format="json", fields=["recall_number", "classification"],
+    )
+    assert '": ' not in output and '", "' not in output
+    data = json.loads(output)
+    assert data["total"] == 2
+    assert data["recalls"] == [
+        {"recall_number": "F-0001-2024", "classification": "Class I"},
+        {"recall_number": "F-0003-2023", "classification": "Class II"},
+    ]
+
+@pytest.mark.asyncio
+async def test_json_output_for_paged_and_summary_tools(tools):
+    data = json.loads(await tools["search_recalls_by_classification"](
+        classification="Class II", max_results=1, output_format="json",
+    ))
+    assert data["total"] == 2
+    assert len(data["recalls"]) == 1
+    assert data["recalls"][0]["classification"] == "Class II"
+
+    data = json.loads(await tools["get_symptom_summary_for_product"](
+        product_name="Lucky Charms", output_format="json", fields=["report_number"],
+    ))
+    assert data["total_reports"] == 3
+    assert data["symptoms"][0] == {"term": "NAUSEA", "count": 2}
+    assert {case["report_number"] for case in data["cases"]} == {"100", "101"}
+
+    data = json.loads(await tools["search_recalls_by_specific_product"](
+        product_name="Nonexistent Snack", output_format="json",
+    ))
+    assert data["total"] == 0 and data["recalls"] == []
+
+@pytest.mark.asyncio
+async def test_markdown_remains_the_default(tools):
+    report = await tools["search_recalls_by_classification"](classification="Class I")
+    assert report.startswith("Found recalls for classification 'Class I':")
+    assert "Example Creamery Inc." in report
+
+@pytest.mark.asyncio
+async def test_invalid_output_arguments_are_reported(tools):
+    result = await tools["search_recalls_by_date"](output_format="xml")
+    assert result.startswith("Unknown output_format 'xml'")
+    result = await tools["search_adverse_events_by_product"](product_name="Cheerios", output_format="json", fields=["bogus"])
+    assert result.startswith("Unknown fields: bogus.")
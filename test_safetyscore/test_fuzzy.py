@@ -0,0 +1,90 @@
+"""
+Tests for typo-tolerant product matching.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.backends import FixtureBackend
+from safetyscore.fuzzy import FuzzyIndex, TrigramIndex
+from safetyscore.local_index import ENFORCEMENT, LocalIndex
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+    RECALLS = json.load(f)[ENFORCEMENT]
+
+def get_tools(fuzzy):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=FixtureBackend(path=FIXTURE_PATH), fuzzy=fuzzy)
+    return {name: tool.fn for name, tool in mcp._tool_manager._tools.items()}
+
+def test_similar_terms_rank_by_similarity_then_recency():
+    index = TrigramIndex()
+    index.add("cookie", "20190101")
+    index.add("cookie", "20240101")
+    index.add("cooks", "20200101")
+    index.add("crackers", "20240101")
+    matches = index.search("cookei")
+    assert matches[0] == {"term": "cookie", "similarity": 0.833, "latest_date": "20240101", "count": 2}
+    assert "crackers" not in [m["term"] for m in matches]
+
+    # One edit from both: the more recently recalled term ranks first
+    assert [m["term"] for m in index.search("cookis")] == ["cookie", "cooks"]
+    index.add("cooks", "20250101")
+    assert [m["term"] for m in index.search("cookis")] == ["cooks", "cookie"]
+
+def test_resolve_corrects_only_unknown_words(tmp_path):
+    local = LocalIndex(str(tmp_path / "index.db"))
+    local.ingest(ENFORCEMENT, RECALLS)
+    fuzzy = FuzzyIndex()
+    assert fuzzy.load_local_index(local) == 3
+    local.close()
+
+    assert fuzzy.complete
+    assert fuzzy.resolve("choclate chip") == "chocolate chip"
+    assert fuzzy.resolve("ice cream") == "ice cream"
+    assert fuzzy.resolve("zzzz") == "zzzz"
+    assert fuzzy.suggest("exmaple creamery")["firms"][0]["term"] == "example creamery inc"
+
+def test_refresh_indexes_the_recalls_synced_since(tmp_path):
+    local = LocalIndex(str(tmp_path / "index.db"))
+    local.ingest(ENFORCEMENT, RECALLS)
+    fuzzy = FuzzyIndex()
+    assert fuzzy.refresh(local) == 3
+    assert fuzzy.refresh(local) == 0
+    assert fuzzy.resolve("pretzle") == "pretzle"
+
+    # A write through another connection, as the periodic sync makes
+    writer = LocalIndex(str(tmp_path / "index.db"))
+    writer.ingest(ENFORCEMENT, [dict(RECALLS[0], recall_number="F-0004-2024", product_description="Salted pretzels")])
+    writer.close()
+    assert fuzzy.refresh(local) == 1
+    assert fuzzy.resolve("pretzle") == "pretzels"
+    local.close()
+
+@pytest.mark.asyncio
+async def test_tools_search_the_corrected_phrase():
+    fuzzy = FuzzyIndex()
+    fuzzy.add_recalls(RECALLS)
+    tools = get_tools(fuzzy)
+
+    # Not loaded from a full index, so the exact phrase is tried before the correction
+    report = await tools["search_recalls_by_product_description"](query="choclate chip")
+    assert report.startswith("🔎 No exact match for 'choclate chip'; showing results for 'chocolate chip'.")
+    assert "Total recalls found: 1" in report
+
+    result = await tools["search_recalls_by_specific_product"](product_name="vanila ice cream")
+    assert "Found a recall for 'vanilla ice cream'" in result
+
+    suggestions = await tools["suggest_recall_search_terms"](query="bakry bred")
+    assert suggestions["resolved"] == "bakery bread"
@@ -0,0 +1,95 @@
+"""
+Tests for the local SQLite recall index and its openFDA query translation.
+"""
+
+import io
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.local_index import (
+    ENFORCEMENT,
+    EVENT,
+    LocalIndex,
+    iter_bulk_file,
+    iter_bulk_results,
+    parse_search,
+    query_index,
+)
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+    FIXTURE = json.load(f)
+
+RECALLS = FIXTURE[ENFORCEMENT]
+EVENTS = FIXTURE[EVENT]
+
+def bulk_json(records):
+    return json.dumps({"meta": {"results": {"total": len(records)}, "last_updated": "2024-05-01"}, "results": records})
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalIndex(str(tmp_path / "index.db"))
+    index.ingest(ENFORCEMENT, RECALLS)
+    index.ingest(EVENT, EVENTS)
+    yield index
+    index.close()
+
+def test_streaming_reader_handles_records_split_across_chunks():
+    records = list(iter_bulk_results(io.StringIO(bulk_json(RECALLS)), chunk_size=7))
+    assert records == RECALLS
+
+def test_streaming_reader_reads_zipped_bulk_files(tmp_path):
+    path = tmp_path / "food-enforcement-0001-of-0001.json.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("food-enforcement-0001-of-0001.json", bulk_json(RECALLS))
+    assert [r["recall_number"] for r in iter_bulk_file(str(path))] == ["F-0001-2024", "F-0002-2024", "F-0003-2023"]
+
+def test_reingesting_updates_instead_of_duplicating(index):
+    updated = dict(RECALLS[0], termination_date="20240501", status="Terminated")
+    index.ingest(ENFORCEMENT, [updated])
+    assert index.count(ENFORCEMENT) == 3
+    data = query_index(index, ENFORCEMENT, {"search": 'recall_number:"F-0001-2024"'})
+    assert data["results"][0]["status"] == "Terminated"
+    # The full-text index follows the update
+    data = query_index(index, ENFORCEMENT, {"search": 'product_description:"cookie dough"'})
+    assert data["meta"]["results"]["total"] == 1
+
+def test_parse_search_groups_terms():
+    groups = parse_search('product_description:"ice cream" AND classification:"Class I" recall_initiation_date:[20240101 TO 20241231]')
+    assert groups == [
+        [("product_description", "phrase", "ice cream"), ("classification", "phrase", "Class I")],
+        [("recall_initiation_date", "range", ("20240101", "20241231"))],
+    ]
+
+def test_recall_queries_match_tool_parameters(index):
+    data = query_index(index, ENFORCEMENT, {
+        "search": 'product_description:"ice cream"', "limit": 10, "sort": "recall_initiation_date:desc",
+    })
+    assert [r["recall_number"] for r in data["results"]] == ["F-0001-2024", "F-0003-2023"]
+
+    data = query_index(index, ENFORCEMENT, {"search": 'classification:"Class II"', "limit": 5})
+    assert {r["recall_number"] for r in data["results"]} == {"F-0002-2024", "F-0003-2023"}
+
+    data = query_index(index, ENFORCEMENT, {"search": 'code_info:"222268"', "limit": 5})
+    assert [r["recall_number"] for r in data["results"]] == ["F-0001-2024"]
+
+    data = query_index(index, ENFORCEMENT, {"search": "recall_initiation_date:[20240101 TO 20241231]", "limit": 10})
+    assert data["meta"]["results"]["total"] == 2
+
+    data = query_index(index, ENFORCEMENT, {"search": 'product_description:""', "limit": 10})
+    assert data["results"] == []
+
+def test_count_queries(index):
+    data = query_index(index, ENFORCEMENT, {"count": "classification.exact"})
+    assert data["results"] == [{"term": "Class II", "count": 2}, {"term": "Class I", "count": 1}]
+
+    data = query_index(index, EVENT, {"search": 'products.name_brand:"Lucky Charms"', "count": "reactions.exact"})
+    assert data["results"] == [{"term": "NAUSEA", "count": 2}, {"term": "VOMITING", "count": 1}]
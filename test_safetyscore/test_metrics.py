@@ -0,0 +1,74 @@
+"""
+Tests for the tool, upstream and cache metrics.
+"""
+
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import ENFORCEMENT, EVENT, CachedBackend, FixtureBackend, OpenFDABackend
+from safetyscore.cache import ResponseCache
+from safetyscore.metrics import metrics
+from safetyscore.resilience import RetryPolicy
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+RECALL_URL = "https://fda.test/food/enforcement.json"
+
+def get_tools(backend):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=backend)
+    return {name: tool.fn for name, tool in mcp._tool_manager._tools.items()}
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_timed_by_phase():
+    backend = CachedBackend(FixtureBackend(path=FIXTURE_PATH), ResponseCache(max_entries=8))
+    tools = get_tools(backend)
+    await tools["search_recalls_by_product_description"](query="ice cream")
+    await tools["search_recalls_by_product_description"](query="ice cream")
+
+    snapshot = metrics.snapshot()
+    timing = snapshot["tools"]["search_recalls_by_product_description"]
+    assert timing["calls"] == 2
+    assert timing["upstream"] > 0 and timing["render"] > 0
+    assert timing["upstream"] + timing["render"] <= timing["seconds"]
+    assert snapshot["cache"][ENFORCEMENT] == {"hit": 1, "stale": 0, "miss": 1, "hit_rate": 0.5}
+
+@pytest.mark.asyncio
+async def test_upstream_requests_are_counted_per_endpoint_and_status():
+    statuses = [503, 200, 404]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status == 200:
+            return httpx.Response(200, json={"meta": {"results": {"total": 1}}, "results": [{"recall_number": "F-1"}]})
+        return httpx.Response(status)
+
+    client = ApiClient(transport=httpx.MockTransport(handler), retry_policy=RetryPolicy(base_delay=0.001))
+    tools = get_tools(OpenFDABackend(client, urls={ENFORCEMENT: RECALL_URL, EVENT: "https://fda.test/food/event.json"}))
+    await tools["search_recalls_by_code_info"](code_info="1234")
+    await tools["search_recalls_by_code_info"](code_info="5678")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["upstream"]["/food/enforcement.json"]["status"] == {"503": 1, "200": 1, "404": 1}
+    timing = snapshot["tools"]["search_recalls_by_code_info"]
+    assert timing["calls"] == 2 and timing["decode"] > 0
+
+    text = metrics.prometheus()
+    assert 'safetysearch_upstream_requests_total{endpoint="/food/enforcement.json",status="503"} 1' in text
+    assert 'safetysearch_tool_duration_seconds_count{tool="search_recalls_by_code_info"} 2' in text
+    assert 'safetysearch_tool_duration_seconds_bucket{tool="search_recalls_by_code_info",le="+Inf"} 2' in text
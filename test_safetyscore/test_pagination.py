@@ -0,0 +1,175 @@
+"""
+Tests for paginated walks over large openFDA result sets.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tracemalloc
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+import safetyscore.api_client as api_client_module
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import DataBackend, FixtureBackend
+from safetyscore.tools.food import register_food_tools
+
+RECALL_URL = "https://fda.test/food/enforcement.json"
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+TOTAL = 250
+
+def make_paging_transport(requests):
+    """Serves TOTAL numbered records with skip/limit and search_after paging."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(dict(request.url.params))
+        limit = int(request.url.params.get("limit", 1))
+        if "search_after" in request.url.params:
+            start = int(request.url.params["search_after"])
+        else:
+            start = int(request.url.params.get("skip", 0))
+        records = [{"recall_number": f"F-{n:04d}"} for n in range(start, min(start + limit, TOTAL))]
+        headers = {}
+        if start + limit < TOTAL:
+            headers["Link"] = f'<{RECALL_URL}?limit={limit}&search_after={start + limit}>; rel="next"'
+        return httpx.Response(
+            200,
+            headers=headers,
+            json={"meta": {"results": {"skip": start, "limit": limit, "total": TOTAL}}, "results": records},
+        )
+    return httpx.MockTransport(handler)
+
+async def walk(client, **kwargs):
+    numbers = []
+    async for data, error in client.iter_pages(RECALL_URL, {"search": "x", "limit": 5}, **kwargs):
+        assert error is None
+        numbers.extend(r["recall_number"] for r in data["results"])
+    return numbers
+
+@pytest.mark.asyncio
+async def test_iter_pages_walks_every_record_in_order():
+    requests = []
+    async with ApiClient(transport=make_paging_transport(requests)) as client:
+        numbers = await walk(client, page_size=100)
+    assert numbers == [f"F-{n:04d}" for n in range(TOTAL)]
+    assert [r.get("skip") for r in requests] == [None, "100", "200"]
+    assert requests[-1]["limit"] == "50"
+
+@pytest.mark.asyncio
+async def test_iter_pages_stops_at_max_results():
+    requests = []
+    async with ApiClient(transport=make_paging_transport(requests)) as client:
+        numbers = await walk(client, page_size=100, max_results=120)
+    assert len(numbers) == 120
+    assert [r["limit"] for r in requests] == ["100", "20"]
+
+@pytest.mark.asyncio
+async def test_iter_pages_follows_search_after_beyond_skip_limit(monkeypatch):
+    monkeypatch.setattr(api_client_module, "MAX_SKIP", 100)
+    requests = []
+    async with ApiClient(transport=make_paging_transport(requests)) as client:
+        numbers = await walk(client, page_size=50, max_results=230)
+    assert numbers == [f"F-{n:04d}" for n in range(230)]
+    assert [r.get("skip") for r in requests[:3]] == [None, "50", "100"]
+    assert all("search_after" in r for r in requests[3:])
+    assert [r["limit"] for r in requests[3:]] == ["50", "30"]
+
+class InFlight(list):
+    peak = 0
+
+def make_slow_transport(in_flight, stall_from=None):
+    """Serves pages after a short delay, or never from offset `stall_from` on, tracking the requests in flight."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        limit = int(request.url.params["limit"])
+        start = int(request.url.params.get("skip", 0))
+        in_flight.append(request)
+        in_flight.peak = max(in_flight.peak, len(in_flight))
+        try:
+            await asyncio.sleep(60 if stall_from is not None and start >= stall_from else 0.02)
+        finally:
+            in_flight.remove(request)
+        return httpx.Response(200, json={
+            "meta": {"results": {"total": 1000}},
+            "results": [{"recall_number": f"F-{n:04d}"} for n in range(start, start + limit)],
+        })
+    return httpx.MockTransport(handler)
+
+@pytest.mark.asyncio
+async def test_iter_pages_keeps_at_most_prefetch_requests_in_flight():
+    in_flight = InFlight()
+    async with ApiClient(transport=make_slow_transport(in_flight)) as client:
+        numbers = await walk(client, page_size=20, max_results=200, prefetch=3)
+    assert len(numbers) == 200
+    assert in_flight.peak == 3
+
+@pytest.mark.asyncio
+async def test_closing_a_walk_early_finishes_its_prefetched_requests():
+    in_flight = InFlight()
+    async with ApiClient(transport=make_slow_transport(in_flight, stall_from=40)) as client:
+        pages = client.iter_pages(RECALL_URL, {"search": "x"}, page_size=20, max_results=200, prefetch=3)
+        await pages.__anext__()
+        await pages.__anext__()
+        assert in_flight
+        await pages.aclose()
+        assert not in_flight
+
+@pytest.mark.asyncio
+async def test_tools_respect_max_results():
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=FixtureBackend(path=FIXTURE_PATH))
+    tool = mcp._tool_manager._tools["search_recalls_by_classification"].fn
+
+    report = await tool(classification="Class II", max_results=1)
+    assert report.startswith("Found recalls for classification 'Class II' (showing 1):")
+    assert report.count("- Product:") == 1
+
+    report = await tool(classification="Class II", max_results=10)
+    assert report.count("- Product:") == 2
+    assert await tool(classification="Class II", max_results=0) == "max_results must be between 1 and 25000."
+
+class LargePagesBackend(DataBackend):
+    """Serves `pages` pages of 100 recalls, each with a 10 KB product description."""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+
+    async def search(self, dataset, query=None, sort=None, limit=1, skip=0):
+        return None, "unused"
+
+    async def count(self, dataset, field, query=None, limit=None):
+        return None, "unused"
+
+    async def iter_pages(self, dataset, query=None, sort=None, max_results=None, page_size=100):
+        for page in range(self.pages):
+            records = [
+                {"recall_number": f"F-{n:05d}", "product_description": f"{n:05d}" + "x" * 10000}
+                for n in range(page * 100, (page + 1) * 100)
+            ]
+            yield {"meta": {"results": {"total": self.pages * 100}}, "results": records}, None
+
+async def peak_memory_of_walk(pages, **kwargs):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=LargePagesBackend(pages))
+    tool = mcp._tool_manager._tools["search_recalls_by_classification"].fn
+    tracemalloc.start()
+    try:
+        report = await tool(classification="Class II", max_results=25000, **kwargs)
+        return report, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.asyncio
+async def test_paged_tools_render_in_flat_memory():
+    report, few_pages_peak = await peak_memory_of_walk(8, output_format="json", fields=["recall_number"])
+    assert len(json.loads(report)["recalls"]) == 800
+    report, many_pages_peak = await peak_memory_of_walk(40, output_format="json", fields=["recall_number"])
+    result = json.loads(report)
+    assert result["total"] == 4000
+    assert result["recalls"][-1] == {"recall_number": "F-03999"}
+    assert many_pages_peak < few_pages_peak * 1.5
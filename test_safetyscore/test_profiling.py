@@ -0,0 +1,63 @@
+"""
+Tests for the sampled cProfile captures of tool calls.
+"""
+
+import os
+import pstats
+import signal
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.backends import FixtureBackend
+from safetyscore.profiling import ToolProfiler
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+def get_tool(profiler, name="search_recalls_by_product_description"):
+    mcp = FastMCP("TestSafetySearch")
+    register_food_tools(mcp, backend=FixtureBackend(path=FIXTURE_PATH), profiler=profiler)
+    return mcp._tool_manager._tools[name].fn
+
+@pytest.mark.asyncio
+async def test_armed_calls_are_captured_and_old_captures_pruned(tmp_path):
+    profiler = ToolProfiler(directory=str(tmp_path), keep=2)
+    tool = get_tool(profiler)
+    await tool(query="ice cream")
+    assert not os.listdir(tmp_path)
+
+    profiler.arm(3)
+    for _ in range(4):
+        await tool(query="ice cream")
+    assert profiler.captures == 3
+    files = sorted(os.listdir(tmp_path))
+    # Only the two newest of the three captures are kept, each with its summary
+    assert sorted(name.split("-")[-2] for name in files) == ["0002", "0002", "0003", "0003"]
+
+    summary = open(os.path.join(tmp_path, files[-1]), encoding="utf-8").read()
+    assert summary.startswith("tool: search_recalls_by_product_description\narguments: {'query': 'ice cream'}")
+    assert "formatters.py" in summary
+    assert pstats.Stats(os.path.join(tmp_path, files[-2])).total_calls > 0
+
+@pytest.mark.asyncio
+async def test_fast_calls_are_not_written(tmp_path):
+    profiler = ToolProfiler(directory=str(tmp_path), sample_rate=1.0, min_seconds=60)
+    await get_tool(profiler)(query="ice cream")
+    assert not os.listdir(tmp_path)
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="SIGUSR1 is not available on this platform")
+def test_sigusr1_arms_the_profiler():
+    profiler = ToolProfiler()
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        assert profiler.install_signal_handler(calls=5)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert profiler.armed == 5
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
@@ -0,0 +1,68 @@
+"""
+Tests for the compact record classes held by the response cache.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mcp.server.fastmcp import FastMCP
+
+from safetyscore.backends import CachedBackend, FixtureBackend
+from safetyscore.cache import ResponseCache
+from safetyscore.local_index import ENFORCEMENT, EVENT
+from safetyscore.models import AdverseEvent, Recall
+from safetyscore.records import CompactAdverseEvent, CompactRecall, compact_response
+from safetyscore.tools.food import register_food_tools
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+
+with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+    FIXTURE = json.load(f)
+
+def test_compact_records_read_like_the_response_dicts():
+    record = dict(FIXTURE[ENFORCEMENT][0], address_1="1 Dairy Lane")
+    recall = CompactRecall(record)
+    assert recall["recall_number"] == record["recall_number"]
+    assert recall.get("address_1") is None
+    assert "address_1" not in recall
+    assert Recall.model_validate(recall) == Recall.model_validate(record)
+    with pytest.raises(AttributeError):
+        recall.classification = "Class III"
+
+    event = FIXTURE[EVENT][0]
+    compact_event = CompactAdverseEvent(event)
+    assert AdverseEvent.model_validate(compact_event) == AdverseEvent.model_validate(event)
+    assert json.loads(json.dumps(compact_event.to_dict())) == AdverseEvent.model_validate(event).model_dump(exclude_none=True, exclude_defaults=True)
+
+def test_repeated_values_are_shared_and_raw_records_are_optional():
+    # Parsed separately, as two responses would be
+    first, second = (json.loads(json.dumps(FIXTURE[ENFORCEMENT][0])) for _ in range(2))
+    assert first["recalling_firm"] is not second["recalling_firm"]
+    a, b = CompactRecall(first), CompactRecall(second, keep_raw=True)
+    assert a["recalling_firm"] is b["recalling_firm"]
+    assert a.raw is None
+    assert b.raw == second
+
+    response = compact_response({"meta": {"results": {"total": 1}}, "results": [first]})
+    assert isinstance(response["results"][0], CompactRecall)
+    buckets = {"results": [{"term": "Class I", "count": 3}]}
+    assert compact_response(buckets) == buckets
+
+@pytest.mark.asyncio
+async def test_tools_render_the_same_from_compact_cache_entries():
+    reports = []
+    for compact in (False, True):
+        backend = CachedBackend(FixtureBackend(path=FIXTURE_PATH), ResponseCache(max_entries=8, compact=compact))
+        mcp = FastMCP("TestSafetySearch")
+        register_food_tools(mcp, backend=backend)
+        tool = mcp._tool_manager._tools["search_recalls_by_product_description"].fn
+        await tool(query="ice cream")
+        reports.append(await tool(query="ice cream", output_format="json"))
+        assert backend.cache.stats.hits == 1
+    assert reports[0] == reports[1]
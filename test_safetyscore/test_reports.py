@@ -0,0 +1,53 @@
+"""
+Tests for the shared single-pass recall analysis report.
+"""
+
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.models import Recall
+from safetyscore.reports import (
+    PRODUCT_DESCRIPTION_TEMPLATE,
+    PRODUCT_TYPE_TEMPLATE,
+    RecallAnalysis,
+    recall_analysis_report,
+)
+
+RECALLS = [
+    Recall(recalling_firm="Acme Foods", classification="Class I", recall_initiation_date="20250301"),
+    Recall(recalling_firm="Acme Foods", classification="Class II", recall_initiation_date="20240110"),
+    Recall(recalling_firm="Best Bakery", classification="Class II", recall_initiation_date="20230505"),
+    Recall(classification="Class III"),
+]
+
+def test_analysis_collects_all_aggregates_in_one_pass():
+    analysis = RecallAnalysis(recent_since="20240101")
+    for recall in RECALLS:
+        analysis.add(recall)
+    assert analysis.total == 4
+    assert [analysis.class_counts[c] for c in ("Class I", "Class II", "Class III")] == [1, 2, 1]
+    assert analysis.top_firms(2) == [("Acme Foods", 2), ("Best Bakery", 1)]
+    assert analysis.recent == 2
+    assert (analysis.earliest, analysis.latest) == ("20230505", "20250301")
+
+def test_report_accepts_a_one_shot_iterator():
+    report = recall_analysis_report(iter(RECALLS), PRODUCT_TYPE_TEMPLATE, "bread", recent_since="20240101")
+    assert "📊 **Recall Summary for bread Products:**" in report
+    assert "• Total recalls found: 4" in report
+    assert "• Date range: 20230505 to 20250301" in report
+    assert "• Acme Foods: 2 recalls" in report
+    assert "**Recall #4:**" in report
+    assert "• ⚠️ 1 Class I recalls detected - HIGH RISK" in report
+    assert "📈 **Recent Trend:** 2 recalls in the last 12 months" in report
+    assert "• This indicates ongoing safety concerns with bread products" in report
+
+def test_templates_only_change_wording():
+    report = recall_analysis_report(RECALLS[:1], PRODUCT_DESCRIPTION_TEMPLATE, "ice cream", recent_since="20240101")
+    assert report.startswith("🚨 **Food Recall Analysis for 'ice cream'**")
+    assert "IMMEDIATE ACTION REQUIRED" in report
+    assert "📞 Contact: Acme Foods" in report
+    assert "Top Companies" not in report
+    assert recall_analysis_report([], PRODUCT_DESCRIPTION_TEMPLATE, "ice cream") == "No food recalls found for 'ice cream'."
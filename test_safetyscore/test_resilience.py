@@ -0,0 +1,178 @@
+"""
+Tests for rate limiting, retries and the circuit breaker around openFDA requests.
+"""
+
+import os
+import sys
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.api_client import ApiClient
+from safetyscore.cache import ResponseCache, normalize_request
+from safetyscore.resilience import CircuitBreaker, RateLimiter, RetryPolicy, parse_retry_after
+
+RECALL_URL = "https://fda.test/food/enforcement.json"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def scripted_transport(statuses, requests, headers=None):
+    """Answers successive requests with the given status codes, then 200."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status = statuses[len(requests) - 1] if len(requests) <= len(statuses) else 200
+        if status == 200:
+            return httpx.Response(200, json={"results": [{"recall_number": "F-1"}]})
+        return httpx.Response(status, headers=headers or {})
+    return httpx.MockTransport(handler)
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests_to_the_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(rate_per_minute=60, burst=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        assert await limiter.acquire()
+    # Two requests fit in the burst, the next two wait one second each
+    assert clock.now == pytest.approx(2.0)
+
+@pytest.mark.asyncio
+async def test_daily_quota_fails_fast():
+    limiter = RateLimiter(rate_per_minute=600, daily_limit=2)
+    assert await limiter.acquire() and await limiter.acquire()
+    assert not await limiter.acquire()
+
+@pytest.mark.asyncio
+async def test_server_errors_are_retried_then_succeed():
+    requests = []
+    client = ApiClient(
+        transport=scripted_transport([503, 502], requests),
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001),
+    )
+    async with client:
+        data, error = await client.make_request(RECALL_URL, {"search": "x"})
+    assert error is None and data["results"]
+    assert len(requests) == 3
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    requests = []
+    client = ApiClient(transport=scripted_transport([404], requests), retry_policy=RetryPolicy(base_delay=0.001))
+    async with client:
+        _, error = await client.make_request(RECALL_URL, {"search": "x"})
+    assert error == "Error fetching data from API: 404 Not Found"
+    assert len(requests) == 1
+
+@pytest.mark.asyncio
+async def test_429_honours_retry_after_and_pauses_the_limiter():
+    requests = []
+    limiter = RateLimiter(rate_per_minute=6000)
+    client = ApiClient(
+        transport=scripted_transport([429], requests, headers={"Retry-After": "0"}),
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=5),
+    )
+    async with client:
+        data, error = await client.make_request(RECALL_URL, {"search": "x"})
+    assert error is None
+    assert len(requests) == 2
+
+def test_long_retry_after_stops_retrying():
+    policy = RetryPolicy(max_attempts=5, max_delay=10)
+    assert policy.delay(1, retry_after=3) == 3
+    assert policy.delay(1, retry_after=60) is None
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_repeated_failures_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    requests = []
+    client = ApiClient(
+        transport=scripted_transport([500, 500], requests),
+        retry_policy=RetryPolicy(max_attempts=1),
+        circuit_breaker=breaker,
+        coalesce=False,
+    )
+    async with client:
+        await client.make_request(RECALL_URL, {"search": "a"})
+        await client.make_request(RECALL_URL, {"search": "b"})
+        _, error = await client.make_request(RECALL_URL, {"search": "c"})
+        assert error == "openFDA is temporarily unavailable; not retrying for 30 seconds"
+        assert len(requests) == 2
+
+        clock.now += 30
+        data, error = await client.make_request(RECALL_URL, {"search": "d"})
+        assert error is None and breaker.state == CircuitBreaker.CLOSED
+
+def half_open_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 30
+    return breaker
+
+@pytest.mark.asyncio
+async def test_half_open_trial_answered_429_frees_the_trial():
+    clock = FakeClock()
+    breaker = half_open_breaker(clock)
+    requests = []
+    client = ApiClient(
+        transport=scripted_transport([429], requests, headers={"Retry-After": "0"}),
+        retry_policy=RetryPolicy(max_attempts=1),
+        circuit_breaker=breaker,
+        coalesce=False,
+    )
+    async with client:
+        _, error = await client.make_request(RECALL_URL, {"search": "a"})
+        assert error == "Error fetching data from API: 429 Too Many Requests"
+        # A 429 says nothing about upstream health, so the next request is a new trial
+        data, error = await client.make_request(RECALL_URL, {"search": "b"})
+    assert error is None and breaker.state == CircuitBreaker.CLOSED
+    assert len(requests) == 2
+
+@pytest.mark.asyncio
+async def test_half_open_trial_raising_an_exception_frees_the_trial():
+    clock = FakeClock()
+    breaker = half_open_breaker(clock)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            raise RuntimeError("boom")
+        return httpx.Response(200, json={"results": []})
+
+    client = ApiClient(
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(max_attempts=1),
+        circuit_breaker=breaker,
+        coalesce=False,
+    )
+    async with client:
+        _, error = await client.make_request(RECALL_URL, {"search": "a"})
+        assert error == "An unexpected error occurred: boom"
+        data, error = await client.make_request(RECALL_URL, {"search": "b"})
+    assert error is None and breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_api_key_is_sent_but_not_part_of_the_cache_key():
+    requests = []
+    cache = ResponseCache(max_entries=4)
+    client = ApiClient(transport=scripted_transport([], requests), api_key="secret", cache=cache)
+    async with client:
+        await client.make_request(RECALL_URL, {"search": "x"})
+    assert requests[0].url.params["api_key"] == "secret"
+    assert cache.get(normalize_request(RECALL_URL, {"search": "x"})) is not None
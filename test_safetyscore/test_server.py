@@ -0,0 +1,77 @@
+"""
+Tests for the HTTP transport mode of the server entry point.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from starlette.testclient import TestClient
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import server
+
+def test_http_app_lists_tools_over_stateless_streamable_http(monkeypatch):
+    monkeypatch.setenv("MCP_TRANSPORT", "streamable-http")
+    monkeypatch.setenv("MCP_STATELESS_HTTP", "true")
+    with TestClient(server.create_http_app()) as client:
+        assert client.get("/healthz").text == "ok"
+        response = client.post(
+            "/mcp/",
+            json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+            headers={"Accept": "application/json, text/event-stream"},
+        )
+    assert response.status_code == 200
+    data = next(line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: "))
+    tools = {tool["name"] for tool in json.loads(data)["result"]["tools"]}
+    server.mcp.register_tools()
+    assert tools == set(server.mcp._tool_manager._tools)
+
+def test_workers_share_the_openfda_quota(monkeypatch):
+    # share_quota writes os.environ directly; a copy keeps its writes out of later tests
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    food = server.food_tools()
+    monkeypatch.setattr(food, "DAILY_LIMIT", 1000)
+    monkeypatch.setattr(food.api_client, "rate_limiter", food.api_client.rate_limiter)
+    server.share_quota(4)
+    assert float(os.environ["FDA_RATE_LIMIT_PER_MINUTE"]) == food.RATE_LIMIT_PER_MINUTE / 4
+    assert int(os.environ["FDA_RATE_LIMIT_BURST"]) == food.RATE_LIMIT_BURST // 4
+    assert os.environ["FDA_DAILY_LIMIT"] == "250"
+
+def test_the_syncing_parent_keeps_one_share_of_the_quota(monkeypatch):
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    food = server.food_tools()
+    monkeypatch.setattr(food, "DATA_BACKEND", "local")
+    monkeypatch.setattr(food, "SYNC_INTERVAL", 3600.0)
+    monkeypatch.setattr(food, "RATE_LIMIT_PER_MINUTE", 240.0)
+    monkeypatch.setattr(food, "DAILY_LIMIT", 1000)
+    monkeypatch.setattr(food.api_client, "rate_limiter", food.api_client.rate_limiter)
+    server.share_quota(3)
+    assert float(os.environ["FDA_RATE_LIMIT_PER_MINUTE"]) == 60.0
+    assert os.environ["FDA_DAILY_LIMIT"] == "250"
+    # The sync's client in this process is held to the same share
+    assert food.api_client.rate_limiter.rate == 1.0
+    assert food.api_client.rate_limiter.daily_limit == 250
+
+def test_sse_is_refused_with_several_workers():
+    args = argparse.Namespace(transport="sse", workers=2, stateless=False)
+    with pytest.raises(SystemExit):
+        server.serve_http(args)
+
+def test_importing_the_server_defers_the_tools():
+    code = "import sys, server; print('safetyscore.tools.food' in sys.modules, server.mcp.tools_registered)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
+
+@pytest.mark.asyncio
+async def test_tools_are_registered_on_first_listing():
+    mcp = server.create_server()
+    assert not mcp._tool_manager._tools
+    tools = await mcp.list_tools()
+    assert {tool.name for tool in tools} == set(mcp._tool_manager._tools)
+    assert "search_recalls_by_product_description" in mcp._tool_manager._tools
@@ -0,0 +1,77 @@
+"""
+Tests for the incremental recall sync into the local index.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+
+import httpx
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from safetyscore.api_client import ApiClient
+from safetyscore.backends import OpenFDABackend
+from safetyscore.local_index import ENFORCEMENT, LocalIndex, query_index
+from safetyscore.resilience import RetryPolicy
+from safetyscore.sync import WATERMARK_KEY, sync_recalls
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "openfda_food.json")
+RECALL_URL = "https://fda.test/food/enforcement.json"
+
+with open(FIXTURE_PATH, "r", encoding="utf-8") as f:
+    RECALLS = json.load(f)[ENFORCEMENT]
+
+def make_source(responses, requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status, body = responses.pop(0)
+        return httpx.Response(status, json=body)
+    client = ApiClient(transport=httpx.MockTransport(handler), retry_policy=RetryPolicy(max_attempts=1))
+    return OpenFDABackend(client, urls={ENFORCEMENT: RECALL_URL})
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalIndex(str(tmp_path / "index.db"))
+    index.ingest(ENFORCEMENT, RECALLS)
+    yield index
+    index.close()
+
+@pytest.mark.asyncio
+async def test_sync_upserts_changes_since_the_watermark(index):
+    terminated = dict(RECALLS[1], status="Terminated", termination_date="20240601")
+    new_recall = dict(RECALLS[0], recall_number="F-0004-2024", report_date="20240605")
+    requests = []
+    source = make_source([(200, {"meta": {"results": {"total": 2}}, "results": [terminated, new_recall]})], requests)
+
+    async with source:
+        result = await sync_recalls(index, source, overlap_days=30, today=datetime(2024, 6, 10))
+
+    # With no watermark yet, the window starts from the newest report_date already indexed
+    assert result == {"since": "20240219", "until": "20240610", "upserted": 2, "error": None}
+    search = requests[0].url.params["search"]
+    assert "recall_initiation_date:[20240219 TO 20240610]" in search
+    assert "termination_date:[20240219 TO 20240610]" in search
+    assert index.count(ENFORCEMENT) == 4
+    data = query_index(index, ENFORCEMENT, {"search": 'recall_number:"F-0002-2024"'})
+    assert data["results"][0]["termination_date"] == "20240601"
+    assert index.get_meta(WATERMARK_KEY) == "20240610"
+
+@pytest.mark.asyncio
+async def test_failed_sync_keeps_the_watermark(index):
+    index.set_meta(WATERMARK_KEY, "20240501")
+    source = make_source([(500, {"error": "boom"})], [])
+    async with source:
+        result = await sync_recalls(index, source, today=datetime(2024, 6, 10))
+    assert result["error"].startswith("Error fetching data from API: 500")
+    assert index.get_meta(WATERMARK_KEY) == "20240501"
+
+    # openFDA's 404 means nothing changed; the watermark still advances
+    source = make_source([(404, {"error": {"code": "NOT_FOUND"}})], [])
+    async with source:
+        result = await sync_recalls(index, source, today=datetime(2024, 6, 10))
+    assert result["error"] is None and result["since"] == "20240401"
+    assert index.get_meta(WATERMARK_KEY) == "20240610"
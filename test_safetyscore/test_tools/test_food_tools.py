@@ -12,26 +12,16 @@ import pytest
 
 # Add the project root to the path so we can import safetyscore
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
-print('DEBUG project_root:', project_root)
 sys.path.insert(0, project_root)
-print('DEBUG sys.path:', sys.path)
 
-from safetyscore.tools.food import register_food_tools
-from mcp.server.fastmcp import FastMCP
-
-# Create a mock MCP server for testing
-test_mcp = FastMCP("TestSafetySearch")
-register_food_tools(test_mcp)
-
-# Debug: print FastMCP attributes to find where tools are stored
-print("DEBUG FastMCP attributes:", dir(test_mcp))
-print("DEBUG _tool_manager:", test_mcp._tool_manager)
-print("DEBUG _tool_manager dir:", dir(test_mcp._tool_manager))
-print("DEBUG _tool_manager _tools:", test_mcp._tool_manager._tools)
-
-# Get the registered tools from the server
+# Get the registered tools from a test server, created on first use rather than at import
 def get_tool_functions():
     """Extract tool functions from the FastMCP server's ToolManager."""
+    from safetyscore.tools.food import register_food_tools
+    from mcp.server.fastmcp import FastMCP
+
+    test_mcp = FastMCP("TestSafetySearch")
+    register_food_tools(test_mcp)
     tools = {}
     if hasattr(test_mcp, '_tool_manager') and hasattr(test_mcp._tool_manager, '_tools'):
         for tool_name, tool_obj in test_mcp._tool_manager._tools.items():